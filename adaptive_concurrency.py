@@ -0,0 +1,169 @@
+import asyncio
+import re
+import threading
+import time
+from model_result import is_error_response
+
+# Provider errors meaning the provider is over capacity, as opposed to the request being wrong
+OVERLOAD_PATTERN = re.compile(
+    r"\b(429|503|529)\b|rate.?limit|too many requests|overloaded|over capacity|throttl",
+    re.IGNORECASE
+)
+
+
+def is_overload_error(response):
+    """
+    Check whether a response is the error message of a request the provider refused for lack of capacity
+
+    Args:
+        response (str or None): Response returned by a model client
+
+    Returns:
+        bool: True for rate limit (429) and overload (503, 529) errors
+    """
+    return is_error_response(response) and bool(OVERLOAD_PATTERN.search(response))
+
+
+def _wake(waiter):
+    # Runs on the waiter's event loop
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Concurrency limit of one provider, adjusted AIMD-style from the outcome of its requests.
+
+    A healthy request (no error, latency within latency_tolerance times the usual latency) that
+    completes while the limit is in use adds 1/limit to the limit, so the limit grows by about one
+    per round trip under load. An overload error (429, 503, "overloaded", ...) or a latency spike
+    multiplies the limit by backoff. Requests already in flight when the limit was lowered don't
+    lower it again, so a burst of throttled requests backs off once instead of collapsing the limit.
+
+    Slots are taken by threads (acquire) and coroutines (acquire_async) alike, and the limit
+    stays within [minimum, maximum].
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, backoff=0.5, latency_tolerance=3.0,
+                 latency_smoothing=0.1, min_samples=5, clock=time.monotonic):
+        """
+        Initialize the limit
+
+        Args:
+            initial (int): Starting limit (default is 4)
+            minimum (int): Lower bound of the limit (default is 1)
+            maximum (int): Upper bound of the limit, e.g. the provider's static limit (default is 32)
+            backoff (float): Factor applied to the limit on overload (default is 0.5)
+            latency_tolerance (float): A request slower than this many times the usual latency counts
+                                       as a latency spike (default is 3)
+            latency_smoothing (float): Weight of each new latency in the usual latency, an exponential
+                                       moving average (default is 0.1)
+            min_samples (int): Latencies needed before latency spikes are detected (default is 5)
+            clock (callable): Monotonic clock in seconds, for tests (default is time.monotonic)
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.latency_smoothing = latency_smoothing
+        self.min_samples = min_samples
+        self._clock = clock
+        self.limit = float(min(maximum, max(minimum, initial)))
+        self.in_flight = 0
+        # Usual latency of healthy requests
+        self.latency = None
+        self._samples = 0
+        self._last_decrease = float('-inf')
+        self.decreases = 0
+        self._condition = threading.Condition()
+        self._async_waiters = []
+
+    def _available(self):
+        # Called with the lock held
+        return self.in_flight < int(self.limit)
+
+    def _take(self):
+        # Called with the lock held
+        self.in_flight += 1
+        return self._clock()
+
+    def acquire(self):
+        """
+        Wait for a slot
+
+        Returns:
+            float: Start time of the request, to pass to release
+        """
+        with self._condition:
+            self._condition.wait_for(self._available)
+            return self._take()
+
+    async def acquire_async(self):
+        """
+        Wait for a slot without blocking the event loop
+
+        Returns:
+            float: Start time of the request, to pass to release
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._available():
+                    return self._take()
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, started, response=None):
+        """
+        Free a slot and adjust the limit from the outcome of the request
+
+        Args:
+            started (float): Start time returned by acquire / acquire_async
+            response (str, optional): The model's response. If None, e.g. the request was cancelled,
+                                      the limit is left as is.
+        """
+        latency = self._clock() - started
+        with self._condition:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            if is_overload_error(response):
+                self._decrease(started)
+            elif response is not None and not is_error_response(response):
+                spike = (self._samples >= self.min_samples
+                         and latency > self.latency_tolerance * self.latency)
+                # Spikes count towards the usual latency too, so a lasting slowdown becomes the new normal
+                self.latency = latency if self.latency is None else \
+                    self.latency + self.latency_smoothing * (latency - self.latency)
+                self._samples += 1
+                if spike:
+                    self._decrease(started)
+                elif saturated:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def _decrease(self, started):
+        # Called with the lock held
+        if started < self._last_decrease:
+            return
+        self.limit = max(self.minimum, self.limit * self.backoff)
+        self._last_decrease = self._clock()
+        self.decreases += 1
+
+    def stats(self):
+        """
+        Get the current state of the limit
+
+        Returns:
+            dict: Current limit, requests in flight, usual latency in seconds and number of backoffs
+        """
+        with self._condition:
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'latency': self.latency,
+                'decreases': self.decreases
+            }
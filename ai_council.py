@@ -1,17 +1,36 @@
-from chatgpt import ChatGPT
-from claude import Claude
-from gemini import Gemini
-from grok import Grok
-from llama import Llama
+from providers import LazyProvider, missing_configuration
+from provider import supports, STREAMING, ASYNC, RoundCancelled
+from discussion_context import DiscussionContext, ContextCompactor, LayeredPrompt, estimate_tokens
+from rate_limiter import rate_limiters as default_rate_limiters, DEFAULT_OUTPUT_TOKENS
+from model_result import (ModelResult, TIMEOUT, UNAVAILABLE, is_error_response, as_model_result)
+from circuit_breaker import CLOSED
+from metrics import council_metrics as default_council_metrics
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextlib
+import functools
+import inspect
+import queue
+import threading
 import time
 
-# Define a mapping from model names to their classes
+# Define a mapping from model names to their classes. Classes are given by their dotted
+# path so a provider SDK is only imported once its model is first used (see providers.py)
 MODEL_CLASSES = {
-    'ChatGPT': ChatGPT,
-    'Claude': Claude,
-    'Gemini': Gemini,
-    'Grok': Grok,
-    'Llama': Llama
+    'ChatGPT': 'chatgpt.ChatGPT',
+    'Claude': 'claude.Claude',
+    'Gemini': 'gemini.Gemini',
+    'Grok': 'grok.Grok',
+    'Llama': 'llama.Llama'
+}
+
+# Same mapping for the asyncio clients used by AsyncAICouncil
+ASYNC_MODEL_CLASSES = {
+    'ChatGPT': 'chatgpt.AsyncChatGPT',
+    'Claude': 'claude.AsyncClaude',
+    'Gemini': 'gemini.AsyncGemini',
+    'Grok': 'grok.AsyncGrok',
+    'Llama': 'llama.AsyncLlama'
 }
 
 # Define default system prompts
@@ -94,8 +113,51 @@ DEFAULT_SYSTEM_PROMPTS = {
     Let's tackle the complex topics ahead with the collective brilliance and creativity that this council of AIs embodies. Your contributions are eagerly anticipated."""
 }
 
+# Response recorded for a model that missed its timeout or the round deadline
+TIMEOUT_RESPONSE_TEMPLATE = "Error getting response from {model_name}: timed out after {seconds:.1f}s"
+
+# Response of a model whose circuit breaker is open, see AICouncil.circuit_breakers
+CIRCUIT_OPEN_RESPONSE_TEMPLATE = ("Error getting response from {model_name}: provider unavailable after repeated "
+                                  "failures, next attempt in {seconds:.0f}s")
+
+# Prompt used to summarize older rounds when a ContextCompactor compacts the discussion
+SUMMARY_PROMPT_TEMPLATE = """Summarize this round of a council discussion for the members who will continue it.
+Keep each member's key claims, points of agreement and disagreement, and open questions. Attribute every point to its member.
+Be concise (at most 120 words) and do not add opinions of your own.
+
+{round_text}"""
+
+def _tracks_discussion(method):
+    """
+    Count the calls of a discussion method in the council's discussions in flight gauge
+
+    Args:
+        method (callable): Discussion method of AICouncil or AsyncAICouncil
+
+    Returns:
+        callable: The method, counted while it runs
+    """
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def tracked(self, *args, **kwargs):
+            with self.metrics.discussions_in_flight.track():
+                return await method(self, *args, **kwargs)
+    else:
+        @functools.wraps(method)
+        def tracked(self, *args, **kwargs):
+            with self.metrics.discussions_in_flight.track():
+                return method(self, *args, **kwargs)
+    return tracked
+
+
 class AICouncil:
-    def __init__(self, system_prompts=None, initial_prompt_template=None, follow_up_prompt_template=None):
+    # Mapping from model names to the client classes this council instantiates
+    model_classes = MODEL_CLASSES
+
+    def __init__(self, system_prompts=None, initial_prompt_template=None, follow_up_prompt_template=None,
+                 concurrent=False, max_workers=None, context_compactor=None, summary_model=None,
+                 model_timeout=None, round_deadline=None, quorum=None, model_options=None, provider_limits=None,
+                 rate_limiters=None, adaptive_concurrency=None, circuit_breakers=None, metrics=None):
         """
         Initialize the AI Council with individual system prompts for each model
         
@@ -107,29 +169,83 @@ class AICouncil:
                                                    Use {topic} as a placeholder for the discussion topic.
             follow_up_prompt_template (str, optional): Template for the follow-up prompt. If None, a default template will be used.
                                                      Use {context} as a placeholder for the discussion context.
+            concurrent (bool): If True, every model in a round is queried at once instead of one after
+                               another. Can be overridden per call (default is False)
+            max_workers (int, optional): Upper bound on the number of models queried at the same time
+                                         in concurrent mode. If None, one worker per model is used.
+            context_compactor (ContextCompactor, optional): Keeps follow-up prompts within per-model token
+                                                            budgets by summarizing older rounds. If None, every
+                                                            round sees the full transcript.
+            summary_model (str, optional): Model that writes the summaries of older rounds. If None, Gemini
+                                           is used when available, otherwise the first loaded model.
+            model_timeout (float, optional): Seconds a model gets to answer before it is marked as timed out
+                                             and cancelled. If None, models are never timed out individually.
+            round_deadline (float, optional): Seconds after which a round completes with the models that have
+                                              answered, the others being marked as timed out and cancelled.
+                                              If None, a round waits for every model.
+            quorum (int, optional): Minimum number of answers a round waits for even past its deadline
+                                    (model timeouts still apply). If None, the round completes at its
+                                    deadline whatever the number of answers.
+            model_options (dict, optional): Dictionary mapping model names to extra keyword arguments for
+                                            their client, e.g. {'Llama': {'hedging': HedgingPolicy()}}
+            provider_limits (dict, optional): Dictionary mapping model names to the maximum number of requests
+                                              in flight to that model at once, across every discussion run
+                                              on this council, e.g. {'Llama': 2}
+            rate_limiters (RateLimiterRegistry, optional): Requests-per-minute and tokens-per-minute limits of
+                                                           each provider. If None, the process-wide registry of
+                                                           rate_limiter.py is used, shared with every council.
+            adaptive_concurrency (dict, optional): Dictionary mapping model names to an AdaptiveConcurrencyLimit
+                                                   that adjusts the number of requests in flight to that model
+                                                   to its health, within provider_limits
+            circuit_breakers (CircuitBreakerRegistry, optional): Fail requests to a model right away while its
+                                                                 provider keeps failing, see circuit_breaker.py.
+                                                                 If None, every request is sent.
+            metrics (CouncilMetrics, optional): Metrics the model turns and discussions are recorded in. If
+                                                None, the process-wide metrics of metrics.py are used.
         """
+        # Round execution defaults, each discussion method can override them per call
+        self.concurrent = concurrent
+        self.max_workers = max_workers
+        self.context_compactor = context_compactor
+        self.summary_model = summary_model
+        # Round-level SLOs
+        self.model_timeout = model_timeout
+        self.round_deadline = round_deadline
+        self.quorum = quorum
+        self.model_options = model_options or {}
+        # Per-provider concurrency, shared by every discussion and round using this council
+        self.provider_limits = provider_limits or {}
+        self._provider_semaphores = {model_name: threading.BoundedSemaphore(limit)
+                                     for model_name, limit in self.provider_limits.items()}
+        self.rate_limiters = default_rate_limiters if rate_limiters is None else rate_limiters
+        self.adaptive_concurrency = adaptive_concurrency or {}
+        self.circuit_breakers = circuit_breakers
+        self.metrics = default_council_metrics if metrics is None else metrics
+        # Response length bound set by set_max_output_tokens, None keeps each client's default
+        self.max_output_tokens = None
+
         # Use defined default system prompts
         _default_prompts = DEFAULT_SYSTEM_PROMPTS.copy()
 
         if system_prompts is None:
             prompts = _default_prompts
         elif isinstance(system_prompts, str):
-            # If a single string is provided, use it for all models defined in MODEL_CLASSES
-            prompts = {model_name: system_prompts for model_name in MODEL_CLASSES}
+            # If a single string is provided, use it for all models defined in model_classes
+            prompts = {model_name: system_prompts for model_name in self.model_classes}
         else:
             # If a dictionary is provided, use it, filling missing models with defaults
             prompts = _default_prompts.copy()
             prompts.update(system_prompts)
             # Ensure only known models are included
-            prompts = {name: p for name, p in prompts.items() if name in MODEL_CLASSES}
+            prompts = {name: p for name, p in prompts.items() if name in self.model_classes}
 
         # Initialize models dynamically using the mapping
         self.models = {}
-        for model_name, model_class in MODEL_CLASSES.items():
+        for model_name, model_class in self.model_classes.items():
             # Only instantiate if a prompt is available (even if None)
             if model_name in prompts:
                  try:
-                    self.models[model_name] = model_class(prompts.get(model_name))
+                    self.models[model_name] = self._build_model(model_name, model_class, prompts.get(model_name))
                  except Exception as e:
                      print(f"Warning: Could not initialize model {model_name}: {e}")
                      # Optionally remove from prompts if init fails?
@@ -159,6 +275,72 @@ class AICouncil:
 
         Think critically, challenge assumptions. Be rigorous, and keep your response concise (200-400 words) but thorough. Optionally, pose a question to the group to deepen the discussion."""
     
+    def _build_model(self, model_name, model_class, system_prompt):
+        """
+        Create the client of a model
+
+        Clients given by their dotted path are wrapped in a LazyProvider, so the provider SDK is
+        imported and the client built on first use. Providers whose API key is missing are
+        rejected upfront without importing anything.
+
+        Args:
+            model_name (str): Name of the model
+            model_class (type or str): The client class, or its dotted path such as 'chatgpt.ChatGPT'
+            system_prompt (str): System prompt for the model
+
+        Returns:
+            object: The client, or a LazyProvider standing in for it
+
+        Raises:
+            ValueError: If the provider's API key is not configured
+        """
+        options = self.model_options.get(model_name, {})
+        if not isinstance(model_class, str):
+            model = model_class(system_prompt, **options)
+        else:
+            env_var = missing_configuration(model_class)
+            if env_var:
+                raise ValueError(f"{env_var} is not set")
+            model = LazyProvider(model_name, model_class, system_prompt, **options)
+        if self.max_output_tokens is not None:
+            self._apply_max_output_tokens(model_name, model)
+        return model
+
+    def set_max_output_tokens(self, max_output_tokens):
+        """
+        Bound the length of the models' responses, taking effect on their next request
+
+        Args:
+            max_output_tokens (int, dict or None): Maximum number of tokens per response for every model,
+                                                   or a dictionary mapping model names to their maximum.
+                                                   Models without a maximum keep their client's default.
+        """
+        self.max_output_tokens = max_output_tokens
+        for model_name, model in self.models.items():
+            self._apply_max_output_tokens(model_name, model)
+
+    def _apply_max_output_tokens(self, model_name, model):
+        """
+        Set a model's response length bound from self.max_output_tokens
+
+        Args:
+            model_name (str): Name of the model
+            model (object): The model's client, configured once built if it is a LazyProvider
+        """
+        limit = self.max_output_tokens
+        if isinstance(limit, dict):
+            limit = limit.get(model_name)
+
+        def apply(client):
+            # Clients that don't derive from Provider keep their own limits
+            if callable(getattr(client, 'set_max_output_tokens', None)):
+                client.set_max_output_tokens(limit)
+
+        if isinstance(model, LazyProvider):
+            model.when_built(apply)
+        else:
+            apply(model)
+
     def update_system_prompt(self, model_name, new_prompt):
         """
         Update the system prompt for a specific model
@@ -170,25 +352,23 @@ class AICouncil:
         Returns:
             bool: True if successful, False if model not found or init fails
         """
-        if model_name not in MODEL_CLASSES:
+        if model_name not in self.model_classes:
             print(f"Error: Model '{model_name}' is not a recognized model class.")
             return False
         
-        model_class = MODEL_CLASSES[model_name]
+        if model_name in self.models:
+            # System prompts are sent with every request, the client and its connections are kept
+            self.system_prompts[model_name] = new_prompt
+            return True
         
         try:
-            # Reinitialize the model with the new prompt
-            self.models[model_name] = model_class(new_prompt)
-            # Update the stored prompt
+            # The model failed to initialize before, try again with the new prompt
+            self.models[model_name] = self._build_model(model_name, self.model_classes[model_name], new_prompt)
             self.system_prompts[model_name] = new_prompt
-            print(f"Successfully updated and reinitialized model '{model_name}'.")
+            print(f"Successfully initialized model '{model_name}'.")
             return True
         except Exception as e:
-            print(f"Error: Failed to reinitialize model '{model_name}' with new prompt: {e}")
-            # Optionally remove the model if re-init fails?
-            # Or revert to the old prompt/instance?
-            # For now, just report error and return False
-            # Keep the old instance in self.models and old prompt in self.system_prompts
+            print(f"Error: Failed to initialize model '{model_name}' with new prompt: {e}")
             return False
     
     def update_all_system_prompts(self, new_prompts):
@@ -217,7 +397,628 @@ class AICouncil:
         if follow_up_prompt_template is not None:
             self.follow_up_prompt_template = follow_up_prompt_template
         
-    def discuss_topic(self, topic, rounds=1, verbose=False):
+    def _resolve_concurrency(self, concurrent, max_workers, model_count):
+        """
+        Work out how many workers a round should use
+
+        Args:
+            concurrent (bool or None): Per-call override of self.concurrent
+            max_workers (int or None): Per-call override of self.max_workers
+            model_count (int): Number of models taking part in the round
+
+        Returns:
+            int: Number of workers, 1 meaning the round runs sequentially
+        """
+        if concurrent is None:
+            concurrent = self.concurrent
+        if not concurrent or model_count < 2:
+            return 1
+        if max_workers is None:
+            max_workers = self.max_workers
+        if max_workers is None:
+            return model_count
+        return max(1, min(max_workers, model_count))
+
+    def _active_model_names(self, active_models=None):
+        """
+        Resolve which loaded models take part in a round
+
+        Args:
+            active_models (list, optional): Requested model names. If None, includes all available models.
+
+        Returns:
+            list: Names of the requested models that are actually loaded
+        """
+        if active_models is None:
+            return list(self.models.keys())
+        return [name for name in active_models if name in self.models]
+
+    def _initial_prompts(self, topic, model_names):
+        """
+        Build the opening prompt of a discussion for each model
+
+        Args:
+            topic (str): The topic or problem to discuss
+            model_names (list): Names of the models taking part in the round
+
+        Returns:
+            dict: Dictionary mapping model names to their prompt
+        """
+        initial_prompt = self.initial_prompt_template.format(topic=topic)
+        return {model_name: initial_prompt for model_name in model_names}
+
+    def _follow_up_prompts(self, discussion, model_names, user_contribution=None):
+        """
+        Build the follow-up prompt of a discussion round for each model
+
+        Args:
+            discussion (list or DiscussionContext): Previous rounds of the discussion
+            model_names (list): Names of the models taking part in the round
+            user_contribution (str, optional): Optional user contribution to add to context
+
+        Returns:
+            dict: Dictionary mapping model names to their prompt
+        """
+        if not isinstance(discussion, DiscussionContext):
+            discussion = DiscussionContext(discussion)
+        if self.context_compactor is not None:
+            for round_text in self.context_compactor.pending_summaries(discussion, model_names):
+                self._store_summary(round_text, self._summarize_round(round_text))
+        return self._assemble_follow_up_prompts(discussion, model_names, user_contribution)
+
+    def _store_summary(self, round_text, summary):
+        """
+        Keep the summary of a round in the context compactor, unless summarizing it failed
+
+        Args:
+            round_text (str): Rendered text of the round
+            summary (str or None): The summary, None if no model was available
+        """
+        if summary and not is_error_response(summary):
+            self.context_compactor.store_summary(round_text, summary)
+
+    def _assemble_follow_up_prompts(self, discussion, model_names, user_contribution=None):
+        """
+        Fill the follow-up template for each model from the summaries already written
+
+        Rounds that are not summarized yet are rendered in full. Never summarizes, so that
+        AsyncAICouncil can write the summaries concurrently beforehand.
+
+        Args:
+            discussion (DiscussionContext): Previous rounds of the discussion
+            model_names (list): Names of the models taking part in the round
+            user_contribution (str, optional): Optional user contribution to add to context
+
+        Returns:
+            dict: Dictionary mapping model names to their prompt
+        """
+        if self.context_compactor is None:
+            # Create context from all previous rounds, formatted once for the whole round
+            follow_up_prompt = self._layered_follow_up_prompt(discussion, user_contribution)
+            return {model_name: follow_up_prompt for model_name in model_names}
+
+        # Models sharing a budget share the same compacted context, only format it once
+        full_context = discussion.render(user_contribution)
+        prompts_by_context = {}
+        prompts = {}
+        for model_name in model_names:
+            context = self.context_compactor.render(discussion, model_name, user_contribution)
+            if context not in prompts_by_context:
+                if context == full_context:
+                    prompts_by_context[context] = self._layered_follow_up_prompt(discussion, user_contribution)
+                else:
+                    # Compacted contexts change from round to round, there is no stable prefix to lay out
+                    prompts_by_context[context] = self.follow_up_prompt_template.format(context=context)
+            prompts[model_name] = prompts_by_context[context]
+        return prompts
+
+    def _layered_follow_up_prompt(self, context, user_contribution=None):
+        """
+        Fill the follow-up template with the full transcript, keeping the rounds as separate segments
+
+        The template and the rounds so far form a prefix the next round repeats, which providers
+        with prompt caching only process once (see LayeredPrompt).
+
+        Args:
+            context (DiscussionContext): The discussion so far
+            user_contribution (str, optional): Optional user contribution to add to context
+
+        Returns:
+            str: The follow-up prompt, a LayeredPrompt if the template has a single {context} placeholder
+        """
+        segments = context.segments(user_contribution)
+        if self.follow_up_prompt_template.count("{context}") != 1:
+            return self.follow_up_prompt_template.format(context="".join(segments))
+        return LayeredPrompt.from_template(self.follow_up_prompt_template, segments,
+                                           stable_segments=1 + len(context.round_texts))
+
+    def _summary_model_name(self):
+        """
+        Pick the model that summarizes older rounds for the context compactor
+
+        Returns:
+            str or None: Name of a loaded model, or None if no model is loaded
+        """
+        if self.summary_model in self.models:
+            return self.summary_model
+        if 'Gemini' in self.models:
+            return 'Gemini'
+        return next(iter(self.models), None)
+
+    def _summarize_round(self, round_text):
+        """
+        Summarize one round of the discussion
+
+        Args:
+            round_text (str): Rendered text of the round
+
+        Returns:
+            str or None: The summary, or None if no model is available
+        """
+        model_name = self._summary_model_name()
+        if model_name is None:
+            return None
+        return self._ask(model_name, SUMMARY_PROMPT_TEMPLATE.format(round_text=round_text))
+
+    def _print_round(self, round_responses, initial=False):
+        """
+        Print the responses of a round to the console
+
+        Args:
+            round_responses (dict): Dictionary mapping model names to their responses
+            initial (bool): Whether this is the opening round of the discussion
+        """
+        for model_name, response in round_responses.items():
+            print(f"\n{model_name}'s {'initial ' if initial else ''}response:")
+            print(response)
+            print("-" * 80)
+
+    def _has_round_limits(self):
+        """
+        Check whether rounds have a per-model timeout or a round deadline
+
+        Returns:
+            bool: True if rounds have to be watched for stragglers
+        """
+        return self.model_timeout is not None or self.round_deadline is not None
+
+    def _timed_out_response(self, model_name, elapsed):
+        """
+        Response recorded for a model that did not answer in time
+
+        Args:
+            model_name (str): Name of the model
+            elapsed (float): Seconds the model was given
+
+        Returns:
+            ModelResult: The response recorded for the model, with the timeout status
+        """
+        self._record_outcome(model_name, None)
+        response = ModelResult(TIMEOUT_RESPONSE_TEMPLATE.format(model_name=model_name, seconds=elapsed),
+                               status=TIMEOUT, latency=elapsed, error_class='TimeoutError')
+        self.metrics.observe_turn(model_name, response)
+        return response
+
+    def _circuit_open_response(self, model_name):
+        """
+        Check the model's circuit breaker before sending it a request
+
+        Args:
+            model_name (str): Name of the model
+
+        Returns:
+            ModelResult or None: The response to return right away if the circuit is open, or None if
+                                 the request may be sent
+        """
+        if self.circuit_breakers is None:
+            return None
+        breaker = self.circuit_breakers.get(model_name)
+        if breaker.allow_request():
+            return None
+        response = ModelResult(CIRCUIT_OPEN_RESPONSE_TEMPLATE.format(model_name=model_name, seconds=breaker.retry_in()),
+                               status=UNAVAILABLE, latency=0.0, error_class='CircuitOpen')
+        self.metrics.observe_turn(model_name, response)
+        return response
+
+    def _record_outcome(self, model_name, response):
+        """
+        Report the outcome of a request to the model's circuit breaker
+
+        Args:
+            model_name (str): Name of the model
+            response (str or None): The model's response, None if it timed out
+        """
+        if self.circuit_breakers is None:
+            return
+        breaker = self.circuit_breakers.get(model_name)
+        if response is None or is_error_response(response):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def health(self):
+        """
+        Get the availability of every loaded model, as seen by its circuit breaker
+
+        Returns:
+            dict: Dictionary mapping model names to their status, see CircuitBreaker.status
+        """
+        if self.circuit_breakers is None:
+            return {model_name: {'state': CLOSED, 'available': True, 'consecutive_failures': 0, 'retry_in': 0.0}
+                    for model_name in self.models}
+        return {model_name: self.circuit_breakers.get(model_name).status() for model_name in self.models}
+
+    def _round_system_prompts(self, system_prompts=None):
+        """
+        Get the system prompts of a round
+
+        Args:
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts for this
+                                             call only, overriding self.system_prompts
+
+        Returns:
+            dict: Dictionary mapping model names to the system prompt each model gets
+        """
+        if not system_prompts:
+            return self.system_prompts
+        return {**self.system_prompts, **system_prompts}
+
+    def _provider_slot(self, model_name):
+        """
+        Get the context manager holding one of a model's request slots, see provider_limits
+
+        Args:
+            model_name (str): Name of the model
+
+        Returns:
+            object: The model's semaphore, or a no-op context manager if the model is not limited
+        """
+        return self._provider_semaphores.get(model_name) or contextlib.nullcontext()
+
+    def _call_adaptive(self, model_name, call, *args, **kwargs):
+        """
+        Call a model within its adaptive concurrency limit, see adaptive_concurrency
+
+        Args:
+            model_name (str): Name of the model
+            call (callable): Function sending the request and returning the model's response
+            *args, **kwargs: Arguments of the call
+
+        Returns:
+            str: The model's response
+        """
+        limit = self.adaptive_concurrency.get(model_name)
+        if limit is None:
+            return call(*args, **kwargs)
+        started = limit.acquire()
+        response = None
+        try:
+            response = call(*args, **kwargs)
+            return response
+        finally:
+            limit.release(started, response)
+
+    def _reserve_rate_limit(self, model_name, prompt, system_prompt=None):
+        """
+        Reserve a request against the model's rate limits, see rate_limiter.py
+
+        Args:
+            model_name (str): Name of the model
+            prompt (str): The prompt to answer
+            system_prompt (str, optional): System prompt for this request. If None, the client's default is used.
+
+        Returns:
+            Reservation or None: The reservation, whose delay must be waited before sending the request,
+                                 or None if the model is not rate limited
+        """
+        limiter = self.rate_limiters.get(model_name)
+        if limiter is None:
+            return None
+        model = self.models[model_name]
+        if system_prompt is None:
+            system_prompt = self.system_prompts.get(model_name)
+        sampling_params = getattr(model, 'sampling_params', None) or {}
+        output_tokens = (sampling_params.get('max_tokens') or sampling_params.get('max_output_tokens')
+                         or DEFAULT_OUTPUT_TOKENS)
+        return limiter.reserve(estimate_tokens(prompt) + estimate_tokens(system_prompt or ""), output_tokens)
+
+    @staticmethod
+    def _settle_rate_limit(reservation, response):
+        """
+        Give back the tokens reserved for a response but not used
+
+        Args:
+            reservation (Reservation or None): Reservation from _reserve_rate_limit
+            response (str): The model's response
+        """
+        if reservation is not None:
+            reservation.settle(estimate_tokens(response or ""))
+
+    def _finish_turn(self, model_name, response, started):
+        """
+        Account for a model's response in the circuit breaker and metrics
+
+        The rate limit reservation is settled by the caller, whether the turn completed or was cancelled.
+
+        Args:
+            model_name (str): Name of the model
+            response (str): The model's response
+            started (float): time.monotonic() when the request was sent
+
+        Returns:
+            ModelResult: The response, wrapped if the client returned a plain string
+        """
+        response = as_model_result(response, time.monotonic() - started)
+        self._record_outcome(model_name, response)
+        self.metrics.observe_turn(model_name, response)
+        return response
+
+    def _ask(self, model_name, prompt, system_prompt=None):
+        """
+        Get a model's response
+
+        Args:
+            model_name (str): Name of the model
+            prompt (str): The prompt to answer
+            system_prompt (str, optional): System prompt for this request. If None, the client's default is used.
+
+        Returns:
+            ModelResult: The model's response
+        """
+        response = self._circuit_open_response(model_name)
+        if response is not None:
+            return response
+        reservation = self._reserve_rate_limit(model_name, prompt, system_prompt)
+        if reservation is not None:
+            time.sleep(reservation.delay)
+        started = time.monotonic()
+        response = None
+        try:
+            with self._provider_slot(model_name):
+                response = self._call_adaptive(model_name, self.models[model_name].get_response, prompt,
+                                               system_prompt=system_prompt)
+        finally:
+            self._settle_rate_limit(reservation, response)
+        return self._finish_turn(model_name, response, started)
+
+    def _ask_streaming(self, model_name, prompt, callback, system_prompt=None):
+        """
+        Stream a model's response, or pass its full response as a single chunk if the
+        provider cannot stream
+
+        Args:
+            model_name (str): Name of the model
+            prompt (str): The prompt to answer
+            callback (callable): Function to call with each chunk of the response
+            system_prompt (str, optional): System prompt for this request. If None, the client's default is used.
+
+        Returns:
+            ModelResult: The model's full response
+        """
+        response = self._circuit_open_response(model_name)
+        if response is not None:
+            callback(response)
+            return response
+        reservation = self._reserve_rate_limit(model_name, prompt, system_prompt)
+        if reservation is not None:
+            time.sleep(reservation.delay)
+        started = time.monotonic()
+        response = None
+        try:
+            with self._provider_slot(model_name):
+                response = self._call_adaptive(model_name, self._stream_from, self.models[model_name], prompt,
+                                               callback, system_prompt)
+        finally:
+            # Also gives back the tokens of a turn cancelled by the round (RoundCancelled)
+            self._settle_rate_limit(reservation, response)
+        return self._finish_turn(model_name, response, started)
+
+    @staticmethod
+    def _stream_from(model, prompt, callback, system_prompt=None):
+        """
+        Stream a client's response, or pass its full response as a single chunk if it cannot stream
+
+        Args:
+            model (object): The model client
+            prompt (str): The prompt to answer
+            callback (callable): Function to call with each chunk of the response
+            system_prompt (str, optional): System prompt for this request. If None, the client's default is used.
+
+        Returns:
+            str: The model's full response
+        """
+        if supports(model, STREAMING):
+            return model.get_streaming_response(prompt, callback, system_prompt=system_prompt)
+        response = model.get_response(prompt, system_prompt=system_prompt)
+        callback(response)
+        return response
+
+    def _collect_round(self, prompts, concurrent=None, max_workers=None, system_prompts=None):
+        """
+        Get one response from each model for a single round
+
+        Args:
+            prompts (dict): Dictionary mapping model names to the prompt each model should answer
+            concurrent (bool, optional): Query all models at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous requests. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts overriding
+                                             self.system_prompts for this round
+
+        Returns:
+            dict: Dictionary mapping model names to their responses, in the same order as prompts
+        """
+        system_prompts = self._round_system_prompts(system_prompts)
+        workers = self._resolve_concurrency(concurrent, max_workers, len(prompts))
+        if workers == 1 and not self._has_round_limits():
+            return {model_name: self._ask(model_name, prompt, system_prompts.get(model_name))
+                    for model_name, prompt in prompts.items()}
+
+        responses = {}
+        for _ in self._round_events(prompts, workers, responses, stream=False, system_prompts=system_prompts):
+            pass
+        return responses
+
+    def _round_events(self, prompts, workers, responses, stream=True, system_prompts=None):
+        """
+        Run a round on a worker pool and merge the models' progress into one event stream
+
+        Every model runs in its own worker thread and reports into a shared queue, so each
+        model's first token is forwarded as soon as its provider produces it. Events of a given
+        model keep their order; events of different models interleave in arrival order.
+
+        The round also enforces self.model_timeout and self.round_deadline. A model that runs past
+        its timeout, or is still running when the deadline passes and at least self.quorum models
+        have answered, is marked as timed out and cancelled: it stops at its next chunk and its
+        response is replaced by a timeout notice.
+
+        Args:
+            prompts (dict): Dictionary mapping model names to the prompt each model should answer
+            workers (int): Number of models run at the same time
+            responses (dict): Filled with each model's full response, in the same order as prompts
+            stream (bool): If True, yield start, chunk and completion events for every model.
+                           If False, only wait for the round to finish.
+            system_prompts (dict, optional): Dictionary mapping model names to their system prompt.
+                                             If None, self.system_prompts is used.
+
+        Yields:
+            tuple: (model_name, chunk, is_complete) events, as passed to stream callbacks
+        """
+        system_prompts = self.system_prompts if system_prompts is None else system_prompts
+        events = queue.Queue()
+        started = {}
+        cancel_events = {model_name: threading.Event() for model_name in prompts}
+        # Streaming is what lets a straggler be stopped mid-response
+        use_streaming = stream or self._has_round_limits()
+
+        def run_model(model_name, prompt):
+            started[model_name] = time.monotonic()
+            # Notify start of response generation, also wakes the round up to watch its timeout
+            events.put((model_name, "", False))  # Empty chunk, not complete
+            try:
+                system_prompt = system_prompts.get(model_name)
+                if not use_streaming:
+                    return self._ask(model_name, prompt, system_prompt)
+
+                def model_callback(chunk):
+                    if cancel_events[model_name].is_set():
+                        raise RoundCancelled(model_name)
+                    if stream:
+                        events.put((model_name, chunk, False))  # Chunk, not complete
+
+                return self._ask_streaming(model_name, prompt, model_callback, system_prompt)
+            finally:
+                # Notify completion
+                events.put((model_name, "", True))  # Empty chunk, complete flag
+
+        round_start = time.monotonic()
+        timed_out = {}
+        quorum = 0 if self.quorum is None else min(self.quorum, len(prompts))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-council")
+        try:
+            futures = {model_name: executor.submit(run_model, model_name, prompt)
+                       for model_name, prompt in prompts.items()}
+            pending = set(futures)
+            answered = 0
+            while pending:
+                now = time.monotonic()
+                # Sleep until the next model timeout or the round deadline, whichever comes first
+                wake_times = []
+                if self.model_timeout is not None:
+                    wake_times.extend(started[model_name] + self.model_timeout
+                                      for model_name in pending if model_name in started)
+                if self.round_deadline is not None and answered >= quorum:
+                    wake_times.append(round_start + self.round_deadline)
+                try:
+                    event = events.get(timeout=max(0, min(wake_times) - now) if wake_times else None)
+                except queue.Empty:
+                    event = None
+
+                if event is not None:
+                    model_name, chunk, is_complete = event
+                    if model_name not in pending:
+                        continue  # Late events of a model that already timed out
+                    if is_complete:
+                        pending.discard(model_name)
+                        answered += 1
+                    if stream:
+                        yield event
+
+                now = time.monotonic()
+                expired = []
+                if self.model_timeout is not None:
+                    expired.extend(model_name for model_name in pending
+                                   if model_name in started and now - started[model_name] >= self.model_timeout)
+                if self.round_deadline is not None and answered >= quorum and now - round_start >= self.round_deadline:
+                    expired.extend(model_name for model_name in pending if model_name not in expired)
+                for model_name in expired:
+                    cancel_events[model_name].set()
+                    futures[model_name].cancel()
+                    pending.discard(model_name)
+                    timed_out[model_name] = now - started.get(model_name, round_start)
+                    if stream:
+                        yield (model_name, "", True)
+
+            # Gather in model order rather than completion order so results stay stable
+            for model_name, future in futures.items():
+                if model_name in timed_out:
+                    responses[model_name] = self._timed_out_response(model_name, timed_out[model_name])
+                else:
+                    responses[model_name] = future.result()
+        finally:
+            # Don't wait on stragglers or on streams nobody is listening to anymore
+            for cancel_event in cancel_events.values():
+                cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _stream_round(self, prompts, callback=None, concurrent=None, max_workers=None, system_prompts=None):
+        """
+        Stream one response from each model for a single round
+
+        Args:
+            prompts (dict): Dictionary mapping model names to the prompt each model should answer
+            callback (callable): Function to call with model name and token chunk
+                                 callback(model_name, chunk, is_complete)
+            concurrent (bool, optional): Stream all models at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous streams. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts overriding
+                                             self.system_prompts for this round
+
+        Returns:
+            dict: Dictionary mapping model names to their full responses, in the same order as prompts
+        """
+        system_prompts = self._round_system_prompts(system_prompts)
+        workers = self._resolve_concurrency(concurrent, max_workers, len(prompts))
+
+        if workers > 1 or self._has_round_limits():
+            responses = {}
+            # Callbacks all run on the calling thread, in the order chunks arrive
+            for model_name, chunk, is_complete in self._round_events(prompts, workers, responses,
+                                                                     system_prompts=system_prompts):
+                if callback:
+                    callback(model_name, chunk, is_complete)
+            return responses
+
+        round_responses = {}
+        for model_name, prompt in prompts.items():
+            # Notify start of response generation
+            if callback:
+                callback(model_name, "", False)  # Empty chunk, not complete
+
+            # Get streaming response
+            def model_callback(chunk):
+                if callback:
+                    callback(model_name, chunk, False)  # Chunk, not complete
+
+            round_responses[model_name] = self._ask_streaming(model_name, prompt, model_callback,
+                                                              system_prompts.get(model_name))
+
+            # Notify completion
+            if callback:
+                callback(model_name, "", True)  # Empty chunk, complete flag
+        return round_responses
+
+    @_tracks_discussion
+    def discuss_topic(self, topic, rounds=1, verbose=False, concurrent=None, max_workers=None, system_prompts=None):
         """
         Facilitate a discussion among all AI models about a given topic
         
@@ -225,58 +1026,55 @@ class AICouncil:
             topic (str): The topic or problem to discuss
             rounds (int): Number of discussion rounds (default is 1)
             verbose (bool): If True, print responses to console (default is False)
+            concurrent (bool, optional): Query all models of a round at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous requests. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts for this call
+                                             only, overriding the council's prompts
             
         Returns:
             list: List of responses from each model in each round
         """
         discussion = []
-        
-        # Initial prompt for all models
-        initial_prompt = self.initial_prompt_template.format(topic=topic)
+        # Transcript grows with each round instead of being rebuilt from the whole discussion
+        context = DiscussionContext()
+        model_names = self._active_model_names()
         
         # Get initial responses from all models
-        round_responses = {}
-        for model_name, model in self.models.items():
-            response = model.get_response(initial_prompt)
-            round_responses[model_name] = response
-            if verbose:
-                print(f"\n{model_name}'s initial response:")
-                print(response)
-                print("-" * 80)
+        round_responses = self._collect_round(
+            self._initial_prompts(topic, model_names),
+            concurrent=concurrent,
+            max_workers=max_workers,
+            system_prompts=system_prompts
+        )
+        if verbose:
+            self._print_round(round_responses, initial=True)
         
         discussion.append(round_responses)
+        context.add_round(round_responses)
         
         # Subsequent rounds
         for round_num in range(1, rounds):
             if verbose:
                 print(f"\nRound {round_num + 1}:")
             
-            # Create context from all previous responses in all rounds
-            context = self.get_discussion_context(discussion)
-            
-            # Get responses from all models in this round, one by one
-            round_responses = {}
-            for model_name, model in self.models.items():
-                follow_up_prompt = self.follow_up_prompt_template.format(context=context)
-                
-                response = model.get_response(follow_up_prompt)
-                round_responses[model_name] = response
-                if verbose:
-                    print(f"\n{model_name}'s response:")
-                    print(response)
-                    print("-" * 80)
-                # Remove delay when not in verbose mode
-                if verbose:
-                    time.sleep(1)  # Small delay between models
+            # Get responses from all models in this round
+            round_responses = self._collect_round(
+                self._follow_up_prompts(context, model_names),
+                concurrent=concurrent,
+                max_workers=max_workers,
+                system_prompts=system_prompts
+            )
+            if verbose:
+                self._print_round(round_responses)
             
             discussion.append(round_responses)
-            # Remove delay when not in verbose mode
-            if verbose:
-                time.sleep(1)  # Small delay between rounds
+            context.add_round(round_responses)
         
         return discussion
     
-    def stream_discussion(self, topic, active_models=None, callback=None, rounds=1):
+    @_tracks_discussion
+    def stream_discussion(self, topic, active_models=None, callback=None, rounds=1,
+                          concurrent=None, max_workers=None, system_prompts=None):
         """
         Facilitate a streaming discussion among selected AI models about a given topic
         
@@ -287,99 +1085,84 @@ class AICouncil:
             callback (callable): Function to call with model name and token chunk
                                  callback(model_name, chunk, is_complete)
             rounds (int): Number of discussion rounds (default is 1)
+            concurrent (bool, optional): Stream all models at once, merging their chunks as they
+                                         arrive. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous streams. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts for this call
+                                             only, overriding the council's prompts
             
         Returns:
             list: List of responses from each model in each round
         """
         discussion = []
-        
-        # If no active models specified, use all available models
-        if active_models is None:
-            active_models = list(self.models.keys())
+        # Transcript grows with each round instead of being rebuilt from the whole discussion
+        context = DiscussionContext()
         
         # Filter to only include models that are actually loaded
-        active_models = [name for name in active_models if name in self.models]
-        
-        # Initial prompt for all active models
-        initial_prompt = self.initial_prompt_template.format(topic=topic)
+        model_names = self._active_model_names(active_models)
         
         # Stream initial responses from active models
-        round_responses = {}
-        for model_name in active_models:
-            model = self.models[model_name]
-            
-            # Notify start of response generation
-            if callback:
-                callback(model_name, "", False)  # Empty chunk, not complete
-                
-            # Get streaming response
-            def model_callback(chunk):
-                if callback:
-                    callback(model_name, chunk, False)  # Chunk, not complete
-                    
-            response = model.get_streaming_response(initial_prompt, model_callback)
-            round_responses[model_name] = response
-            
-            # Notify completion
-            if callback:
-                callback(model_name, "", True)  # Empty chunk, complete flag
-                
+        round_responses = self._stream_round(
+            self._initial_prompts(topic, model_names),
+            callback=callback,
+            concurrent=concurrent,
+            max_workers=max_workers,
+            system_prompts=system_prompts
+        )
         discussion.append(round_responses)
+        context.add_round(round_responses)
         
         # Subsequent rounds
         for round_num in range(1, rounds):
-            # Create context from all previous responses
-            context = self.get_discussion_context(discussion)
-            
             # Stream responses from active models for this round
-            round_responses = {}
-            for model_name in active_models:
-                model = self.models[model_name]
-                follow_up_prompt = self.follow_up_prompt_template.format(context=context)
-                
-                # Notify start of response generation
-                if callback:
-                    callback(model_name, "", False)  # Empty chunk, not complete
-                    
-                # Get streaming response
-                def model_callback(chunk):
-                    if callback:
-                        callback(model_name, chunk, False)  # Chunk, not complete
-                        
-                response = model.get_streaming_response(follow_up_prompt, model_callback)
-                round_responses[model_name] = response
-                
-                # Notify completion
-                if callback:
-                    callback(model_name, "", True)  # Empty chunk, complete flag
-                    
+            round_responses = self._stream_round(
+                self._follow_up_prompts(context, model_names),
+                callback=callback,
+                concurrent=concurrent,
+                max_workers=max_workers,
+                system_prompts=system_prompts
+            )
             discussion.append(round_responses)
+            context.add_round(round_responses)
             
         return discussion
         
+    def usage(self):
+        """
+        Get the token usage reported by each model, see Provider.usage_stats
+
+        Returns:
+            dict: Dictionary mapping model names to their usage totals, for the models that reported usage
+        """
+        report = {}
+        for model_name, model in self.models.items():
+            # Don't build a lazy client just to find it has no usage yet
+            if isinstance(model, LazyProvider) and not model.is_built:
+                continue
+            usage_stats = getattr(model, 'usage_stats', None)
+            if callable(usage_stats):
+                report[model_name] = usage_stats()
+        return report
+
     def get_discussion_context(self, discussion, user_contribution=None):
         """
         Create a context string from all previous rounds of discussion
         
         Args:
-            discussion (list): List of dictionaries containing model responses for each round
+            discussion (list or DiscussionContext): List of dictionaries containing model responses for each
+                                                    round, or a DiscussionContext kept up to date across rounds
             user_contribution (str, optional): If provided, adds user contribution to the context
             
         Returns:
             str: Formatted context string for the next round
         """
-        context = "Previous discussion:\n"
-        for round_results in discussion:
-            for model_name, response in round_results.items():
-                context += f"\n{model_name}: {response}\n"
+        if not isinstance(discussion, DiscussionContext):
+            discussion = DiscussionContext(discussion)
+        return discussion.render(user_contribution)
         
-        # Add user contribution if provided
-        if user_contribution:
-            context += f"\nUser contribution: {user_contribution}\n"
-            
-        return context
-        
-    def continue_discussion(self, discussion, active_models=None, user_contribution=None):
+    @_tracks_discussion
+    def continue_discussion(self, discussion, active_models=None, user_contribution=None,
+                            concurrent=None, max_workers=None, system_prompts=None):
         """
         Continue an existing discussion by adding another round
         
@@ -388,30 +1171,27 @@ class AICouncil:
             active_models (list, optional): List of model names to include in the round
                                           If None, includes all available models
             user_contribution (str, optional): Optional user contribution to add to context
+            concurrent (bool, optional): Query all models at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous requests. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts for this call
+                                             only, overriding the council's prompts
             
         Returns:
             dict: Dictionary mapping model names to their responses for this round
         """
-        # If no active models specified, use all available models
-        if active_models is None:
-            active_models = list(self.models.keys())
-        
-        # Create context from all previous rounds
-        context = self.get_discussion_context(discussion, user_contribution)
-        
-        # Generate prompt for this round
-        follow_up_prompt = self.follow_up_prompt_template.format(context=context)
+        model_names = self._active_model_names(active_models)
         
         # Get responses from active models for this round
-        round_responses = {}
-        for model_name in active_models:
-            if model_name in self.models:
-                response = self.models[model_name].get_response(follow_up_prompt)
-                round_responses[model_name] = response
-        
-        return round_responses
+        return self._collect_round(
+            self._follow_up_prompts(discussion, model_names, user_contribution),
+            concurrent=concurrent,
+            max_workers=max_workers,
+            system_prompts=system_prompts
+        )
 
-    def stream_continue_discussion(self, discussion, active_models=None, user_contribution=None, callback=None):
+    @_tracks_discussion
+    def stream_continue_discussion(self, discussion, active_models=None, user_contribution=None, callback=None,
+                                   concurrent=None, max_workers=None, system_prompts=None):
         """
         Continue an existing discussion by adding another round with streaming responses
         
@@ -422,42 +1202,477 @@ class AICouncil:
             user_contribution (str, optional): Optional user contribution to add to context
             callback (callable): Function to call with model name and token chunk
                                  callback(model_name, chunk, is_complete)
+            concurrent (bool, optional): Stream all models at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous streams. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts for this call
+                                             only, overriding the council's prompts
             
         Returns:
             dict: Dictionary mapping model names to their responses for this round
         """
-        # If no active models specified, use all available models
-        if active_models is None:
-            active_models = list(self.models.keys())
-        
-        # Filter to only include models that are actually loaded
-        active_models = [name for name in active_models if name in self.models]
-        
-        # Create context from all previous rounds
-        context = self.get_discussion_context(discussion, user_contribution)
-        
-        # Generate prompt for this round
-        follow_up_prompt = self.follow_up_prompt_template.format(context=context)
+        model_names = self._active_model_names(active_models)
         
         # Stream responses from active models for this round
+        return self._stream_round(
+            self._follow_up_prompts(discussion, model_names, user_contribution),
+            callback=callback,
+            concurrent=concurrent,
+            max_workers=max_workers,
+            system_prompts=system_prompts
+        )
+
+
+class AsyncAICouncil(AICouncil):
+    """
+    AI Council whose rounds are coroutines, backed by the asyncio provider clients.
+
+    A single event loop can drive many discussions at once since waiting on a provider
+    does not hold a thread. Models within a round run concurrently by default.
+    """
+    model_classes = ASYNC_MODEL_CLASSES
+
+    def __init__(self, *args, concurrent=True, **kwargs):
+        """
+        Initialize the async AI Council, see AICouncil.__init__ for the arguments
+
+        Unlike AICouncil, models within a round run concurrently unless concurrent=False.
+        """
+        super().__init__(*args, concurrent=concurrent, **kwargs)
+        # Slots are held by coroutines, blocking clients run in threads don't go through the thread semaphores
+        self._async_provider_semaphores = {model_name: asyncio.Semaphore(limit)
+                                           for model_name, limit in self.provider_limits.items()}
+
+    async def _follow_up_prompts(self, discussion, model_names, user_contribution=None):
+        """
+        Build the follow-up prompt of a discussion round for each model, see AICouncil._follow_up_prompts
+
+        Summaries needed by the context compactor are written concurrently before the prompts are built.
+        """
+        if not isinstance(discussion, DiscussionContext):
+            discussion = DiscussionContext(discussion)
+        if self.context_compactor is not None:
+            pending = self.context_compactor.pending_summaries(discussion, model_names)
+            summaries = await asyncio.gather(*(self._summarize_round(round_text) for round_text in pending))
+            for round_text, summary in zip(pending, summaries):
+                self._store_summary(round_text, summary)
+        return self._assemble_follow_up_prompts(discussion, model_names, user_contribution)
+
+    async def _summarize_round(self, round_text):
+        """
+        Summarize one round of the discussion
+
+        Args:
+            round_text (str): Rendered text of the round
+
+        Returns:
+            str or None: The summary, or None if no model is available
+        """
+        model_name = self._summary_model_name()
+        if model_name is None:
+            return None
+        return await self._ask(model_name, SUMMARY_PROMPT_TEMPLATE.format(round_text=round_text))
+
+    async def _call_adaptive(self, model_name, call, *args, **kwargs):
+        """
+        Await a model's response within its adaptive concurrency limit, see AICouncil._call_adaptive
+
+        Args:
+            model_name (str): Name of the model
+            call (callable): Coroutine function sending the request and returning the model's response
+            *args, **kwargs: Arguments of the call
+
+        Returns:
+            str: The model's response
+        """
+        limit = self.adaptive_concurrency.get(model_name)
+        if limit is None:
+            return await call(*args, **kwargs)
+        started = await limit.acquire_async()
+        response = None
+        try:
+            response = await call(*args, **kwargs)
+            return response
+        finally:
+            limit.release(started, response)
+
+    async def _ask(self, model_name, prompt, system_prompt=None):
+        """
+        Get a model's response, running blocking clients in a worker thread
+
+        Args:
+            model_name (str): Name of the model
+            prompt (str): The prompt to answer
+            system_prompt (str, optional): System prompt for this request. If None, the client's default is used.
+
+        Returns:
+            ModelResult: The model's response
+        """
+        response = self._circuit_open_response(model_name)
+        if response is not None:
+            return response
+        model = self.models[model_name]
+        reservation = self._reserve_rate_limit(model_name, prompt, system_prompt)
+        if reservation is not None:
+            await asyncio.sleep(reservation.delay)
+        started = time.monotonic()
+        response = None
+        try:
+            async with self._async_provider_semaphores.get(model_name) or contextlib.nullcontext():
+                if supports(model, ASYNC):
+                    response = await self._call_adaptive(model_name, model.get_response, prompt,
+                                                         system_prompt=system_prompt)
+                else:
+                    response = await self._call_adaptive(model_name, asyncio.to_thread, model.get_response,
+                                                         prompt, system_prompt=system_prompt)
+        finally:
+            self._settle_rate_limit(reservation, response)
+        return self._finish_turn(model_name, response, started)
+
+    async def _ask_streaming(self, model_name, prompt, callback, system_prompt=None):
+        """
+        Stream a model's response, see AICouncil._ask_streaming
+
+        Blocking clients run in a worker thread and their chunks are handed back to the event
+        loop, so callbacks always run on the loop.
+
+        Args:
+            model_name (str): Name of the model
+            prompt (str): The prompt to answer
+            callback (callable): Function to call with each chunk of the response
+            system_prompt (str, optional): System prompt for this request. If None, the client's default is used.
+
+        Returns:
+            ModelResult: The model's full response
+        """
+        response = self._circuit_open_response(model_name)
+        if response is not None:
+            callback(response)
+            return response
+        reservation = self._reserve_rate_limit(model_name, prompt, system_prompt)
+        if reservation is not None:
+            await asyncio.sleep(reservation.delay)
+        started = time.monotonic()
+        response = None
+        try:
+            async with self._async_provider_semaphores.get(model_name) or contextlib.nullcontext():
+                response = await self._call_adaptive(model_name, self._stream_async, model_name, prompt, callback,
+                                                     system_prompt)
+        finally:
+            # Also gives back the tokens of a turn cancelled by its round deadline
+            self._settle_rate_limit(reservation, response)
+        return self._finish_turn(model_name, response, started)
+
+    async def _stream_async(self, model_name, prompt, callback, system_prompt=None):
+        """
+        Stream a model's response from the event loop, see _ask_streaming
+
+        Args:
+            model_name (str): Name of the model
+            prompt (str): The prompt to answer
+            callback (callable): Function to call with each chunk of the response
+            system_prompt (str, optional): System prompt for this request. If None, the client's default is used.
+
+        Returns:
+            str: The model's full response
+        """
+        model = self.models[model_name]
+        if supports(model, ASYNC):
+            if supports(model, STREAMING):
+                return await model.get_streaming_response(prompt, callback, system_prompt=system_prompt)
+            response = await model.get_response(prompt, system_prompt=system_prompt)
+            callback(response)
+            return response
+
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+
+        def thread_callback(chunk):
+            # Stop the blocking stream once its task has been cancelled
+            if cancelled.is_set():
+                raise RoundCancelled(model_name)
+            loop.call_soon_threadsafe(callback, chunk)
+
+        try:
+            return await asyncio.to_thread(self._stream_from, model, prompt, thread_callback, system_prompt)
+        finally:
+            cancelled.set()
+
+    async def _run_round(self, prompts, call, workers, on_timeout=None):
+        """
+        Run one coroutine per model for a single round
+
+        Enforces self.model_timeout and self.round_deadline like AICouncil._round_events, except
+        that stragglers are cancelled right away since their tasks can be cancelled.
+
+        Args:
+            prompts (dict): Dictionary mapping model names to the prompt each model should answer
+            call (callable): Coroutine function call(model_name, prompt) returning the model's response
+            workers (int): Number of models run at the same time
+            on_timeout (callable, optional): Called with the model name when a model times out
+
+        Returns:
+            dict: Dictionary mapping model names to their responses, in the same order as prompts
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(workers)
+        round_start = loop.time()
+        started = {}
+        timed_out = {}
+
+        def time_out(model_name):
+            timed_out[model_name] = loop.time() - started.get(model_name, round_start)
+            if on_timeout:
+                on_timeout(model_name)
+
+        async def run_model(model_name, prompt):
+            async with semaphore:
+                started[model_name] = loop.time()
+                if self.model_timeout is None:
+                    return await call(model_name, prompt)
+                try:
+                    return await asyncio.wait_for(call(model_name, prompt), self.model_timeout)
+                except asyncio.TimeoutError:
+                    time_out(model_name)
+
+        tasks = {model_name: asyncio.ensure_future(run_model(model_name, prompt))
+                 for model_name, prompt in prompts.items()}
+        if self.round_deadline is not None:
+            quorum = 0 if self.quorum is None else min(self.quorum, len(prompts))
+            done, pending = await asyncio.wait(tasks.values(), timeout=self.round_deadline)
+            # Past the deadline, keep waiting only until the quorum has answered
+            while pending and len(done) - len(timed_out) < quorum:
+                newly_done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                done |= newly_done
+            for model_name, task in tasks.items():
+                if task in pending:
+                    task.cancel()
+                    time_out(model_name)
+
+        responses = await asyncio.gather(*tasks.values(), return_exceptions=True)
         round_responses = {}
-        for model_name in active_models:
-            model = self.models[model_name]
-            
+        for model_name, response in zip(tasks, responses):
+            if model_name in timed_out:
+                response = self._timed_out_response(model_name, timed_out[model_name])
+            elif isinstance(response, BaseException):
+                raise response
+            round_responses[model_name] = response
+        return round_responses
+
+    async def _collect_round(self, prompts, concurrent=None, max_workers=None, system_prompts=None):
+        """
+        Get one response from each model for a single round
+
+        Args:
+            prompts (dict): Dictionary mapping model names to the prompt each model should answer
+            concurrent (bool, optional): Query all models at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous requests. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts overriding
+                                             self.system_prompts for this round
+
+        Returns:
+            dict: Dictionary mapping model names to their responses, in the same order as prompts
+        """
+        system_prompts = self._round_system_prompts(system_prompts)
+
+        async def ask(model_name, prompt):
+            return await self._ask(model_name, prompt, system_prompts.get(model_name))
+
+        return await self._run_round(
+            prompts,
+            ask,
+            self._resolve_concurrency(concurrent, max_workers, len(prompts))
+        )
+
+    async def _stream_round(self, prompts, callback=None, concurrent=None, max_workers=None, system_prompts=None):
+        """
+        Stream one response from each model for a single round
+
+        Args:
+            prompts (dict): Dictionary mapping model names to the prompt each model should answer
+            callback (callable): Function to call with model name and token chunk
+                                 callback(model_name, chunk, is_complete)
+            concurrent (bool, optional): Stream all models at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous streams. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts overriding
+                                             self.system_prompts for this round
+
+        Returns:
+            dict: Dictionary mapping model names to their full responses, in the same order as prompts
+        """
+        system_prompts = self._round_system_prompts(system_prompts)
+
+        async def stream_model(model_name, prompt):
             # Notify start of response generation
             if callback:
                 callback(model_name, "", False)  # Empty chunk, not complete
-                
-            # Get streaming response
+
             def model_callback(chunk):
                 if callback:
                     callback(model_name, chunk, False)  # Chunk, not complete
-                    
-            response = model.get_streaming_response(follow_up_prompt, model_callback)
-            round_responses[model_name] = response
-            
+
+            response = await self._ask_streaming(model_name, prompt, model_callback, system_prompts.get(model_name))
+
             # Notify completion
             if callback:
                 callback(model_name, "", True)  # Empty chunk, complete flag
+            return response
+
+        def on_timeout(model_name):
+            if callback:
+                callback(model_name, "", True)  # Empty chunk, complete flag
+
+        return await self._run_round(
+            prompts,
+            stream_model,
+            self._resolve_concurrency(concurrent, max_workers, len(prompts)),
+            on_timeout=on_timeout
+        )
+
+    @_tracks_discussion
+    async def discuss_topic(self, topic, rounds=1, verbose=False, concurrent=None, max_workers=None, system_prompts=None):
+        """
+        Facilitate a discussion among all AI models about a given topic
         
-        return round_responses
+        Args:
+            topic (str): The topic or problem to discuss
+            rounds (int): Number of discussion rounds (default is 1)
+            verbose (bool): If True, print responses to console (default is False)
+            concurrent (bool, optional): Query all models of a round at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous requests. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts for this call
+                                             only, overriding the council's prompts
+            
+        Returns:
+            list: List of responses from each model in each round
+        """
+        discussion = []
+        # Transcript grows with each round instead of being rebuilt from the whole discussion
+        context = DiscussionContext()
+        model_names = self._active_model_names()
+        
+        round_responses = await self._collect_round(
+            self._initial_prompts(topic, model_names),
+            concurrent=concurrent,
+            max_workers=max_workers,
+            system_prompts=system_prompts
+        )
+        if verbose:
+            self._print_round(round_responses, initial=True)
+        discussion.append(round_responses)
+        context.add_round(round_responses)
+        
+        for round_num in range(1, rounds):
+            if verbose:
+                print(f"\nRound {round_num + 1}:")
+            
+            round_responses = await self._collect_round(
+                await self._follow_up_prompts(context, model_names),
+                concurrent=concurrent,
+                max_workers=max_workers,
+                system_prompts=system_prompts
+            )
+            if verbose:
+                self._print_round(round_responses)
+            discussion.append(round_responses)
+            context.add_round(round_responses)
+        
+        return discussion
+
+    @_tracks_discussion
+    async def stream_discussion(self, topic, active_models=None, callback=None, rounds=1,
+                                concurrent=None, max_workers=None, system_prompts=None):
+        """
+        Facilitate a streaming discussion among selected AI models about a given topic
+        
+        Args:
+            topic (str): The topic or problem to discuss
+            active_models (list, optional): List of model names to include in the round.
+                                          If None, includes all available models.
+            callback (callable): Function to call with model name and token chunk
+                                 callback(model_name, chunk, is_complete)
+            rounds (int): Number of discussion rounds (default is 1)
+            concurrent (bool, optional): Stream all models at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous streams. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts for this call
+                                             only, overriding the council's prompts
+            
+        Returns:
+            list: List of responses from each model in each round
+        """
+        discussion = []
+        context = DiscussionContext()
+        model_names = self._active_model_names(active_models)
+        
+        for round_num in range(rounds):
+            if round_num == 0:
+                prompts = self._initial_prompts(topic, model_names)
+            else:
+                prompts = await self._follow_up_prompts(context, model_names)
+            round_responses = await self._stream_round(
+                prompts,
+                callback=callback,
+                concurrent=concurrent,
+                max_workers=max_workers,
+                system_prompts=system_prompts
+            )
+            discussion.append(round_responses)
+            context.add_round(round_responses)
+        
+        return discussion
+
+    @_tracks_discussion
+    async def continue_discussion(self, discussion, active_models=None, user_contribution=None,
+                                  concurrent=None, max_workers=None, system_prompts=None):
+        """
+        Continue an existing discussion by adding another round
+        
+        Args:
+            discussion (list): List of dictionaries containing model responses for each round
+            active_models (list, optional): List of model names to include in the round
+                                          If None, includes all available models
+            user_contribution (str, optional): Optional user contribution to add to context
+            concurrent (bool, optional): Query all models at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous requests. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts for this call
+                                             only, overriding the council's prompts
+            
+        Returns:
+            dict: Dictionary mapping model names to their responses for this round
+        """
+        model_names = self._active_model_names(active_models)
+        return await self._collect_round(
+            await self._follow_up_prompts(discussion, model_names, user_contribution),
+            concurrent=concurrent,
+            max_workers=max_workers,
+            system_prompts=system_prompts
+        )
+
+    @_tracks_discussion
+    async def stream_continue_discussion(self, discussion, active_models=None, user_contribution=None,
+                                         callback=None, concurrent=None, max_workers=None, system_prompts=None):
+        """
+        Continue an existing discussion by adding another round with streaming responses
+        
+        Args:
+            discussion (list): List of dictionaries containing model responses for each round
+            active_models (list, optional): List of model names to include in the round
+                                          If None, includes all available models
+            user_contribution (str, optional): Optional user contribution to add to context
+            callback (callable): Function to call with model name and token chunk
+                                 callback(model_name, chunk, is_complete)
+            concurrent (bool, optional): Stream all models at once. If None, self.concurrent is used.
+            max_workers (int, optional): Bound on simultaneous streams. If None, self.max_workers is used.
+            system_prompts (dict, optional): Dictionary mapping model names to system prompts for this call
+                                             only, overriding the council's prompts
+            
+        Returns:
+            dict: Dictionary mapping model names to their responses for this round
+        """
+        model_names = self._active_model_names(active_models)
+        return await self._stream_round(
+            await self._follow_up_prompts(discussion, model_names, user_contribution),
+            callback=callback,
+            concurrent=concurrent,
+            max_workers=max_workers,
+            system_prompts=system_prompts
+        )
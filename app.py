@@ -1,12 +1,23 @@
 from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from ai_council import AICouncil
+from discussion_context import ContextCompactor
+from hedging import HedgingPolicy
+from response_cache import ResponseCache
+from similarity import TopicIndex
+from rate_limiter import rate_limiters
+from adaptive_concurrency import AdaptiveConcurrencyLimit
+from circuit_breaker import CircuitBreakerRegistry
+from model_result import ModelResult, is_error_response, split_round
+from streaming import CoalescedStream, sse_event
+from settings_cache import SettingsCache
+from metrics import council_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+import cassettes
 from dotenv import load_dotenv
 from database import db
 import os
 import uuid
 import time
-import json
-from datetime import datetime
+from datetime import datetime, timezone
 
 # Load environment variables
 load_dotenv()
@@ -14,8 +25,92 @@ load_dotenv()
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default-secret-key')
 
-# Initialize the AICouncil
-ai_council = AICouncil()
+# Initialize the AICouncil, querying the models of each round concurrently and keeping
+# follow-up prompts within a flat token budget by summarizing older rounds
+max_workers = os.environ.get('AI_COUNCIL_MAX_WORKERS')
+context_compactor = ContextCompactor(
+    keep_recent_rounds=2,
+    default_token_budget=int(os.environ.get('AI_COUNCIL_CONTEXT_TOKEN_BUDGET', 4000))
+)
+# Per-model client options
+model_options = {}
+# Hedge the providers with heavy tail latency when AI_COUNCIL_HEDGING is set
+if os.environ.get('AI_COUNCIL_HEDGING'):
+    model_options['Llama'] = {'hedging': HedgingPolicy(initial_delay=15.0, max_hedges_per_minute=6)}
+    model_options['Grok'] = {'hedging': HedgingPolicy(initial_delay=5.0, max_hedges_per_minute=10)}
+# Answer repeated prompts (seed topics, demos, regression checks) from a response cache when
+# AI_COUNCIL_RESPONSE_CACHE is set, kept on disk if AI_COUNCIL_RESPONSE_CACHE_DIR is set
+response_cache = None
+if os.environ.get('AI_COUNCIL_RESPONSE_CACHE'):
+    response_cache = ResponseCache(
+        ttl=float(os.environ.get('AI_COUNCIL_RESPONSE_CACHE_TTL', 24 * 3600)),
+        cache_dir=os.environ.get('AI_COUNCIL_RESPONSE_CACHE_DIR')
+    )
+    for model_name in AICouncil.model_classes:
+        model_options.setdefault(model_name, {})['cache'] = response_cache
+
+# New topics that are near-duplicates of a discussion from the last AI_COUNCIL_SIMILAR_TOPIC_DAYS days
+# are offered its first round, reused directly if the request or AI_COUNCIL_REUSE_SIMILAR_TOPICS asks to
+topic_index = TopicIndex(
+    threshold=float(os.environ.get('AI_COUNCIL_SIMILAR_TOPIC_THRESHOLD', 0.7)),
+    max_age=float(os.environ.get('AI_COUNCIL_SIMILAR_TOPIC_DAYS', 7)) * 24 * 3600
+)
+topic_index_loaded = False
+reuse_similar_topics = bool(os.environ.get('AI_COUNCIL_REUSE_SIMILAR_TOPICS'))
+
+# System settings are cached for AI_COUNCIL_SETTINGS_TTL seconds, edits in the database
+# reach the running app within that time. Watched settings are first loaded by the first
+# request, so the app starts without waiting on the database
+settings = SettingsCache(db, ttl=float(os.environ.get('AI_COUNCIL_SETTINGS_TTL', 30)))
+
+# Pace requests to each provider at its quota, set in the 'rate_limits' system setting as
+# {"Claude": {"requests_per_minute": 50, "tokens_per_minute": 40000}, ...}
+settings.watch('rate_limits', rate_limiters.configure, load=False)
+
+# Adjust the number of requests in flight to each provider to its health when
+# AI_COUNCIL_ADAPTIVE_CONCURRENCY is set, backing off on rate limit and overload errors
+adaptive_concurrency = None
+if os.environ.get('AI_COUNCIL_ADAPTIVE_CONCURRENCY'):
+    adaptive_concurrency = {
+        model_name: AdaptiveConcurrencyLimit(maximum=int(os.environ.get('AI_COUNCIL_ADAPTIVE_CONCURRENCY_MAX', 32)))
+        for model_name in AICouncil.model_classes
+    }
+
+# A provider failing AI_COUNCIL_BREAKER_FAILURES requests in a row is failed fast for
+# AI_COUNCIL_BREAKER_RESET seconds before a trial request, instead of holding up every round
+circuit_breakers = CircuitBreakerRegistry(
+    failure_threshold=int(os.environ.get('AI_COUNCIL_BREAKER_FAILURES', 5)),
+    reset_timeout=float(os.environ.get('AI_COUNCIL_BREAKER_RESET', 30))
+)
+
+# A round completes after AI_COUNCIL_ROUND_DEADLINE seconds once AI_COUNCIL_QUORUM models have answered,
+# and no model may take longer than AI_COUNCIL_MODEL_TIMEOUT seconds
+ai_council = AICouncil(
+    concurrent=True,
+    max_workers=int(max_workers) if max_workers else None,
+    context_compactor=context_compactor,
+    model_timeout=float(os.environ.get('AI_COUNCIL_MODEL_TIMEOUT', 120)),
+    round_deadline=float(os.environ.get('AI_COUNCIL_ROUND_DEADLINE', 60)),
+    quorum=int(os.environ.get('AI_COUNCIL_QUORUM', 3)),
+    model_options=model_options,
+    adaptive_concurrency=adaptive_concurrency,
+    circuit_breakers=circuit_breakers
+)
+# Answer from the responses recorded in the AI_COUNCIL_REPLAY cassette instead of the providers,
+# e.g. to measure the app offline, or record every response into the AI_COUNCIL_RECORD cassette
+if os.environ.get('AI_COUNCIL_REPLAY'):
+    cassettes.replay(ai_council, cassettes.Cassette(os.environ['AI_COUNCIL_REPLAY']),
+                     speed=float(os.environ.get('AI_COUNCIL_REPLAY_SPEED', 1)))
+elif os.environ.get('AI_COUNCIL_RECORD'):
+    cassettes.record(ai_council, cassettes.Cassette(os.environ['AI_COUNCIL_RECORD']))
+# Bound the length of responses with the 'max_output_tokens' system setting, a number of
+# tokens for every model or {"Claude": 1000, "Llama": 512, ...}
+settings.watch('max_output_tokens', ai_council.set_max_output_tokens, load=False)
+
+@app.before_request
+def refresh_settings():
+    # Apply settings changed in the database since they were loaded
+    settings.refresh()
 
 # Get list of available models
 def get_available_models():
@@ -30,6 +125,77 @@ def get_default_prompts():
     available_models = get_available_models()
     return {name: prompt for name, prompt in DEFAULT_SYSTEM_PROMPTS.items() if name in available_models}
 
+# Get the system prompts edited through /api/prompts
+def get_system_prompts():
+    # Prompts are sent with every request, so an edit takes effect on the next round
+    # without rebuilding the model clients or touching the shared council
+    return {model['model_id']: model['system_prompt'] for model in db.get_all_models()
+            if model['model_id'] in ai_council.models and model.get('system_prompt')}
+
+# Get the index of past discussion topics, built from the database on first use
+def get_topic_index():
+    global topic_index_loaded
+    if not topic_index_loaded:
+        for discussion in db.get_all_discussions():
+            if discussion.get('results'):
+                topic_index.add(discussion['discussion_id'], discussion['topic'],
+                                discussion['created_at'].replace(tzinfo=timezone.utc).timestamp())
+        topic_index_loaded = True
+    return topic_index
+
+# Find a recent discussion whose first round can stand in for a near-duplicate topic
+def find_similar_discussion(topic, active_models):
+    for discussion_id, similarity in get_topic_index().find(topic):
+        discussion = db.get_discussion(discussion_id)
+        if not discussion or not discussion.get('results'):
+            continue
+        responses = discussion['results'][0]['responses']
+        # Only reuse a round that answered every requested model
+        if all(model in responses and not is_error_response(responses[model]) for model in active_models):
+            return discussion, similarity
+    return None, None
+
+def round_fields(round_responses):
+    """
+    Split a round into the fields stored in the database
+
+    Only answers are stored as responses, so failed turns never reach the context of later
+    rounds; they are kept under errors, and the status, latency and token usage of every turn
+    under metadata.
+    """
+    answers, errors = split_round(round_responses)
+    return {
+        'responses': answers,
+        'errors': errors,
+        'metadata': {model_name: response.metadata() for model_name, response in round_responses.items()
+                     if isinstance(response, ModelResult)}
+    }
+
+def check_round_cap(rounds, completed_rounds=0):
+    """
+    Check the number of rounds requested for a discussion against the 'max_rounds' system setting
+
+    Args:
+        rounds (object): Number of rounds requested, from the request body
+        completed_rounds (int): Rounds the discussion already has (default is 0)
+
+    Returns:
+        tuple or None: The error response if rounds is not a positive integer or the discussion
+                       would exceed max_rounds, otherwise None
+    """
+    if isinstance(rounds, bool) or not isinstance(rounds, int) or rounds < 1:
+        return jsonify({
+            'status': 'error',
+            'message': 'rounds must be a positive integer'
+        }), 400
+    max_rounds = settings.get('max_rounds')
+    if max_rounds is not None and completed_rounds + rounds > max_rounds:
+        return jsonify({
+            'status': 'error',
+            'message': f'Discussions are limited to {max_rounds} rounds'
+        }), 400
+    return None
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -56,7 +222,8 @@ def chat():
         }), 400
     
     # Start a discussion with only the active models
-    discussion_results = ai_council.discuss_topic(user_message, rounds=1, verbose=False)[0]
+    discussion_results = ai_council.discuss_topic(user_message, rounds=1, verbose=False,
+                                                  system_prompts=get_system_prompts())[0]
     
     # Filter responses to only include active models
     responses = {model: response for model, response in discussion_results.items() if model in active_models}
@@ -72,7 +239,7 @@ def process_text():
     text = data.get('text', '')
     
     # Start a discussion with the AI Council (1 round)
-    discussion_results = ai_council.discuss_topic(text, rounds=1, verbose=False)
+    discussion_results = ai_council.discuss_topic(text, rounds=1, verbose=False, system_prompts=get_system_prompts())
     
     # Format the response
     responses = {}
@@ -87,14 +254,47 @@ def process_text():
 @app.route('/api/models', methods=['GET'])
 def get_models():
     """
-    Get the list of available AI models in the council
+    Get the list of available AI models in the council, with the health of each provider
     """
     models = db.get_all_models()
+    health = ai_council.health()
+    return jsonify({
+        'status': 'success',
+        'models': [model['model_id'] for model in models],
+        # Models that failed to load are reported as unavailable
+        'health': {model['model_id']: health.get(model['model_id'], {'state': 'unloaded', 'available': False})
+                   for model in models}
+    })
+
+@app.route('/api/cache', methods=['GET'])
+def get_cache_stats():
+    """
+    Get the hit/miss counters of the response cache
+    """
     return jsonify({
         'status': 'success',
-        'models': [model['model_id'] for model in models]
+        'enabled': response_cache is not None,
+        'stats': response_cache.stats() if response_cache else None
     })
 
+@app.route('/api/usage', methods=['GET'])
+def get_usage():
+    """
+    Get the token usage of each model, including the prompt tokens served from provider caches
+    """
+    return jsonify({
+        'status': 'success',
+        'usage': ai_council.usage()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Get the per-model latency, time to first token, throughput, token and error metrics and the
+    discussions and streams in flight, in the Prometheus text format
+    """
+    return Response(council_metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/models/defaults', methods=['GET'])
 def get_model_defaults():
     """
@@ -169,7 +369,7 @@ def start_discussion():
     """
     data = request.get_json()
     topic = data.get('topic', '')
-    rounds = data.get('rounds', 1)  # Default to 1 round
+    rounds = data.get('rounds', settings.get('default_rounds', 1))
     active_models = data.get('active_models', get_available_models())  # Default to all models if not specified
     
     if not topic:
@@ -178,6 +378,10 @@ def start_discussion():
             'message': 'No topic provided'
         }), 400
     
+    round_cap_error = check_round_cap(rounds)
+    if round_cap_error:
+        return round_cap_error
+    
     # Validate active_models
     available_models = get_available_models()
     invalid_models = [model for model in active_models if model not in available_models]
@@ -202,28 +406,46 @@ def start_discussion():
         }
     }
     
+    # Look for a recent discussion of the same topic before asking the models again
+    similar, similarity = find_similar_discussion(topic, active_models)
+    reuse = similar is not None and data.get('reuse_similar', reuse_similar_topics)
+
     db.create_discussion(discussion_data)
     
     try:
-        # Start the first round
-        round_results = ai_council.discuss_topic(topic, rounds=1, verbose=True)[0]
+        round_data = {
+            'round_number': 1,
+            'timestamp': datetime.utcnow()
+        }
+        if reuse:
+            # Reuse the earlier first round instead of querying every model
+            round_results = similar['results'][0]['responses']
+            round_data['reused_from'] = similar['discussion_id']
+        else:
+            # Start the first round
+            round_results = ai_council.discuss_topic(topic, rounds=1, verbose=True, system_prompts=get_system_prompts())[0]
         
         # Filter responses to only include active models
         filtered_results = {model: response for model, response in round_results.items() if model in active_models}
         
         # Add round to discussion
-        round_data = {
-            'round_number': 1,
-            'responses': filtered_results,
-            'timestamp': datetime.utcnow()
-        }
+        round_data.update(round_fields(filtered_results))
         db.add_discussion_round(discussion_id, round_data)
+        get_topic_index().add(discussion_id, topic)
         
-        return jsonify({
+        response = {
             'status': 'success',
             'discussion_id': discussion_id,
             'results': filtered_results
-        })
+        }
+        if similar is not None:
+            response['similar_discussion'] = {
+                'id': similar['discussion_id'],
+                'topic': similar['topic'],
+                'similarity': similarity,
+                'reused': bool(reuse)
+            }
+        return jsonify(response)
     except Exception as e:
         db.update_discussion_status(discussion_id, 'error')
         return jsonify({
@@ -276,8 +498,11 @@ def continue_discussion(discussion_id):
     # Update requested rounds if specified
     if 'rounds' in data:
         # Set the total requested rounds to current completed rounds + new rounds requested
+        round_cap_error = check_round_cap(rounds, len(discussion['results']))
+        if round_cap_error:
+            return round_cap_error
         discussion['rounds_requested'] = len(discussion['results']) + rounds
-        db.update_model(discussion_id, {'rounds_requested': discussion['rounds_requested']})
+        db.update_discussion(discussion_id, {'rounds_requested': discussion['rounds_requested']})
     
     # Check if discussion is already complete
     if discussion['status'] == 'complete':
@@ -304,13 +529,14 @@ def continue_discussion(discussion_id):
         # Use AICouncil's continue_discussion method to get responses
         round_responses = ai_council.continue_discussion(
             discussion=discussion['results'],
-            active_models=active_models
+            active_models=active_models,
+            system_prompts=get_system_prompts()
         )
         
         # Add round to discussion
         round_data = {
             'round_number': len(discussion['results']) + 1,
-            'responses': round_responses,
+            **round_fields(round_responses),
             'timestamp': datetime.utcnow()
         }
         db.add_discussion_round(discussion_id, round_data)
@@ -377,13 +603,14 @@ def contribute_to_discussion(discussion_id):
         round_responses = ai_council.continue_discussion(
             discussion=discussion['results'],
             active_models=active_models,
-            user_contribution=contribution
+            user_contribution=contribution,
+            system_prompts=get_system_prompts()
         )
         
         # Add round to discussion
         round_data = {
             'round_number': len(discussion['results']) + 1,
-            'responses': round_responses,
+            **round_fields(round_responses),
             'user_contribution': contribution,
             'timestamp': datetime.utcnow()
         }
@@ -424,14 +651,49 @@ def get_discussion_models(discussion_id):
 def stream_discussion(discussion_id):
     """
     Stream the AI responses for a discussion using Server-Sent Events (SSE)
+
+    A POST requests more rounds, optionally with a user contribution for the next round; the
+    EventSource's GET then streams the next round, or the first one of a discussion without any. Tokens are coalesced into chunks of up to
+    AI_COUNCIL_STREAM_CHUNK_CHARS characters or AI_COUNCIL_STREAM_CHUNK_DELAY seconds, so a
+    fast provider sends a few frames per response instead of one per token.
     """
-    if discussion_id not in discussions:
+    discussion = db.get_discussion(discussion_id)
+    if not discussion:
         return jsonify({
             'status': 'error',
             'message': 'Discussion not found'
         }), 404
-        
-    discussion = discussions[discussion_id]
+    
+    if request.method == 'POST':
+        # Extend the discussion, the EventSource connecting next streams the new rounds
+        data = request.get_json() or {}
+        rounds = data.get('rounds', 1)  # Default to 1 additional round
+        round_cap_error = check_round_cap(rounds, len(discussion['results']))
+        if round_cap_error:
+            return round_cap_error
+        contribution = data.get('contribution')
+        if contribution and not discussion['results']:
+            return jsonify({
+                'status': 'error',
+                'message': 'Contributions can only be added once the discussion has a round'
+            }), 400
+        rounds_requested = len(discussion['results']) + rounds
+        update = {'rounds_requested': rounds_requested, 'status': 'in_progress'}
+        if contribution:
+            db.add_user_contribution({
+                'discussion_id': discussion_id,
+                'user_message': contribution,
+                'round_number': len(discussion['results']) + 1,
+                'active_models': discussion['active_models']
+            })
+            # Passed to the next streamed round
+            update['pending_contribution'] = contribution
+        db.update_discussion(discussion_id, update)
+        return jsonify({
+            'status': 'success',
+            'discussion_id': discussion_id,
+            'rounds_requested': rounds_requested
+        })
     
     # Only allow streaming for in-progress discussions
     if discussion['status'] != 'in_progress':
@@ -440,129 +702,83 @@ def stream_discussion(discussion_id):
             'message': f'Discussion is {discussion["status"]}, not in_progress'
         }), 400
     
-    # For POST requests, first continue the discussion in the background
-    if request.method == 'POST':
-        # Get rounds from request or use default
-        data = request.get_json() or {}
-        rounds = data.get('rounds', 1)  # Default to 1 round
-        
-        # Update requested rounds if specified
-        if 'rounds' in data:
-            discussion['rounds_requested'] = rounds
-        
-        # Create a new round in the discussion results
-        discussion['results'].append({})
+    completed_rounds = len(discussion['results'])
+    rounds_requested = discussion.get('rounds_requested', 1)
+    active_models = [model for model in discussion['active_models'] if model in ai_council.models]
+    system_prompts = get_system_prompts()
+    user_contribution = discussion.get('pending_contribution')
+    
+    def run_round(callback):
+        if not discussion['results']:
+            return ai_council.stream_discussion(
+                topic=discussion['topic'],
+                active_models=active_models,
+                callback=callback,
+                rounds=1,
+                system_prompts=system_prompts
+            )[0]
+        return ai_council.stream_continue_discussion(
+            discussion=discussion['results'],
+            active_models=active_models,
+            user_contribution=user_contribution,
+            callback=callback,
+            system_prompts=system_prompts
+        )
     
-    @stream_with_context
-    def generate():
-        # Send the event format and data
-        yield 'event: stream_start\n'
-        yield f'data: {{"discussion_id": "{discussion_id}", "rounds_requested": {discussion["rounds_requested"]}}}\n\n'
+    def events():
+        yield sse_event('stream_start', {'discussion_id': discussion_id, 'rounds_requested': rounds_requested})
         
-        # Get reference to the active models for this discussion
-        active_models = discussion.get('active_models', list(ai_council.models.keys()))
+        if completed_rounds >= rounds_requested:
+            # Nothing left to stream
+            db.update_discussion_status(discussion_id, 'complete')
+            yield sse_event('stream_complete', {'rounds': completed_rounds, 'rounds_requested': rounds_requested})
+            return
         
         try:
-            # Get last round number
-            current_round = len(discussion['results']) - 1
-            
-            # Define callback for streaming responses
-            def streaming_callback(model_name, chunk, is_complete):
+            stream = CoalescedStream(
+                run_round,
+                max_chars=int(os.environ.get('AI_COUNCIL_STREAM_CHUNK_CHARS', 256)),
+                max_delay=float(os.environ.get('AI_COUNCIL_STREAM_CHUNK_DELAY', 0.02))
+            )
+            # Each model's response so far, joined once it completes
+            parts = {}
+            for model_name, chunk, is_complete in stream:
                 if is_complete:
-                    # Send completion event
-                    data = json.dumps({
-                        "model": model_name,
-                        "response": discussion['results'][current_round].get(model_name, "")
-                    })
-                    return f'event: model_complete\ndata: {data}\n\n'
+                    yield sse_event('model_complete', {'model': model_name,
+                                                       'response': ''.join(parts.pop(model_name, []))})
+                elif not chunk:
+                    parts[model_name] = []
+                    yield sse_event('model_start', {'model': model_name})
                 else:
-                    # Send chunk update
-                    data = json.dumps({
-                        "model": model_name,
-                        "chunk": chunk
-                    })
-                    return f'event: model_update\ndata: {data}\n\n'
-            
-            # Use the user contribution if available from the request
-            user_contribution = None
-            if request.method == 'POST':
-                data = request.get_json() or {}
-                user_contribution = data.get('contribution')
-            
-            # Start streaming the discussion
-            if current_round == 0 and not any(discussion['results'][0]):
-                # This is a new discussion, start with the initial topic
-                topic = discussion['topic']
-                
-                def callback_wrapper(model_name, chunk, is_complete):
-                    # Store chunks in the discussion results as they come in
-                    if not is_complete:
-                        if model_name not in discussion['results'][current_round]:
-                            discussion['results'][current_round][model_name] = ""
-                        discussion['results'][current_round][model_name] += chunk
-                    
-                    # Send the event
-                    result = streaming_callback(model_name, chunk, is_complete)
-                    if result:
-                        yield result
-                
-                # Send model start events for each active model before streaming
-                for model_name in active_models:
-                    if model_name in ai_council.models:
-                        yield f'event: model_start\n'
-                        yield f'data: {{"model": "{model_name}"}}\n\n'
-                
-                # Stream the initial discussion
-                ai_council.stream_discussion(
-                    topic=topic,
-                    active_models=active_models,
-                    callback=callback_wrapper,
-                    rounds=1  # Always 1 round for stream_discussion
-                )
-            else:
-                # Continue an existing discussion
-                def callback_wrapper(model_name, chunk, is_complete):
-                    # Store chunks in the discussion results as they come in
-                    if not is_complete:
-                        if model_name not in discussion['results'][current_round]:
-                            discussion['results'][current_round][model_name] = ""
-                        discussion['results'][current_round][model_name] += chunk
-                    
-                    # Send the event
-                    result = streaming_callback(model_name, chunk, is_complete)
-                    if result:
-                        yield result
-                
-                # Send model start events for each active model before streaming
-                for model_name in active_models:
-                    if model_name in ai_council.models:
-                        yield f'event: model_start\n'
-                        yield f'data: {{"model": "{model_name}"}}\n\n'
-                
-                # Stream the continuation
-                ai_council.stream_continue_discussion(
-                    discussion=discussion['results'][:current_round],
-                    active_models=active_models,
-                    user_contribution=user_contribution,
-                    callback=callback_wrapper
-                )
+                    parts.setdefault(model_name, []).append(chunk)
+                    yield sse_event('model_update', {'model': model_name, 'chunk': chunk})
             
-            # Send event indicating all models are complete
-            yield 'event: stream_complete\n'
-            yield f'data: {{"rounds": {len(discussion["results"])}, "rounds_requested": {discussion["rounds_requested"]}}}\n\n'
+            round_data = {
+                'round_number': completed_rounds + 1,
+                **round_fields(stream.result),
+                'timestamp': datetime.utcnow()
+            }
+            if user_contribution:
+                round_data['user_contribution'] = user_contribution
+                db.update_discussion(discussion_id, {'pending_contribution': None})
+            db.add_discussion_round(discussion_id, round_data)
+            if completed_rounds == 0:
+                get_topic_index().add(discussion_id, discussion['topic'])
             
             # Check if this was the last requested round and update status
-            if len(discussion['results']) >= discussion['rounds_requested']:
-                discussion['status'] = 'complete'
+            if completed_rounds + 1 >= rounds_requested:
+                db.update_discussion_status(discussion_id, 'complete')
             
+            yield sse_event('stream_complete', {'rounds': completed_rounds + 1, 'rounds_requested': rounds_requested})
         except Exception as e:
-            # Send error event
-            error_msg = str(e)
-            yield f'event: stream_error\n'
-            yield f'data: {{"error": {json.dumps(error_msg)}}}\n\n'
-            
-            # Update discussion status
-            discussion['status'] = 'error'
+            db.update_discussion_status(discussion_id, 'error')
+            yield sse_event('stream_error', {'error': str(e)})
+    
+    @stream_with_context
+    def generate():
+        # Counted as open until the round ends or the client disconnects
+        with council_metrics.sse_streams_open.track():
+            yield from events()
     
     return Response(generate(), mimetype='text/event-stream')
 
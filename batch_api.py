@@ -0,0 +1,146 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from discussion_context import DiscussionContext
+from provider import supports, BATCH_API
+from model_result import is_error_response
+
+# Seconds between two checks on a pending batch
+DEFAULT_POLL_INTERVAL = 30.0
+
+# Response recorded for a request the provider's batch dropped
+MISSING_RESPONSE_TEMPLATE = "Error getting batch response from {model_name}: no result returned by the batch"
+
+
+def _custom_id(index):
+    # Both OpenAI and Anthropic accept short alphanumeric IDs, unique within a batch
+    return f"request-{index}"
+
+
+def collect_batch_round(council, round_prompts, system_prompts=None, poll_interval=DEFAULT_POLL_INTERVAL,
+                        max_workers=None, sleep=time.sleep):
+    """
+    Get one round of responses for many discussions at once through the providers' batch APIs
+
+    Each model declaring BATCH_API gets all its prompts of the round in a single batch, which is
+    then polled until it ends. Requests answered by the model's response cache are not submitted.
+    The other models are queried with ordinary requests while the batches are pending.
+
+    Args:
+        council (AICouncil): The council whose models answer
+        round_prompts (list): One dictionary per discussion mapping model names to the prompt to answer
+        system_prompts (dict, optional): Dictionary mapping model names to system prompts overriding
+                                         the council's prompts
+        poll_interval (float): Seconds between two checks on a pending batch (default is DEFAULT_POLL_INTERVAL)
+        max_workers (int, optional): Bound on simultaneous ordinary requests. If None, council.max_workers
+                                     is used, or one worker per model if that is not set either.
+        sleep (callable): Function waiting between polls, for tests (default is time.sleep)
+
+    Returns:
+        list: One dictionary per discussion mapping model names to their responses, in the same
+              order as round_prompts and, within a discussion, as its prompts
+    """
+    system_prompts = council._round_system_prompts(system_prompts)
+    responses = [{} for _ in round_prompts]
+    requests = {}
+    for index, prompts in enumerate(round_prompts):
+        for model_name, prompt in prompts.items():
+            requests.setdefault(model_name, []).append((index, prompt))
+
+    batches = {}
+    direct = []
+    for model_name, model_requests in requests.items():
+        model = council.models[model_name]
+        if not supports(model, BATCH_API):
+            direct.extend((model_name, index, prompt) for index, prompt in model_requests)
+            continue
+        system_prompt = system_prompts.get(model_name)
+        submit = []
+        for index, prompt in model_requests:
+            cached = model._cached_chunks(model._cache_key(prompt, system_prompt))
+            if cached is not None:
+                responses[index][model_name] = "".join(cached)
+            else:
+                submit.append((index, prompt))
+        if not submit:
+            continue
+        try:
+            batch_id = model.submit_batch([(_custom_id(index), prompt, system_prompt) for index, prompt in submit])
+            batches[model_name] = (batch_id, submit)
+        except Exception as e:
+            for index, _ in submit:
+                responses[index][model_name] = model._batch_error(str(e))
+
+    # Models without a batch API answer while the batches run
+    if direct:
+        workers = max_workers or council.max_workers or len(requests)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-council-batch") as executor:
+            futures = {(model_name, index): executor.submit(council._ask, model_name, prompt,
+                                                            system_prompts.get(model_name))
+                       for model_name, index, prompt in direct}
+            for (model_name, index), future in futures.items():
+                responses[index][model_name] = future.result()
+
+    pending = dict(batches)
+    while pending:
+        for model_name, (batch_id, submit) in list(pending.items()):
+            model = council.models[model_name]
+            try:
+                # Checking on a batch is safe to repeat, so transient failures are retried
+                if model.retry.call(lambda: model.batch_status(batch_id)) != "ended":
+                    continue
+                results = model.retry.call(lambda: model.batch_results(batch_id))
+            except Exception as e:
+                results = {_custom_id(index): model._batch_error(str(e)) for index, _ in submit}
+            del pending[model_name]
+
+            system_prompt = system_prompts.get(model_name)
+            for index, prompt in submit:
+                response = results.get(_custom_id(index))
+                if response is None:
+                    response = MISSING_RESPONSE_TEMPLATE.format(model_name=model_name)
+                elif model.cache is not None and not is_error_response(response):
+                    model.cache.put(model._cache_key(prompt, system_prompt), [response])
+                responses[index][model_name] = response
+        if pending:
+            sleep(poll_interval)
+
+    # Same model order as the prompts, like a synchronous round
+    return [{model_name: responses[index][model_name] for model_name in prompts}
+            for index, prompts in enumerate(round_prompts)]
+
+
+def discuss_topics(council, topics, rounds=1, system_prompts=None, poll_interval=DEFAULT_POLL_INTERVAL,
+                   max_workers=None, sleep=time.sleep):
+    """
+    Run a discussion on every topic, each round of all discussions being one batch per provider
+
+    Batch APIs are cheaper and rate limited separately from interactive requests, at the cost of
+    latency (up to 24 hours per round), so this suits offline runs over many topics.
+
+    Args:
+        council (AICouncil): The council running the discussions
+        topics (list): The topics to discuss
+        rounds (int): Number of discussion rounds (default is 1)
+        system_prompts (dict, optional): Dictionary mapping model names to system prompts overriding
+                                         the council's prompts
+        poll_interval (float): Seconds between two checks on a pending batch (default is DEFAULT_POLL_INTERVAL)
+        max_workers (int, optional): Bound on simultaneous requests to models without a batch API
+        sleep (callable): Function waiting between polls, for tests (default is time.sleep)
+
+    Returns:
+        list: One discussion per topic, each a list of rounds as returned by AICouncil.discuss_topic
+    """
+    model_names = council._active_model_names()
+    discussions = [[] for _ in topics]
+    contexts = [DiscussionContext() for _ in topics]
+    round_prompts = [council._initial_prompts(topic, model_names) for topic in topics]
+    for round_num in range(rounds):
+        if round_num:
+            round_prompts = [council._follow_up_prompts(context, model_names) for context in contexts]
+        round_responses = collect_batch_round(council, round_prompts, system_prompts=system_prompts,
+                                              poll_interval=poll_interval, max_workers=max_workers,
+                                              sleep=sleep)
+        for discussion, context, responses in zip(discussions, contexts, round_responses):
+            discussion.append(responses)
+            context.add_round(responses)
+    return discussions
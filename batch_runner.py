@@ -0,0 +1,274 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from batch_api import discuss_topics, DEFAULT_POLL_INTERVAL
+from model_result import split_round
+
+
+def topic_id(topic):
+    """
+    Derive a stable ID for a topic given without one
+
+    Args:
+        topic (str): The topic
+
+    Returns:
+        str: Short hex digest of the topic, unchanged across runs and reorderings of the input
+    """
+    return hashlib.sha256(topic.encode('utf-8')).hexdigest()[:16]
+
+
+def load_topics(path):
+    """
+    Read the topics of a batch from a JSONL or CSV file
+
+    JSONL lines are objects with a 'topic' and optionally an 'id', 'rounds' and 'system_prompts'.
+    CSV files have a header row with a 'topic' column and optionally 'id' and 'rounds' columns.
+
+    Args:
+        path (str): Path of a .jsonl or .csv file
+
+    Returns:
+        list: Topic dictionaries with 'id' and 'topic', plus 'rounds' and 'system_prompts' when given
+
+    Raises:
+        ValueError: If a row has no topic or two rows share an ID
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    topics = []
+    seen = set()
+    for number, row in enumerate(rows, start=1):
+        topic = (row.get('topic') or '').strip()
+        if not topic:
+            raise ValueError(f"{path}: row {number} has no topic")
+        item = {'id': str(row.get('id') or topic_id(topic)), 'topic': topic}
+        if item['id'] in seen:
+            raise ValueError(f"{path}: duplicate id {item['id']} on row {number}")
+        seen.add(item['id'])
+        if row.get('rounds'):
+            item['rounds'] = int(row['rounds'])
+        if isinstance(row.get('system_prompts'), dict):
+            item['system_prompts'] = row['system_prompts']
+        topics.append(item)
+    return topics
+
+
+def completed_ids(output_path):
+    """
+    Get the IDs of the topics an earlier run already finished
+
+    Topics that failed are not counted so a resumed run retries them. A partial last line,
+    left by a crash in the middle of a write, is ignored.
+
+    Args:
+        output_path (str): Path of the results file
+
+    Returns:
+        set: IDs of the topics with a successful result
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if result.get('status') == 'success':
+                done.add(result['id'])
+    return done
+
+
+def _start_fresh_line(output_path):
+    # Start on a fresh line if a crash cut the last result short
+    if os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, 'rb+') as out:
+            out.seek(-1, os.SEEK_END)
+            if out.read(1) != b"\n":
+                out.write(b"\n")
+
+
+def run_batch(council, topics, output_path, concurrency=4, rounds=1, system_prompts=None, resume=True):
+    """
+    Run a discussion on every topic and append each result to a JSONL file as it finishes
+
+    Up to `concurrency` discussions run at once; the council's provider_limits bound the requests
+    in flight to each provider across all of them.
+
+    Args:
+        council (AICouncil): The council running the discussions
+        topics (list): Topic dictionaries, see load_topics()
+        output_path (str): Path of the JSONL results file, appended to
+        concurrency (int): Maximum number of discussions running at once (default is 4)
+        rounds (int): Number of rounds of topics that don't set their own (default is 1)
+        system_prompts (dict, optional): System prompts for topics that don't set their own,
+                                         overriding the council's prompts
+        resume (bool): If True, skip the topics already completed in output_path (default is True)
+
+    Returns:
+        dict: Number of topics that succeeded, failed and were skipped
+    """
+    done = completed_ids(output_path) if resume else set()
+    pending = [topic for topic in topics if topic['id'] not in done]
+    summary = {'success': 0, 'error': 0, 'skipped': len(topics) - len(pending)}
+    write_lock = threading.Lock()
+
+    def run_topic(item):
+        start = time.monotonic()
+        result = {'id': item['id'], 'topic': item['topic']}
+        try:
+            result['results'] = council.discuss_topic(
+                item['topic'],
+                rounds=item.get('rounds', rounds),
+                system_prompts=item.get('system_prompts', system_prompts)
+            )
+            # Failed turns of each round, so they can be told apart from answers
+            result['errors'] = [split_round(round_responses)[1] for round_responses in result['results']]
+            result['status'] = 'success'
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = str(e)
+        result['elapsed'] = round(time.monotonic() - start, 3)
+        return result
+
+    _start_fresh_line(output_path)
+
+    with open(output_path, 'a', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch") as executor:
+        futures = [executor.submit(run_topic, item) for item in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            with write_lock:
+                # One line per topic, flushed right away so a crash loses at most the running topics
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                summary[result['status']] += 1
+            print(f"[{result['status']}] {result['id']} ({result['elapsed']:.1f}s): {result['topic'][:60]}")
+    return summary
+
+
+def run_batch_api(council, topics, output_path, rounds=1, system_prompts=None, resume=True,
+                  poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Run a discussion on every topic through the providers' batch APIs, see batch_api.discuss_topics
+
+    Topics sharing their rounds and system prompts are discussed together, one batch per provider
+    and round. Results are appended to the JSONL file once each group finishes.
+
+    Args:
+        council (AICouncil): The council running the discussions
+        topics (list): Topic dictionaries, see load_topics()
+        output_path (str): Path of the JSONL results file, appended to
+        rounds (int): Number of rounds of topics that don't set their own (default is 1)
+        system_prompts (dict, optional): System prompts for topics that don't set their own
+        resume (bool): If True, skip the topics already completed in output_path (default is True)
+        poll_interval (float): Seconds between two checks on a pending batch
+
+    Returns:
+        dict: Number of topics that succeeded, failed and were skipped
+    """
+    done = completed_ids(output_path) if resume else set()
+    pending = [topic for topic in topics if topic['id'] not in done]
+    summary = {'success': 0, 'error': 0, 'skipped': len(topics) - len(pending)}
+    _start_fresh_line(output_path)
+
+    groups = {}
+    for item in pending:
+        item_prompts = item.get('system_prompts', system_prompts)
+        key = (item.get('rounds', rounds), json.dumps(item_prompts, sort_keys=True))
+        groups.setdefault(key, (item_prompts, []))[1].append(item)
+
+    for (group_rounds, _), (group_prompts, items) in groups.items():
+        start = time.monotonic()
+        try:
+            discussions = discuss_topics(council, [item['topic'] for item in items], rounds=group_rounds,
+                                         system_prompts=group_prompts, poll_interval=poll_interval)
+            outcomes = [{'status': 'success', 'results': discussion,
+                         'errors': [split_round(round_responses)[1] for round_responses in discussion]}
+                        for discussion in discussions]
+        except Exception as e:
+            outcomes = [{'status': 'error', 'error': str(e)}] * len(items)
+        elapsed = round(time.monotonic() - start, 3)
+        with open(output_path, 'a', encoding='utf-8') as out:
+            for item, outcome in zip(items, outcomes):
+                out.write(json.dumps({'id': item['id'], 'topic': item['topic'], **outcome, 'elapsed': elapsed}) + "\n")
+                summary[outcome['status']] += 1
+        print(f"[batch] {len(items)} topics, {group_rounds} round(s) in {elapsed:.1f}s")
+    return summary
+
+
+def parse_limits(values):
+    """
+    Parse --provider-limit arguments
+
+    Args:
+        values (list): Strings of the form MODEL=N
+
+    Returns:
+        dict: Dictionary mapping model names to their limit
+    """
+    limits = {}
+    for value in values or []:
+        model_name, _, limit = value.partition('=')
+        if not limit:
+            raise argparse.ArgumentTypeError(f"expected MODEL=N, got {value!r}")
+        limits[model_name] = int(limit)
+    return limits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run AI Council discussions over a file of topics")
+    parser.add_argument('input', help="JSONL or CSV file of topics")
+    parser.add_argument('-o', '--output', help="JSONL results file (default is <input>.results.jsonl)")
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help="Discussions run at once (default is 4)")
+    parser.add_argument('-r', '--rounds', type=int, default=1, help="Rounds per discussion (default is 1)")
+    parser.add_argument('--provider-limit', action='append', metavar='MODEL=N',
+                        help="Maximum requests in flight to one model, e.g. Llama=2 (repeatable)")
+    parser.add_argument('--adaptive-concurrency', action='store_true',
+                        help="Adjust the requests in flight to each model to its latency and errors, "
+                             "up to its --provider-limit")
+    parser.add_argument('--sequential-models', action='store_true',
+                        help="Query the models of a round one after another instead of at once")
+    parser.add_argument('--batch-api', action='store_true',
+                        help="Send each round through the OpenAI and Anthropic batch APIs (cheaper, slower)")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"Seconds between checks on a pending batch (default is {DEFAULT_POLL_INTERVAL:.0f})")
+    parser.add_argument('--no-resume', action='store_true', help="Run every topic even if already in the output")
+    args = parser.parse_args(argv)
+
+    # Imported here so --help works without the provider configuration
+    from ai_council import AICouncil
+    from adaptive_concurrency import AdaptiveConcurrencyLimit
+
+    provider_limits = parse_limits(args.provider_limit)
+    adaptive_concurrency = None
+    if args.adaptive_concurrency:
+        adaptive_concurrency = {model_name: AdaptiveConcurrencyLimit(maximum=provider_limits.get(model_name, 32))
+                                for model_name in AICouncil.model_classes}
+    council = AICouncil(concurrent=not args.sequential_models, provider_limits=provider_limits,
+                        adaptive_concurrency=adaptive_concurrency)
+    output = args.output or f"{os.path.splitext(args.input)[0]}.results.jsonl"
+    if args.batch_api:
+        summary = run_batch_api(council, load_topics(args.input), output, rounds=args.rounds,
+                                resume=not args.no_resume, poll_interval=args.poll_interval)
+    else:
+        summary = run_batch(council, load_topics(args.input), output, concurrency=args.concurrency,
+                            rounds=args.rounds, resume=not args.no_resume)
+    print(f"Done: {summary['success']} succeeded, {summary['error']} failed, "
+          f"{summary['skipped']} already completed. Results in {output}")
+    return 1 if summary['error'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
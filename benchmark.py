@@ -0,0 +1,541 @@
+import argparse
+import contextlib
+import copy
+import functools
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from cassettes import Cassette, ReplayProvider, lognormal, replay
+
+# Version of the results file layout, bumped when fields change meaning
+RESULTS_VERSION = 1
+MODEL_NAMES = ['ChatGPT', 'Claude', 'Gemini', 'Grok', 'Llama']
+_WORDS = ("council model answer reason evidence risk cost plan trade-off assumption data latency "
+          "users market policy design scale safety signal budget").split()
+
+
+def model_names(count, names=None):
+    """
+    Name the simulated models of a council
+
+    Args:
+        count (int): Number of models
+        names (list, optional): Names to pick from first. If None, MODEL_NAMES is used.
+
+    Returns:
+        list: The first count names, then Model6, Model7, ... past the given names
+    """
+    names = list(MODEL_NAMES if names is None else names)
+    return (names + [f"Model{number}" for number in range(len(names) + 1, count + 1)])[:count]
+
+
+def synthetic_text(rng, words):
+    """
+    Generate filler text standing in for a model's response
+
+    Args:
+        rng (random.Random): Source of the words
+        words (int): Number of words
+
+    Returns:
+        str: The text
+    """
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def synthetic_cassette(names, response_words=150, words_per_chunk=3, first_token=0.05, chunk_interval=0.002,
+                       responses_per_model=3, seed=0):
+    """
+    Build a cassette of simulated responses, for benchmarks without a recorded one
+
+    Args:
+        names (list): Models to record responses for
+        response_words (int): Words per response (default is 150)
+        words_per_chunk (int): Words per streamed chunk (default is 3)
+        first_token (float): Seconds before the first chunk (default is 0.05)
+        chunk_interval (float): Seconds between two chunks (default is 0.002)
+        responses_per_model (int): Distinct responses of each model, replayed in turn (default is 3)
+        seed (int): Seed of the generated text (default is 0)
+
+    Returns:
+        Cassette: In-memory cassette with the responses
+    """
+    rng = random.Random(seed)
+    cassette = Cassette()
+    for model_name in names:
+        for number in range(responses_per_model):
+            words = synthetic_text(rng, response_words).split(" ")
+            pieces = [" ".join(words[start:start + words_per_chunk]) + " "
+                      for start in range(0, len(words), words_per_chunk)]
+            cassette.add({
+                'model': model_name,
+                'system_prompt': None,
+                'prompt': f"synthetic {number}",
+                'chunks': [[round(first_token + index * chunk_interval, 4), piece] for index, piece in enumerate(pieces)],
+                'status': 'ok',
+                'error': None,
+                'error_class': None,
+                'usage': None,
+                'latency': first_token + len(pieces) * chunk_interval
+            })
+    return cassette
+
+
+def synthetic_discussion(names, rounds, words, seed=0):
+    """
+    Build a transcript of earlier rounds
+
+    Args:
+        names (list): Models taking part
+        rounds (int): Number of rounds
+        words (int): Words per response
+        seed (int): Seed of the generated text (default is 0)
+
+    Returns:
+        list: Dictionaries mapping model names to their responses, one per round
+    """
+    rng = random.Random(seed)
+    return [{model_name: synthetic_text(rng, words) for model_name in names} for _ in range(rounds)]
+
+
+def build_council(cassette, names, replay_options, council_class=None, **council_options):
+    """
+    Build a council whose models answer from a cassette
+
+    Args:
+        cassette (Cassette): Responses the models replay
+        names (list): Models of the council, all recorded in the cassette
+        replay_options (dict): Options of the replay clients, see ReplayProvider
+        council_class (type, optional): Council class to derive from. If None, AICouncil is used.
+        **council_options: Arguments of the council, e.g. concurrent=True
+
+    Returns:
+        AICouncil: The council
+    """
+    if council_class is None:
+        from ai_council import AICouncil
+        council_class = AICouncil
+    model_classes = {model_name: functools.partial(ReplayProvider, cassette=cassette, model_name=model_name,
+                                                   **replay_options)
+                     for model_name in names}
+    benchmark_class = type('Benchmark' + council_class.__name__, (council_class,), {'model_classes': model_classes})
+    return benchmark_class(system_prompts="You are a member of a benchmark council", **council_options)
+
+
+def latency_stats(samples):
+    """
+    Summarize latencies
+
+    Args:
+        samples (list): Latencies in seconds
+
+    Returns:
+        dict: 'p50', 'p90', 'p99', 'mean', 'min' and 'max' in seconds
+    """
+    ordered = sorted(samples)
+
+    def percentile(share):
+        return ordered[min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))]
+
+    return {
+        'p50': percentile(0.5),
+        'p90': percentile(0.9),
+        'p99': percentile(0.99),
+        'mean': sum(ordered) / len(ordered),
+        'min': ordered[0],
+        'max': ordered[-1]
+    }
+
+
+def measure(name, params, operation, iterations, concurrency=1, memory=True):
+    """
+    Time an operation
+
+    The operation runs iterations times, concurrency at a time, then once more alone under
+    tracemalloc for its peak memory, so tracing doesn't slow down the timed runs.
+
+    Args:
+        name (str): Name of the benchmark
+        params (dict): Parameters of this run, reported with the results
+        operation (callable): Called with the iteration number
+        iterations (int): Number of timed runs
+        concurrency (int): Runs at once (default is 1)
+        memory (bool): Measure the peak memory of a run (default is True)
+
+    Returns:
+        dict: 'name', 'params', 'iterations', 'concurrency', 'latency' (see latency_stats),
+              'throughput' in runs per second and 'peak_memory_bytes'
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def timed(iteration):
+        start = time.perf_counter()
+        operation(iteration)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(timed, range(iterations)))
+    else:
+        for iteration in range(iterations):
+            timed(iteration)
+    wall = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            operation(iterations)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    result = {
+        'name': name,
+        'params': params,
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'latency': latency_stats(latencies),
+        'throughput': iterations / wall if wall else None,
+        'peak_memory_bytes': peak
+    }
+    return result
+
+
+def print_result(result):
+    """
+    Print a one-line summary of a result
+
+    Args:
+        result (dict): Result returned by measure
+    """
+    params_text = " ".join(f"{key}={value}" for key, value in result['params'].items())
+    peak = result['peak_memory_bytes']
+    memory_text = f"  peak {peak / 1024 / 1024:6.1f} MB" if peak is not None else ""
+    print(f"{result['name']:<22} {params_text:<30} p50 {result['latency']['p50'] * 1000:9.2f} ms  "
+          f"p99 {result['latency']['p99'] * 1000:9.2f} ms  {result['throughput']:7.1f}/s{memory_text}")
+
+
+def council_benchmarks(cassette, replay_options, model_counts, round_counts, transcript_sizes,
+                       iterations, concurrency, response_words, memory=True):
+    """
+    Benchmark the council methods
+
+    Args:
+        cassette (Cassette): Responses the models replay
+        replay_options (dict): Options of the replay clients, see ReplayProvider
+        model_counts (list): Council sizes to measure
+        round_counts (list): Rounds per discussion to measure
+        transcript_sizes (list): Rounds of earlier transcript to measure continue_discussion and
+                                 get_discussion_context with
+        iterations (int): Timed runs per benchmark
+        concurrency (int): Discussions run at once
+        response_words (int): Words per response of the earlier transcripts
+        memory (bool): Measure peak memory (default is True)
+
+    Returns:
+        list: Results, see measure
+    """
+    results = []
+
+    def add(result):
+        results.append(result)
+        print_result(result)
+
+    for model_count in model_counts:
+        names = model_names(model_count, cassette.model_names())
+        council = build_council(cassette, names, replay_options, concurrent=True)
+        for rounds in round_counts:
+            params = {'models': model_count, 'rounds': rounds}
+            add(measure(
+                'discuss_topic', params,
+                lambda iteration: council.discuss_topic(f"Benchmark topic {iteration}", rounds=rounds),
+                iterations, concurrency, memory))
+            add(measure(
+                'stream_discussion', params,
+                lambda iteration: council.stream_discussion(f"Benchmark topic {iteration}",
+                                                            callback=lambda *event: None, rounds=rounds),
+                iterations, concurrency, memory))
+        for transcript_rounds in transcript_sizes:
+            discussion = synthetic_discussion(names, transcript_rounds, response_words)
+            params = {'models': model_count, 'transcript_rounds': transcript_rounds}
+            add(measure(
+                'continue_discussion', params,
+                lambda iteration: council.continue_discussion(discussion),
+                iterations, concurrency, memory))
+            add(measure(
+                'get_discussion_context', params,
+                lambda iteration: council.get_discussion_context(discussion),
+                iterations * 10, 1, memory))
+    return results
+
+
+class InMemoryDatabase:
+    """
+    Database holding discussions and settings in memory, so the endpoints can be measured without MongoDB
+    """
+
+    def __init__(self):
+        self.discussions = {}
+        self.settings = {}
+        self.models = {}
+        self.contributions = []
+        self._lock = threading.Lock()
+
+    def get_all_models(self):
+        return list(self.models.values())
+
+    def update_model(self, model_id, update_data):
+        with self._lock:
+            self.models.setdefault(model_id, {'model_id': model_id}).update(update_data)
+
+    def create_discussion(self, discussion_data):
+        with self._lock:
+            discussion_data.update(created_at=datetime.utcnow(), updated_at=datetime.utcnow(),
+                                   status='in_progress', results=[])
+            self.discussions[discussion_data['discussion_id']] = discussion_data
+        return discussion_data['discussion_id']
+
+    def get_discussion(self, discussion_id):
+        # Copied like a document read from MongoDB
+        with self._lock:
+            return copy.deepcopy(self.discussions.get(discussion_id))
+
+    def update_discussion_status(self, discussion_id, status):
+        self.update_discussion(discussion_id, {'status': status})
+
+    def update_discussion(self, discussion_id, update_data):
+        with self._lock:
+            self.discussions[discussion_id].update(update_data)
+
+    def add_discussion_round(self, discussion_id, round_data):
+        with self._lock:
+            self.discussions[discussion_id]['results'].append(copy.deepcopy(round_data))
+
+    def get_all_discussions(self):
+        with self._lock:
+            return [copy.deepcopy(discussion) for discussion in self.discussions.values()]
+
+    def add_user_contribution(self, contribution_data):
+        with self._lock:
+            self.contributions.append(contribution_data)
+
+    def get_setting(self, key):
+        return self.settings.get(key)
+
+    def update_setting(self, key, value, description=None):
+        self.settings[key] = value
+
+
+def load_app(cassette, replay_options):
+    """
+    Import the web app on an in-memory database, its models answering from a cassette
+
+    Args:
+        cassette (Cassette): Responses the models replay
+        replay_options (dict): Options of the replay clients, see ReplayProvider
+
+    Returns:
+        module: The app module
+    """
+    if 'app' not in sys.modules:
+        database = types.ModuleType('database')
+        database.db = InMemoryDatabase()
+        sys.modules['database'] = database
+    import app as web_app
+    # Never reach the real providers
+    web_app.ai_council.models = {}
+    web_app.ai_council.system_prompts = {}
+    replay(web_app.ai_council, cassette, **replay_options)
+    return web_app
+
+
+def http_benchmarks(cassette, replay_options, model_counts, iterations, concurrency, memory=True):
+    """
+    Benchmark the discussion endpoints of the web app through Flask's test client
+
+    Args:
+        cassette (Cassette): Responses the models replay
+        replay_options (dict): Options of the replay clients, see ReplayProvider
+        model_counts (list): Numbers of active models to measure
+        iterations (int): Timed runs per benchmark
+        concurrency (int): Requests sent at once
+        memory (bool): Measure peak memory (default is True)
+
+    Returns:
+        list: Results, see measure
+    """
+    web_app = load_app(cassette, replay_options)
+    client = web_app.app.test_client()
+    results = []
+
+    def check(response):
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.request.path} answered {response.status_code}: {response.get_data(as_text=True)}")
+        return response
+
+    for model_count in model_counts:
+        active_models = model_names(model_count, cassette.model_names())
+        params = {'models': len(active_models)}
+        discussion_ids = []
+        lock = threading.Lock()
+
+        def start(iteration):
+            response = check(client.post('/api/discussions', json={
+                'topic': f"Benchmark topic {model_count}-{iteration}-{time.monotonic_ns()}",
+                'active_models': active_models,
+                'rounds': 1
+            }))
+            with lock:
+                discussion_ids.append(response.get_json()['discussion_id'])
+
+        def next_discussion(iteration):
+            return discussion_ids[iteration % len(discussion_ids)]
+
+        def continue_(iteration):
+            check(client.post(f"/api/discussions/{next_discussion(iteration)}/continue", json={'rounds': 1}))
+
+        def stream(iteration):
+            discussion_id = next_discussion(iteration)
+            check(client.post(f"/api/discussions/{discussion_id}/stream", json={'rounds': 1}))
+            body = check(client.get(f"/api/discussions/{discussion_id}/stream")).get_data(as_text=True)
+            if 'event: stream_error' in body:
+                raise RuntimeError(f"stream of {discussion_id} failed: {body[-200:]}")
+
+        # The endpoints log each round to stdout, kept out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            model_results = [measure('POST /api/discussions', params, start, iterations, concurrency, memory)]
+            # Each discussion is continued and streamed by one request at a time
+            endpoint_concurrency = min(concurrency, len(discussion_ids))
+            model_results.append(measure('POST /continue', params, continue_, iterations, endpoint_concurrency, memory))
+            model_results.append(measure('GET /stream', params, stream, iterations, endpoint_concurrency, memory))
+        for result in model_results:
+            print_result(result)
+        results += model_results
+    return results
+
+
+def environment():
+    """
+    Describe where the benchmark ran, so runs are only compared like for like
+
+    Returns:
+        dict: Python version, platform and git commit
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'commit': commit}
+
+
+def compare(baseline, results):
+    """
+    Print how the results of a run moved from a baseline run
+
+    Args:
+        baseline (dict): Results file of the baseline run
+        results (dict): Results file of this run
+    """
+    def key(result):
+        return result['name'], json.dumps(result['params'], sort_keys=True)
+
+    before = {key(result): result for result in baseline['results']}
+    for result in results['results']:
+        previous = before.get(key(result))
+        if previous is None:
+            continue
+        p50 = result['latency']['p50'] / previous['latency']['p50'] - 1 if previous['latency']['p50'] else 0
+        throughput = (result['throughput'] / previous['throughput'] - 1) if previous['throughput'] else 0
+        params_text = " ".join(f"{name}={value}" for name, value in result['params'].items())
+        print(f"{result['name']:<22} {params_text:<30} p50 {p50:+7.1%}  throughput {throughput:+7.1%}")
+
+
+def parse_counts(value):
+    """
+    Parse a comma-separated list of counts, e.g. "1,3,5"
+
+    Args:
+        value (str): The list
+
+    Returns:
+        list: The counts
+    """
+    try:
+        return [int(count) for count in value.split(',') if count]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated numbers, got {value!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark AI Council rounds and endpoints against simulated providers")
+    parser.add_argument('-o', '--output', default='benchmark.json', help="JSON results file (default is benchmark.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="Results file of an earlier run to compare with")
+    parser.add_argument('--cassette', help="Replay responses recorded with AI_COUNCIL_RECORD instead of simulated ones")
+    parser.add_argument('--models', type=parse_counts, default=[1, 3, 5], help="Council sizes (default is 1,3,5)")
+    parser.add_argument('--rounds', type=parse_counts, default=[1, 3], help="Rounds per discussion (default is 1,3)")
+    parser.add_argument('--transcript-rounds', type=parse_counts, default=[2, 8, 32],
+                        help="Rounds of earlier transcript for continue_discussion (default is 2,8,32)")
+    parser.add_argument('--response-words', type=int, default=150, help="Words per simulated response (default is 150)")
+    parser.add_argument('-n', '--iterations', type=int, default=10, help="Timed runs per benchmark (default is 10)")
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help="Discussions or requests at once (default is 4)")
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help="Median time to first token of the simulated providers, 0 to replay as recorded "
+                             "(default is 0.05)")
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay streams this many times faster (default is 1)")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Share of requests failing with a 503 (default is 0)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the simulated text, latencies and failures")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the peak memory measurements")
+    parser.add_argument('--skip-http', action='store_true', help="Only benchmark the council, not the web app")
+    args = parser.parse_args(argv)
+
+    if args.cassette:
+        cassette = Cassette(args.cassette)
+    else:
+        cassette = synthetic_cassette(model_names(max(args.models)), response_words=args.response_words, seed=args.seed)
+    recorded = cassette.model_names()
+    model_counts = sorted({min(count, len(recorded)) for count in args.models})
+    replay_options = {'speed': args.speed, 'failure_rate': args.failure_rate, 'seed': args.seed}
+    if args.latency:
+        replay_options['first_token_latency'] = lognormal(args.latency)
+
+    started = datetime.now(timezone.utc)
+    results = council_benchmarks(cassette, replay_options, model_counts, args.rounds, args.transcript_rounds,
+                                 args.iterations, args.concurrency, args.response_words, memory=not args.no_memory)
+    if not args.skip_http:
+        results += http_benchmarks(cassette, replay_options, model_counts, args.iterations, args.concurrency,
+                                   memory=not args.no_memory)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'started_at': started.isoformat(),
+        'environment': environment(),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
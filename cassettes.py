@@ -0,0 +1,491 @@
+import asyncio
+import inspect
+import json
+import os
+import random
+import re
+import threading
+import time
+from provider import Provider, AsyncProvider, supports, STREAMING, ASYNC, USAGE_REPORTING, CANCELLATION
+from model_result import is_error_response
+from response_cache import ResponseCache
+
+# HTTP status mentioned in a recorded error message, e.g. "529 overloaded"
+_STATUS_PATTERN = re.compile(r'\b([45]\d\d)\b')
+
+
+class CassetteMiss(LookupError):
+    """
+    Raised by a strict replay for a request the cassette has no recording of
+    """
+
+
+class ReplayFailure(Exception):
+    """
+    Failure replayed from a cassette or injected by a ReplayProvider
+
+    Carries the HTTP status of the failure if known, so retry.py treats it like the provider error it stands for.
+    """
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def fixed(seconds):
+    """
+    Latency distribution always returning the same latency
+
+    Args:
+        seconds (float): The latency
+
+    Returns:
+        callable: Sampler taking a random.Random and returning seconds
+    """
+    return lambda rng: seconds
+
+
+def uniform(low, high):
+    """
+    Latency distribution spread evenly between two bounds
+
+    Args:
+        low (float): Shortest latency in seconds
+        high (float): Longest latency in seconds
+
+    Returns:
+        callable: Sampler taking a random.Random and returning seconds
+    """
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median, sigma=0.5):
+    """
+    Long-tailed latency distribution, the usual shape of provider latencies
+
+    Args:
+        median (float): Median latency in seconds
+        sigma (float): Spread of the tail, 0.5 putting the 99th percentile at about 3.2x the median (default is 0.5)
+
+    Returns:
+        callable: Sampler taking a random.Random and returning seconds
+    """
+    return lambda rng: median * rng.lognormvariate(0, sigma)
+
+
+class Cassette:
+    """
+    Recorded provider responses, replayed by ReplayProvider.
+
+    Each interaction is a request (model name, system prompt, prompt) and how it went: the chunks
+    of the response with the seconds from the start of the request at which each arrived, or the
+    error it failed with, plus the token usage and latency reported. Interactions are kept in a
+    JSON Lines file, appended as they are recorded so a crashed recording keeps what it captured.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the cassette, loading the interactions already recorded at path
+
+        Args:
+            path (str, optional): JSON Lines file of the interactions. If None, the cassette only lives in memory.
+        """
+        self.path = path
+        self.interactions = []
+        self._by_key = {}
+        self._by_model = {}
+        # Next interaction replayed for each key and each model
+        self._cursors = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    @staticmethod
+    def key(model_name, system_prompt, prompt):
+        """
+        Build the key a request is recorded and looked up under
+
+        Args:
+            model_name (str): Name of the model in the council
+            system_prompt (str or None): System prompt of the request
+            prompt (str): The prompt
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        return ResponseCache.key(model_name, None, system_prompt, str(prompt))
+
+    def _index(self, interaction):
+        # Called with the lock held, or before the cassette is shared
+        self.interactions.append(interaction)
+        self._by_key.setdefault(interaction['key'], []).append(interaction)
+        self._by_model.setdefault(interaction['model'], []).append(interaction)
+
+    def add(self, interaction):
+        """
+        Record an interaction
+
+        Args:
+            interaction (dict): 'model', 'system_prompt', 'prompt', 'chunks' as [offset, text] pairs,
+                                'status', 'error', 'error_class', 'usage' and 'latency'
+        """
+        interaction = dict(interaction, key=self.key(interaction['model'], interaction['system_prompt'],
+                                                     interaction['prompt']))
+        with self._lock:
+            self._index(interaction)
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(interaction) + '\n')
+
+    def _next(self, cursor, interactions):
+        # Called with the lock held; repeated requests replay their recordings in order, then start over
+        position = self._cursors.get(cursor, 0)
+        self._cursors[cursor] = position + 1
+        return interactions[position % len(interactions)]
+
+    def find(self, model_name, system_prompt, prompt):
+        """
+        Get the recording of a request
+
+        Args:
+            model_name (str): Name of the model in the council
+            system_prompt (str or None): System prompt of the request
+            prompt (str): The prompt
+
+        Returns:
+            dict or None: The interaction, or None if the request was never recorded
+        """
+        key = self.key(model_name, system_prompt, prompt)
+        with self._lock:
+            interactions = self._by_key.get(key)
+            return self._next(key, interactions) if interactions else None
+
+    def next_for(self, model_name):
+        """
+        Get a recording of any request to a model, cycling through them in recorded order
+
+        Args:
+            model_name (str): Name of the model in the council
+
+        Returns:
+            dict or None: The interaction, or None if nothing was recorded for the model
+        """
+        with self._lock:
+            interactions = self._by_model.get(model_name)
+            return self._next(('model', model_name), interactions) if interactions else None
+
+    def model_names(self):
+        """
+        Get the models the cassette has recordings of
+
+        Returns:
+            list: Model names, in the order they were first recorded
+        """
+        with self._lock:
+            return list(self._by_model)
+
+
+class RecordingProvider:
+    """
+    Proxy for a model client recording every request it answers into a cassette
+
+    Streamed responses are recorded chunk by chunk with the time each chunk arrived, so a replay
+    reproduces the provider's time to first token and pacing.
+    """
+
+    def __init__(self, model_name, client, cassette, clock=time.monotonic):
+        """
+        Initialize the proxy
+
+        Args:
+            model_name (str): Name of the model in the council
+            client (object): The model client, e.g. a Provider or LazyProvider
+            cassette (Cassette): Cassette the interactions are recorded into
+            clock (callable): Monotonic clock in seconds, for tests (default is time.monotonic)
+        """
+        self._model_name = model_name
+        self._client = client
+        self._cassette = cassette
+        self._clock = clock
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _record(self, prompt, system_prompt, chunks, response, started):
+        if system_prompt is None:
+            system_prompt = getattr(self._client, 'system_prompt', None)
+        failed = is_error_response(response)
+        if failed and chunks and chunks[-1][1] == response:
+            # The error message passed to the stream callback is not part of the response
+            chunks = chunks[:-1]
+        self._cassette.add({
+            'model': self._model_name,
+            'system_prompt': system_prompt,
+            'prompt': str(prompt),
+            'chunks': chunks,
+            'status': getattr(response, 'status', 'error' if failed else 'ok'),
+            # Without the "Error getting response from ...: " prefix the replay adds back
+            'error': str(response).split(': ', 1)[-1] if failed else None,
+            'error_class': getattr(response, 'error_class', None),
+            'usage': getattr(response, 'usage', None),
+            'latency': self._clock() - started
+        })
+
+    def _timed_callback(self, callback, chunks, started):
+        def record_chunk(chunk):
+            chunks.append([round(self._clock() - started, 4), chunk])
+            if callback:
+                callback(chunk)
+        return record_chunk
+
+    def get_response(self, prompt, system_prompt=None):
+        """
+        Get a response from the model, recording it. See Provider.get_response.
+        """
+        if supports(self._client, ASYNC):
+            return self._get_response_async(prompt, system_prompt)
+        started = self._clock()
+        response = self._client.get_response(prompt, system_prompt=system_prompt)
+        self._record(prompt, system_prompt, [[round(self._clock() - started, 4), str(response)]],
+                     response, started)
+        return response
+
+    async def _get_response_async(self, prompt, system_prompt=None):
+        started = self._clock()
+        response = await self._client.get_response(prompt, system_prompt=system_prompt)
+        self._record(prompt, system_prompt, [[round(self._clock() - started, 4), str(response)]],
+                     response, started)
+        return response
+
+    def get_streaming_response(self, prompt, callback=None, system_prompt=None):
+        """
+        Get a streaming response from the model, recording each chunk. See Provider.get_streaming_response.
+        """
+        if supports(self._client, ASYNC):
+            return self._get_streaming_response_async(prompt, callback, system_prompt)
+        started = self._clock()
+        chunks = []
+        if not callable(getattr(self._client, 'get_streaming_response', None)):
+            # Clients without streaming answer in one chunk
+            response = self._client.get_response(prompt, system_prompt=system_prompt)
+            self._timed_callback(callback, chunks, started)(response)
+        else:
+            response = self._client.get_streaming_response(
+                prompt, self._timed_callback(callback, chunks, started), system_prompt=system_prompt)
+        self._record(prompt, system_prompt, chunks, response, started)
+        return response
+
+    async def _get_streaming_response_async(self, prompt, callback=None, system_prompt=None):
+        started = self._clock()
+        chunks = []
+        response = await self._client.get_streaming_response(
+            prompt, self._timed_callback(callback, chunks, started), system_prompt=system_prompt)
+        self._record(prompt, system_prompt, chunks, response, started)
+        return response
+
+
+class ReplayProvider(Provider):
+    """
+    Model client answering from a cassette instead of a provider.
+
+    Responses are streamed in their recorded chunks at their recorded pace (divided by speed),
+    and recorded failures fail again, so a council or the SSE endpoint can be measured offline
+    and reproducibly. The timing can be reshaped with first_token_latency, a latency distribution
+    such as lognormal(1.5), and failures injected with failure_rate. Being a Provider, a replay
+    goes through the same retries, hedging, caching and result wrapping as a real client.
+
+    Requests that were not recorded are answered with the model's other recordings in turn,
+    unless strict is set, in which case they fail with CassetteMiss.
+    """
+    capabilities = frozenset({STREAMING, USAGE_REPORTING, CANCELLATION})
+
+    def __init__(self, system_prompt=None, hedging=None, cache=None, retry=None, cassette=None, model_name=None,
+                 speed=1.0, first_token_latency=None, failure_rate=0.0, failure_status=503, strict=False,
+                 seed=None):
+        """
+        Initialize the client
+
+        Args:
+            system_prompt (str, optional): System prompt for the model
+            hedging (HedgingPolicy, optional): Hedge requests whose first token is late
+            cache (ResponseCache, optional): Answer repeated requests from this cache
+            retry (RetryPolicy, optional): Retry transient failures with this policy instead of the default
+            cassette (Cassette): Recordings to answer from
+            model_name (str): Model whose recordings are replayed
+            speed (float): Replay this many times faster than recorded, 0 not waiting at all (default is 1)
+            first_token_latency (callable, optional): Latency distribution, e.g. lognormal(1.5), replacing the
+                                                      recorded time to first chunk. The rest of the stream
+                                                      keeps its recorded pace.
+            failure_rate (float): Share of requests failing with an injected error (default is 0)
+            failure_status (int): HTTP status of the injected errors, 503 being retried (default is 503)
+            strict (bool): Fail requests that were not recorded instead of answering them with another
+                           recording of the model (default is False)
+            seed (int, optional): Seed of the latency and failure draws, for reproducible runs
+        """
+        super().__init__(system_prompt, hedging, cache, retry)
+        self.name = model_name
+        self.model_id = f"replay:{model_name}"
+        self.cassette = cassette
+        self.speed = speed
+        self.first_token_latency = first_token_latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.strict = strict
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _replay(self, prompt, system_prompt=None):
+        """
+        Pick the recording answering a request and when each of its chunks is due
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request, see _system_prompt
+
+        Returns:
+            tuple: (interaction, list of (seconds after the start of the request, chunk) pairs)
+
+        Raises:
+            ReplayFailure: If a failure is injected
+            CassetteMiss: If the request was not recorded and the replay is strict
+        """
+        with self._rng_lock:
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                raise ReplayFailure(f"{self.failure_status} injected failure", self.failure_status)
+            first_token = self.first_token_latency(self._rng) if self.first_token_latency else None
+
+        interaction = self.cassette.find(self.name, self._system_prompt(system_prompt), prompt)
+        if interaction is None and not self.strict:
+            interaction = self.cassette.next_for(self.name)
+        if interaction is None:
+            raise CassetteMiss(f"No recording of this request to {self.name}")
+
+        chunks = interaction['chunks']
+        shift = 0.0
+        if first_token is not None and chunks:
+            shift = first_token * (self.speed or 1) - chunks[0][0]
+        timeline = []
+        for offset, chunk in chunks:
+            offset = max(0.0, offset + shift)
+            timeline.append((offset / self.speed if self.speed else 0.0, chunk))
+        return interaction, timeline
+
+    def _finish(self, interaction):
+        """
+        Report the recorded usage of a replayed response, or raise its recorded failure
+
+        Args:
+            interaction (dict): The recording being replayed
+        """
+        error = interaction.get('error')
+        if error:
+            status = _STATUS_PATTERN.search(error)
+            raise ReplayFailure(error, int(status.group(1)) if status else None)
+        if interaction.get('usage'):
+            self.record_usage(**interaction['usage'])
+
+    def _complete(self, prompt, system_prompt=None):
+        """
+        Replay a full response, returned once its last chunk is due
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Returns:
+            str: The recorded response
+        """
+        interaction, timeline = self._replay(prompt, system_prompt)
+        if timeline:
+            time.sleep(timeline[-1][0])
+        self._finish(interaction)
+        return "".join(chunk for _, chunk in timeline)
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Replay the chunks of a response at their recorded pace
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Recorded chunks of the response
+        """
+        interaction, timeline = self._replay(prompt, system_prompt)
+        started = time.monotonic()
+        for offset, chunk in timeline:
+            delay = started + offset - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            yield chunk
+        self._finish(interaction)
+
+
+class AsyncReplayProvider(AsyncProvider, ReplayProvider):
+    """
+    Asyncio client answering from a cassette, see ReplayProvider
+    """
+    capabilities = ReplayProvider.capabilities | {ASYNC}
+
+    async def _complete(self, prompt, system_prompt=None):
+        """
+        Replay a full response without blocking the event loop, see ReplayProvider._complete
+        """
+        interaction, timeline = self._replay(prompt, system_prompt)
+        if timeline:
+            await asyncio.sleep(timeline[-1][0])
+        self._finish(interaction)
+        return "".join(chunk for _, chunk in timeline)
+
+    async def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Replay the chunks of a response without blocking the event loop, see ReplayProvider._stream_chunks
+        """
+        interaction, timeline = self._replay(prompt, system_prompt)
+        started = time.monotonic()
+        for offset, chunk in timeline:
+            delay = started + offset - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield chunk
+        self._finish(interaction)
+
+
+def record(council, cassette):
+    """
+    Record every response of a council's models into a cassette
+
+    Args:
+        council (AICouncil or AsyncAICouncil): The council, whose clients are wrapped in place
+        cassette (Cassette): Cassette the interactions are recorded into
+    """
+    for model_name, model in list(council.models.items()):
+        if not isinstance(model, RecordingProvider):
+            council.models[model_name] = RecordingProvider(model_name, model, cassette)
+
+
+def replay(council, cassette, **options):
+    """
+    Answer a council's requests from a cassette instead of the providers
+
+    Every model recorded in the cassette is replaced (or added, no API key being needed) by a
+    replay client.
+
+    Args:
+        council (AICouncil or AsyncAICouncil): The council, whose clients are replaced in place
+        cassette (Cassette): Recordings to answer from
+        **options: Options of the replay clients, see ReplayProvider
+    """
+    replay_class = AsyncReplayProvider if inspect.iscoroutinefunction(council.discuss_topic) else ReplayProvider
+    for model_name in cassette.model_names():
+        system_prompt = council.system_prompts.get(model_name)
+        if system_prompt is None:
+            # A model the council could not load answers with the system prompt it was recorded with
+            system_prompt = next(interaction['system_prompt'] for interaction in cassette.interactions
+                                 if interaction['model'] == model_name)
+            council.system_prompts[model_name] = system_prompt
+        council.models[model_name] = replay_class(system_prompt, cassette=cassette, model_name=model_name, **options)
@@ -1,75 +1,235 @@
+import io
+import json
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
-
-class ChatGPT:
-    def __init__(self, system_prompt=None):
-        load_dotenv()
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.system_prompt = system_prompt
-        
-    def get_response(self, prompt):
-        """
-        Get a response from ChatGPT
-        
+from openai import OpenAI, AsyncOpenAI
+from provider import (Provider, AsyncProvider, STREAMING, ASYNC, BATCH_API, PROMPT_CACHING,
+                      USAGE_REPORTING, CANCELLATION)
+
+class ChatGPT(Provider):
+    name = "ChatGPT"
+    capabilities = frozenset({STREAMING, BATCH_API, PROMPT_CACHING, USAGE_REPORTING, CANCELLATION})
+    model_id = "gpt-4o-mini-2024-07-18"
+    sampling_params = {"temperature": 1.0, "max_tokens": 1000}
+
+    def __init__(self, system_prompt=None, hedging=None, cache=None, retry=None):
+        """
+        Initialize the ChatGPT client
+
+        Args:
+            system_prompt (str, optional): System prompt for the model
+            hedging (HedgingPolicy, optional): Hedge requests whose first token is late
+            cache (ResponseCache, optional): Answer repeated requests from this cache
+            retry (RetryPolicy, optional): Retry transient failures with this policy instead of the default
+        """
+        super().__init__(system_prompt, hedging, cache, retry)
+        # Retries are handled by self.retry
+        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+
+    def _build_messages(self, prompt, system_prompt=None):
+        """
+        Build the chat messages for a prompt, starting with the system prompt if set
+
+        OpenAI caches prompt prefixes automatically, so the system prompt comes first and the
+        prompt keeps the transcript of earlier rounds ahead of the new instructions.
+
         Args:
             prompt (str): The user's prompt
-            
+            system_prompt (str, optional): System prompt for this request instead of the default
+
         Returns:
-            str: The model's response
+            list: Messages in the OpenAI chat format
         """
         messages = []
-        if self.system_prompt:
-            messages.append({"role": "system", "content": self.system_prompt})
+        system_prompt = self._system_prompt(system_prompt)
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
-        
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini-2024-07-18",
-                messages=messages,
-                temperature=1.0,
-                max_tokens=1000
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error getting response from ChatGPT: {str(e)}" 
-            
-    def get_streaming_response(self, prompt, callback=None):
-        """
-        Get a streaming response from ChatGPT
-        
+        return messages
+
+    def _request_params(self, prompt, system_prompt=None):
+        """
+        Build the chat completion parameters shared by every request
+
         Args:
             prompt (str): The user's prompt
-            callback (callable): Function to call with each chunk of the response
-            
+            system_prompt (str, optional): System prompt for this request instead of the default
+
         Returns:
-            str: The full model's response after streaming completes
+            dict: Keyword arguments for chat.completions.create
         """
-        messages = []
-        if self.system_prompt:
-            messages.append({"role": "system", "content": self.system_prompt})
-        messages.append({"role": "user", "content": prompt})
-        
+        return {
+            "model": self.model_id,
+            "messages": self._build_messages(prompt, system_prompt),
+            **self.sampling_params
+        }
+
+    def _record_response_usage(self, usage):
+        """
+        Record the token usage of a response, including the prompt tokens served from OpenAI's prompt cache
+
+        Args:
+            usage (CompletionUsage or None): Usage reported with the response
+        """
+        if usage is None:
+            return
+        details = getattr(usage, 'prompt_tokens_details', None)
+        self.record_usage(
+            input_tokens=usage.prompt_tokens,
+            output_tokens=usage.completion_tokens,
+            cached_input_tokens=getattr(details, 'cached_tokens', 0) if details else 0
+        )
+
+    def _complete(self, prompt, system_prompt=None):
+        """
+        Get a full response from ChatGPT
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Returns:
+            str: The model's response
+        """
+        response = self.client.chat.completions.create(**self._request_params(prompt, system_prompt))
+        self._record_response_usage(response.usage)
+        return response.choices[0].message.content
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of one request, closing the stream if abandoned
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Text chunks of the response
+        """
+        stream = self.client.chat.completions.create(**self._request_params(prompt, system_prompt), stream=True,
+                                                     stream_options={"include_usage": True})
         try:
-            full_response = ""
-            stream = self.client.chat.completions.create(
-                model="gpt-4o-mini-2024-07-18",
-                messages=messages,
-                temperature=1.0,
-                max_tokens=1000,
-                stream=True
-            )
-            
             for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-                    if callback:
-                        callback(content)
-                    full_response += content
-                    
-            return full_response
-        except Exception as e:
-            error_msg = f"Error getting streaming response from ChatGPT: {str(e)}"
-            if callback:
-                callback(error_msg)
-            return error_msg 
\ No newline at end of file
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if chunk.usage:
+                    # Sent in a last chunk without choices
+                    self._record_response_usage(chunk.usage)
+        finally:
+            stream.close()
+
+    def submit_batch(self, requests):
+        """
+        Submit requests to the OpenAI Batch API, see Provider.submit_batch
+
+        Args:
+            requests (list): (custom_id, prompt, system_prompt) tuples
+
+        Returns:
+            str: ID of the batch
+        """
+        lines = [json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": self._request_params(prompt, system_prompt)
+        }) for custom_id, prompt, system_prompt in requests]
+        input_file = self.client.files.create(
+            file=("batch.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    def batch_status(self, batch_id):
+        """
+        Check on a batch, see Provider.batch_status
+
+        Args:
+            batch_id (str): ID returned by submit_batch
+
+        Returns:
+            str: 'in_progress' or 'ended'
+        """
+        status = self.client.batches.retrieve(batch_id).status
+        return "ended" if status in ("completed", "failed", "expired", "cancelled") else "in_progress"
+
+    def batch_results(self, batch_id):
+        """
+        Get the responses of an ended batch, see Provider.batch_results
+
+        Args:
+            batch_id (str): ID returned by submit_batch
+
+        Returns:
+            dict: Dictionary mapping custom IDs to responses or error messages
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        results = {}
+        # Successful requests land in the output file, failed ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                if entry.get("error") or response.get("status_code") != 200:
+                    error = entry.get("error") or response.get("body", {}).get("error") or {}
+                    results[entry["custom_id"]] = self._batch_error(error.get("message", "request failed"))
+                else:
+                    results[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return results
+
+class AsyncChatGPT(AsyncProvider, ChatGPT):
+    # Batch jobs are submitted through the blocking client, see ChatGPT.submit_batch
+    capabilities = (ChatGPT.capabilities - {BATCH_API}) | {ASYNC}
+
+    def __init__(self, system_prompt=None, hedging=None, cache=None, retry=None):
+        """
+        Initialize the asyncio ChatGPT client, see ChatGPT.__init__ for the arguments
+        """
+        Provider.__init__(self, system_prompt, hedging, cache, retry)
+        self.client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+
+    async def _complete(self, prompt, system_prompt=None):
+        """
+        Get a full response from ChatGPT without blocking the event loop
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Returns:
+            str: The model's response
+        """
+        response = await self.client.chat.completions.create(**self._request_params(prompt, system_prompt))
+        self._record_response_usage(response.usage)
+        return response.choices[0].message.content
+
+    async def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of one request without blocking the event loop
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Text chunks of the response
+        """
+        stream = await self.client.chat.completions.create(**self._request_params(prompt, system_prompt),
+                                                           stream=True, stream_options={"include_usage": True})
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if chunk.usage:
+                    # Sent in a last chunk without choices
+                    self._record_response_usage(chunk.usage)
+        finally:
+            await stream.close()
@@ -0,0 +1,157 @@
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one provider.
+
+    The circuit opens after failure_threshold consecutive failed requests (error responses and
+    timeouts). While it is open requests fail right away instead of waiting on a provider that is
+    down. After reset_timeout seconds it is half-open: one trial request goes through, closing the
+    circuit if it succeeds and opening it again if it fails. A trial that never reports back (e.g.
+    its round was cancelled) is replaced by another one after reset_timeout.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        """
+        Initialize the breaker, closed
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit (default is 5)
+            reset_timeout (float): Seconds the circuit stays open before a trial request (default is 30)
+            clock (callable): Monotonic clock in seconds, for tests (default is time.monotonic)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = None
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    def _current_state(self, now):
+        # Called with the lock held
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_started = None
+        return self._state
+
+    @property
+    def state(self):
+        """
+        str: CLOSED, OPEN or HALF_OPEN
+        """
+        with self._lock:
+            return self._current_state(self._clock())
+
+    def allow_request(self):
+        """
+        Check whether a request may be sent, taking the trial slot when half-open
+
+        Returns:
+            bool: True if the request may be sent, False if it must fail fast
+        """
+        now = self._clock()
+        with self._lock:
+            state = self._current_state(now)
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and (self._trial_started is None
+                                       or now - self._trial_started >= self.reset_timeout):
+                self._trial_started = now
+                return True
+            return False
+
+    def record_success(self):
+        """
+        Record a request that succeeded, closing the circuit
+        """
+        with self._lock:
+            self._state = CLOSED
+            self.consecutive_failures = 0
+            self._trial_started = None
+
+    def record_failure(self):
+        """
+        Record a request that failed, opening the circuit at the threshold or after a failed trial
+        """
+        now = self._clock()
+        with self._lock:
+            state = self._current_state(now)
+            self.consecutive_failures += 1
+            if state == HALF_OPEN or (state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = now
+                self._trial_started = None
+
+    def retry_in(self):
+        """
+        Get how long until the next trial request
+
+        Returns:
+            float: Seconds until the circuit turns half-open, 0 if it is not open
+        """
+        now = self._clock()
+        with self._lock:
+            if self._current_state(now) != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - now)
+
+    def status(self):
+        """
+        Get the health of the provider as seen by the breaker
+
+        Returns:
+            dict: 'state', 'available' (False while open), 'consecutive_failures' and 'retry_in' seconds
+        """
+        state = self.state
+        return {
+            'state': state,
+            'available': state != OPEN,
+            'consecutive_failures': self.consecutive_failures,
+            'retry_in': round(self.retry_in(), 1)
+        }
+
+
+class CircuitBreakerRegistry:
+    """
+    Circuit breakers of every provider, created on first use with the same settings
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        """
+        Initialize the registry
+
+        Args:
+            failure_threshold (int): Consecutive failures that open a circuit (default is 5)
+            reset_timeout (float): Seconds a circuit stays open before a trial request (default is 30)
+            clock (callable): Monotonic clock in seconds, for tests (default is time.monotonic)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name):
+        """
+        Get the breaker of a model
+
+        Args:
+            model_name (str): Name of the model
+
+        Returns:
+            CircuitBreaker: The model's breaker
+        """
+        with self._lock:
+            breaker = self._breakers.get(model_name)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout, self._clock)
+                self._breakers[model_name] = breaker
+            return breaker
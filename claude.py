@@ -1,67 +1,215 @@
 import os
-from anthropic import Anthropic
-from dotenv import load_dotenv
-
-class Claude:
-    def __init__(self, system_prompt=None):
-        load_dotenv()
-        self.client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
-        self.system_prompt = system_prompt
-        
-    def get_response(self, prompt):
-        """
-        Get a response from Claude
-        
+from anthropic import Anthropic, AsyncAnthropic
+from provider import (Provider, AsyncProvider, STREAMING, ASYNC, BATCH_API, PROMPT_CACHING,
+                      USAGE_REPORTING, CANCELLATION)
+
+class Claude(Provider):
+    name = "Claude"
+    capabilities = frozenset({STREAMING, BATCH_API, PROMPT_CACHING, USAGE_REPORTING, CANCELLATION})
+    model_id = "claude-3-5-sonnet-20241022"
+    sampling_params = {"max_tokens": 1000, "temperature": 1.0}
+
+    def __init__(self, system_prompt=None, hedging=None, cache=None, retry=None):
+        """
+        Initialize the Claude client
+
+        Args:
+            system_prompt (str, optional): System prompt for the model
+            hedging (HedgingPolicy, optional): Hedge requests whose first token is late
+            cache (ResponseCache, optional): Answer repeated requests from this cache
+            retry (RetryPolicy, optional): Retry transient failures with this policy instead of the default
+        """
+        super().__init__(system_prompt, hedging, cache, retry)
+        # Retries are handled by self.retry
+        self.client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'), max_retries=0)
+
+    def _user_content(self, prompt):
+        """
+        Lay out the user message of a prompt for prompt caching
+
+        A LayeredPrompt becomes one content block per segment with a cache breakpoint after its
+        stable prefix, so the next round reads the template and earlier rounds from the cache.
+
+        Args:
+            prompt (str): The user's prompt, possibly a LayeredPrompt
+
+        Returns:
+            str or list: The prompt, or its content blocks
+        """
+        segments = getattr(prompt, 'segments', None)
+        if not segments:
+            return prompt
+        blocks = [{"type": "text", "text": segment} for segment in segments if segment]
+        stable = [segment for segment in segments[:prompt.stable_segments] if segment]
+        if stable:
+            blocks[len(stable) - 1]["cache_control"] = {"type": "ephemeral"}
+        return blocks
+
+    def _request_params(self, prompt, system_prompt=None):
+        """
+        Build the Messages API parameters shared by every request
+
+        The system prompt is a cache breakpoint of its own: it is the same for every round of
+        every discussion. Prefixes under the model's minimum cacheable length are not cached.
+
         Args:
             prompt (str): The user's prompt
-            
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Returns:
+            dict: Keyword arguments for messages.create / messages.stream
+        """
+        system_prompt = self._system_prompt(system_prompt)
+        system = ""
+        if system_prompt:
+            system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+        return {
+            "model": self.model_id,
+            **self.sampling_params,
+            "system": system,
+            "messages": [
+                {"role": "user", "content": self._user_content(prompt)}
+            ]
+        }
+
+    def _record_response_usage(self, usage):
+        """
+        Record the token usage of a response, including prompt cache reads and writes
+
+        Args:
+            usage (Usage or None): Usage reported with the response
+        """
+        if usage is None:
+            return
+        cached = getattr(usage, 'cache_read_input_tokens', 0) or 0
+        written = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+        self.record_usage(
+            # input_tokens only counts the tokens after the last cache breakpoint
+            input_tokens=usage.input_tokens + cached + written,
+            output_tokens=usage.output_tokens,
+            cached_input_tokens=cached,
+            cache_write_tokens=written
+        )
+
+    def _complete(self, prompt, system_prompt=None):
+        """
+        Get a full response from Claude
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
         Returns:
             str: The model's response
         """
-        try:
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1000,
-                temperature=1.0,
-                system=self.system_prompt if self.system_prompt else "",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            return response.content[0].text
-        except Exception as e:
-            return f"Error getting response from Claude: {str(e)}" 
-            
-    def get_streaming_response(self, prompt, callback=None):
-        """
-        Get a streaming response from Claude
-        
+        response = self.client.messages.create(**self._request_params(prompt, system_prompt))
+        self._record_response_usage(response.usage)
+        return response.content[0].text
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of one request, closing the stream if abandoned
+
         Args:
             prompt (str): The user's prompt
-            callback (callable): Function to call with each chunk of the response
-            
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Text chunks of the response
+        """
+        with self.client.messages.stream(**self._request_params(prompt, system_prompt)) as stream:
+            yield from stream.text_stream
+            self._record_response_usage(stream.get_final_message().usage)
+
+    def submit_batch(self, requests):
+        """
+        Submit requests to the Message Batches API, see Provider.submit_batch
+
+        Args:
+            requests (list): (custom_id, prompt, system_prompt) tuples
+
+        Returns:
+            str: ID of the batch
+        """
+        batch = self.client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": self._request_params(prompt, system_prompt)}
+            for custom_id, prompt, system_prompt in requests
+        ])
+        return batch.id
+
+    def batch_status(self, batch_id):
+        """
+        Check on a batch, see Provider.batch_status
+
+        Args:
+            batch_id (str): ID returned by submit_batch
+
+        Returns:
+            str: 'in_progress' or 'ended'
+        """
+        status = self.client.messages.batches.retrieve(batch_id).processing_status
+        return "ended" if status == "ended" else "in_progress"
+
+    def batch_results(self, batch_id):
+        """
+        Get the responses of an ended batch, see Provider.batch_results
+
+        Args:
+            batch_id (str): ID returned by submit_batch
+
+        Returns:
+            dict: Dictionary mapping custom IDs to responses or error messages
+        """
+        results = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            result = entry.result
+            if result.type == "succeeded":
+                results[entry.custom_id] = result.message.content[0].text
+            elif result.type == "errored":
+                results[entry.custom_id] = self._batch_error(result.error.error.message)
+            else:
+                # Canceled or expired before it was processed
+                results[entry.custom_id] = self._batch_error(f"request {result.type}")
+        return results
+
+class AsyncClaude(AsyncProvider, Claude):
+    # Batch jobs are submitted through the blocking client, see Claude.submit_batch
+    capabilities = (Claude.capabilities - {BATCH_API}) | {ASYNC}
+
+    def __init__(self, system_prompt=None, hedging=None, cache=None, retry=None):
+        """
+        Initialize the asyncio Claude client, see Claude.__init__ for the arguments
+        """
+        Provider.__init__(self, system_prompt, hedging, cache, retry)
+        self.client = AsyncAnthropic(api_key=os.getenv('ANTHROPIC_API_KEY'), max_retries=0)
+
+    async def _complete(self, prompt, system_prompt=None):
+        """
+        Get a full response from Claude without blocking the event loop
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
         Returns:
-            str: The full model's response after streaming completes
-        """
-        try:
-            full_response = ""
-            with self.client.messages.stream(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1000,
-                temperature=1.0,
-                system=self.system_prompt if self.system_prompt else "",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            ) as stream:
-                for text in stream.text_stream:
-                    if callback:
-                        callback(text)
-                    full_response += text
-                    
-            return full_response
-        except Exception as e:
-            error_msg = f"Error getting streaming response from Claude: {str(e)}"
-            if callback:
-                callback(error_msg)
-            return error_msg 
\ No newline at end of file
+            str: The model's response
+        """
+        response = await self.client.messages.create(**self._request_params(prompt, system_prompt))
+        self._record_response_usage(response.usage)
+        return response.content[0].text
+
+    async def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of one request without blocking the event loop
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Text chunks of the response
+        """
+        async with self.client.messages.stream(**self._request_params(prompt, system_prompt)) as stream:
+            async for text in stream.text_stream:
+                yield text
+            self._record_response_usage((await stream.get_final_message()).usage)
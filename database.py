@@ -84,7 +84,13 @@ class Database:
             {'discussion_id': discussion_id},
             {'$set': {'status': status}}
         )
-    
+
+    def update_discussion(self, discussion_id, update_data):
+        return self.discussions.update_one(
+            {'discussion_id': discussion_id},
+            {'$set': update_data}
+        )
+
     def add_discussion_round(self, discussion_id, round_data):
         round_data['timestamp'] = datetime.utcnow()
         return self.discussions.update_one(
@@ -0,0 +1,314 @@
+from collections import OrderedDict
+import hashlib
+import threading
+from model_result import is_error_response
+
+
+def estimate_tokens(text):
+    """
+    Rough token count of a text, about four characters per token for English prose
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Estimated number of tokens
+    """
+    return len(text) // 4 + 1
+
+
+class LayeredPrompt(str):
+    """
+    Prompt text made of segments, the first ones being a prefix that later rounds repeat.
+
+    A LayeredPrompt is the plain prompt string to every client, clients of providers with prompt
+    caching can also lay the segments out as separate content blocks and mark the end of the
+    stable prefix as a cache breakpoint, so the next round only pays for the new content.
+    """
+
+    def __new__(cls, segments, stable_segments=None):
+        """
+        Create the prompt
+
+        Args:
+            segments (list): Text segments, concatenated in order to form the prompt
+            stable_segments (int, optional): Number of leading segments that stay the same in the next
+                                             round's prompt. If None, every segment is stable.
+        """
+        prompt = super().__new__(cls, "".join(segments))
+        prompt.segments = tuple(segments)
+        prompt.stable_segments = len(prompt.segments) if stable_segments is None else stable_segments
+        return prompt
+
+    @classmethod
+    def from_template(cls, template, context_segments, stable_segments):
+        """
+        Fill a template's {context} placeholder with the segments of a context
+
+        Args:
+            template (str): Template with a single {context} placeholder, e.g. the follow-up prompt template
+            context_segments (list): Segments of the context, see DiscussionContext.segments()
+            stable_segments (int): Number of leading context segments that the next round repeats
+
+        Returns:
+            LayeredPrompt: The filled template, equal to template.format(context="".join(context_segments))
+        """
+        # Format with a marker rather than splitting the raw template, so escaped braces are handled
+        marker = "\x00"
+        head, tail = template.format(context=marker).split(marker, 1)
+        return cls([head, *context_segments, tail], stable_segments=1 + stable_segments)
+
+
+class DiscussionContext:
+    """
+    Transcript of a discussion, built up round by round for follow-up prompts.
+
+    Each round is rendered once when it is added and the joined transcript is memoized,
+    so adding a round costs only the new content and rendering a long discussion is a
+    single join instead of a string rebuilt from scratch on every call.
+    """
+    HEADER = "Previous discussion:\n"
+
+    def __init__(self, discussion=None):
+        """
+        Initialize the context, optionally from rounds that already happened
+
+        Args:
+            discussion (list, optional): List of dictionaries containing model responses for each round
+        """
+        self._parts = [self.HEADER]
+        self._rendered = self.HEADER
+        # Rendered text of every round, kept for compaction
+        self.round_texts = []
+        self.rounds = 0
+        for round_results in discussion or []:
+            self.add_round(round_results)
+
+    @staticmethod
+    def round_responses(round_results):
+        """
+        Get the model responses of a round
+
+        Rounds stored by the database wrap the responses together with the round number
+        and timestamp, rounds produced by AICouncil are the responses themselves.
+
+        Args:
+            round_results (dict): A round, either as returned by AICouncil or as stored in the database
+
+        Returns:
+            dict: Dictionary mapping model names to their responses
+        """
+        responses = round_results.get('responses')
+        if isinstance(responses, dict):
+            return responses
+        return round_results
+
+    def add_round(self, round_results):
+        """
+        Append a completed round to the transcript
+
+        Failed turns (errors, timeouts, unavailable providers) are left out, so later rounds
+        neither pay for the error messages nor discuss them as if they were answers.
+
+        Args:
+            round_results (dict): Dictionary mapping model names to their responses for the round
+        """
+        round_text = "".join(f"\n{model_name}: {response}\n"
+                             for model_name, response in self.round_responses(round_results).items()
+                             if not is_error_response(response))
+        self._parts.append(round_text)
+        self.round_texts.append(round_text)
+        self._rendered = None
+        self.rounds += 1
+
+    def render(self, user_contribution=None):
+        """
+        Render the transcript as the context string for the next round
+
+        Args:
+            user_contribution (str, optional): If provided, adds user contribution to the context
+
+        Returns:
+            str: Formatted context string for the next round
+        """
+        if self._rendered is None:
+            self._rendered = "".join(self._parts)
+            # Keep the memoized prefix as the only part so the next join starts from it
+            self._parts = [self._rendered]
+
+        # Add user contribution if provided
+        if user_contribution:
+            return f"{self._rendered}\nUser contribution: {user_contribution}\n"
+        return self._rendered
+
+    def segments(self, user_contribution=None):
+        """
+        Get the context as segments: the header, one segment per round, then the user contribution
+
+        Args:
+            user_contribution (str, optional): If provided, adds user contribution to the context
+
+        Returns:
+            list: Segments whose concatenation is render(user_contribution)
+        """
+        segments = [self.HEADER, *self.round_texts]
+        if user_contribution:
+            segments.append(f"\nUser contribution: {user_contribution}\n")
+        return segments
+
+    def __len__(self):
+        return self.rounds
+
+
+class ContextCompactor:
+    """
+    Keeps follow-up prompts within a per-model token budget.
+
+    When a discussion outgrows a model's budget, the most recent rounds stay verbatim and
+    older rounds are replaced by summaries. Summaries are generated once per round by the
+    council (see pending_summaries / store_summary) and cached, so every later round reuses
+    them and per-round input size stays flat instead of growing with the discussion.
+    """
+    SUMMARY_HEADER = "\nSummary of earlier rounds:\n"
+    FALLBACK_EXCERPT_LENGTH = 300
+
+    def __init__(self, keep_recent_rounds=2, default_token_budget=None, token_budgets=None, max_cached_summaries=1024):
+        """
+        Initialize the compactor
+
+        Args:
+            keep_recent_rounds (int): Number of most recent rounds always kept verbatim (default is 2)
+            default_token_budget (int, optional): Context budget in tokens for models without their own budget.
+                                                  If None, those models always get the full transcript.
+            token_budgets (dict, optional): Dictionary mapping model names to their context budget in tokens
+            max_cached_summaries (int): Number of round summaries kept in memory (default is 1024)
+        """
+        self.keep_recent_rounds = keep_recent_rounds
+        self.default_token_budget = default_token_budget
+        self.token_budgets = dict(token_budgets or {})
+        self.max_cached_summaries = max_cached_summaries
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def budget_for(self, model_name):
+        """
+        Get the context budget of a model
+
+        Args:
+            model_name (str): Name of the model
+
+        Returns:
+            int or None: Budget in tokens, None meaning unlimited
+        """
+        return self.token_budgets.get(model_name, self.default_token_budget)
+
+    @staticmethod
+    def _key(round_text):
+        return hashlib.sha1(round_text.encode('utf-8')).hexdigest()
+
+    def get_summary(self, round_text):
+        """
+        Get the cached summary of a round
+
+        Args:
+            round_text (str): Rendered text of the round
+
+        Returns:
+            str or None: The summary, or None if the round has not been summarized yet
+        """
+        key = self._key(round_text)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+            return summary
+
+    def store_summary(self, round_text, summary):
+        """
+        Cache the summary of a round
+
+        Args:
+            round_text (str): Rendered text of the round
+            summary (str): Summary replacing the round in compacted contexts
+        """
+        with self._lock:
+            self._summaries[self._key(round_text)] = summary.strip()
+            while len(self._summaries) > self.max_cached_summaries:
+                self._summaries.popitem(last=False)
+
+    def pending_summaries(self, context, model_names):
+        """
+        List the rounds that need a summary before the next round can be rendered
+
+        Args:
+            context (DiscussionContext): The discussion so far
+            model_names (list): Names of the models taking part in the next round
+
+        Returns:
+            list: Rendered text of every older round that is not summarized yet, empty if
+                  the full transcript fits the budget of every model
+        """
+        full_tokens = estimate_tokens(context.render())
+        over_budget = any(
+            self.budget_for(model_name) is not None and full_tokens > self.budget_for(model_name)
+            for model_name in model_names
+        )
+        if not over_budget:
+            return []
+        older_rounds = context.round_texts[:max(0, len(context.round_texts) - self.keep_recent_rounds)]
+        # Identical rounds share one summary
+        return [round_text for round_text in dict.fromkeys(older_rounds) if self.get_summary(round_text) is None]
+
+    def _summary_for(self, round_number, round_text):
+        summary = self.get_summary(round_text)
+        if summary is None:
+            # No summary available, fall back to the beginning of the round
+            summary = round_text.strip()
+            if len(summary) > self.FALLBACK_EXCERPT_LENGTH:
+                summary = summary[:self.FALLBACK_EXCERPT_LENGTH].rstrip() + "..."
+        return f"\nRound {round_number}: {summary}\n"
+
+    def render(self, context, model_name, user_contribution=None):
+        """
+        Render the context for one model within its token budget
+
+        Args:
+            context (DiscussionContext): The discussion so far
+            model_name (str): Name of the model the context is rendered for
+            user_contribution (str, optional): If provided, adds user contribution to the context
+
+        Returns:
+            str: Formatted context string for the next round
+        """
+        full_context = context.render(user_contribution)
+        budget = self.budget_for(model_name)
+        if budget is None or estimate_tokens(full_context) <= budget:
+            return full_context
+
+        suffix = f"\nUser contribution: {user_contribution}\n" if user_contribution else ""
+        round_texts = context.round_texts
+        summaries = [self._summary_for(round_number, round_text)
+                     for round_number, round_text in enumerate(round_texts, start=1)]
+
+        # Summarize more rounds, then drop the oldest summaries, until the context fits
+        keep = min(self.keep_recent_rounds, len(round_texts))
+        first_summary = 0
+        while True:
+            split = len(round_texts) - keep
+            kept_summaries = summaries[first_summary:split]
+            parts = [DiscussionContext.HEADER]
+            if kept_summaries:
+                parts.append(self.SUMMARY_HEADER)
+                parts.extend(kept_summaries)
+            parts.extend(round_texts[split:])
+            parts.append(suffix)
+            compacted = "".join(parts)
+            if estimate_tokens(compacted) <= budget:
+                return compacted
+            if keep > 0:
+                keep -= 1
+            elif first_summary < split:
+                first_summary += 1
+            else:
+                # Nothing left to compact
+                return compacted
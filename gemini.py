@@ -1,85 +1,261 @@
 import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import timedelta
 import google.generativeai as genai
-from dotenv import load_dotenv
+from discussion_context import estimate_tokens
+from provider import Provider, AsyncProvider, STREAMING, ASYNC, PROMPT_CACHING, USAGE_REPORTING
 
-class Gemini:
-    def __init__(self, system_prompt=None):
-        load_dotenv()
+class Gemini(Provider):
+    name = "Gemini"
+    capabilities = frozenset({STREAMING, PROMPT_CACHING, USAGE_REPORTING})
+    model_id = "gemini-2.0-flash"
+    sampling_params = {"temperature": 1.0, "max_output_tokens": 1000}
+    max_tokens_param = "max_output_tokens"
+    # Number of system prompts kept with a model bound to them, see _model_for
+    max_system_models = 16
+    # A discussion prefix is stored as cached content once this many of its tokens are not cached yet,
+    # below Gemini's minimum cacheable size creating the cache would fail
+    cached_content_min_tokens = 4096
+    cached_content_ttl = 3600
+    max_cached_contents = 32
+    # Seconds before cached content is tried again for a system prompt whose cache creation failed
+    cached_content_retry_delay = 600
+
+    def __init__(self, system_prompt=None, hedging=None, cache=None, retry=None):
+        """
+        Initialize the Gemini client
+
+        Args:
+            system_prompt (str, optional): System prompt for the model
+            hedging (HedgingPolicy, optional): Hedge requests whose first token is late
+            cache (ResponseCache, optional): Answer repeated requests from this cache
+            retry (RetryPolicy, optional): Retry transient failures with this policy instead of the default
+        """
+        super().__init__(system_prompt, hedging, cache, retry)
         genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
-        self.system_prompt = system_prompt
-        
-    def get_response(self, prompt):
+        self.model = genai.GenerativeModel(self.model_id)
+        self._system_models = OrderedDict()
+        # (system prompt, prefix segments) -> (model bound to the cached content, expiry time)
+        self._cached_contents = OrderedDict()
+        # System prompt -> time cached content may be created again after a failure
+        self._cached_content_failures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _model_for(self, system_prompt):
         """
-        Get a response from Gemini
-        
+        Get the model bound to a system prompt
+
+        The system prompt goes in system_instruction rather than in the user text, so it forms a
+        stable prefix ahead of the prompt. Gemini binds it at construction, so one GenerativeModel
+        is kept per recent system prompt; they are cheap and share the configured transport.
+
         Args:
-            prompt (str): The user's prompt
-            
+            system_prompt (str or None): The system prompt of the request
+
         Returns:
-            str: The model's response
+            GenerativeModel: Model to send the request to
+        """
+        if not system_prompt:
+            return self.model
+        with self._lock:
+            model = self._system_models.get(system_prompt)
+            if model is None:
+                model = genai.GenerativeModel(self.model_id, system_instruction=system_prompt)
+                self._system_models[system_prompt] = model
+                while len(self._system_models) > self.max_system_models:
+                    self._system_models.popitem(last=False)
+            else:
+                self._system_models.move_to_end(system_prompt)
+            return model
+
+    def _cached_prefix(self, system_prompt, prompt):
         """
-        try:
-            full_prompt = prompt
-            if self.system_prompt:
-                full_prompt = f"{self.system_prompt}\n\n{prompt}"
-            
-            response = self.model.generate_content(
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=1.0,
-                    max_output_tokens=1000,
-                ), 
-                safety_settings=genai.types.SafetySettings(
-                    category=genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT,
-                    threshold=genai.types.HarmBlockThreshold.BLOCK_ONLY_HIGH,
-                    max_block_count=1
+        Find or create cached content holding the stable prefix of a LayeredPrompt
+
+        The longest cached prefix of the prompt is reused. A new cache is created for the prompt's
+        stable prefix once the part of it not covered yet reaches cached_content_min_tokens, so a
+        long discussion is cached every few rounds and each round only sends what came after.
+        When creating the cache fails, no cache is created for the system prompt for
+        cached_content_retry_delay seconds, and the failure is only reported the first time.
+
+        Args:
+            system_prompt (str or None): The system prompt of the request
+            prompt (LayeredPrompt): The prompt
+
+        Returns:
+            tuple: (model bound to the cached content, number of segments it covers), or (None, 0)
+        """
+        segments = prompt.segments
+        stable = segments[:prompt.stable_segments]
+        now = time.monotonic()
+        with self._lock:
+            best_key = None
+            for key, (_, expires) in list(self._cached_contents.items()):
+                if expires <= now:
+                    del self._cached_contents[key]
+                elif key[0] == system_prompt and segments[:len(key[1])] == key[1]:
+                    if best_key is None or len(key[1]) > len(best_key[1]):
+                        best_key = key
+            best = self._cached_contents[best_key][0] if best_key else None
+            covered = len(best_key[1]) if best_key else 0
+            retry_at = self._cached_content_failures.get(system_prompt)
+            failed_recently = retry_at is not None and now < retry_at
+        if not failed_recently and estimate_tokens("".join(stable[covered:])) >= self.cached_content_min_tokens:
+            # Created without the lock held, other requests on this client don't wait for the round trips
+            try:
+                cached_content = genai.caching.CachedContent.create(
+                    model=f"models/{self.model_id}",
+                    system_instruction=system_prompt or None,
+                    contents=[segment for segment in stable if segment],
+                    ttl=timedelta(seconds=self.cached_content_ttl)
                 )
-            )
-            return response.text
-        except Exception as e:
-            return f"Error getting response from Gemini: {str(e)}" 
-            
-    def get_streaming_response(self, prompt, callback=None):
-        """
-        Get a streaming response from Gemini
-        
+                best_key = (system_prompt, stable)
+                best = genai.GenerativeModel.from_cached_content(cached_content)
+                with self._lock:
+                    # Stop using the cache a minute before the provider drops it
+                    self._cached_contents[best_key] = (best, now + self.cached_content_ttl - 60)
+                    while len(self._cached_contents) > self.max_cached_contents:
+                        self._cached_contents.popitem(last=False)
+            except Exception as e:
+                with self._lock:
+                    reported = system_prompt in self._cached_content_failures
+                    self._cached_content_failures[system_prompt] = now + self.cached_content_retry_delay
+                    self._cached_content_failures.move_to_end(system_prompt)
+                    while len(self._cached_content_failures) > self.max_system_models:
+                        self._cached_content_failures.popitem(last=False)
+                if not reported:
+                    print(f"Warning: Could not create Gemini cached content, retrying in "
+                          f"{self.cached_content_retry_delay}s: {e}")
+        if best_key is None:
+            return None, 0
+        with self._lock:
+            if best_key in self._cached_contents:
+                self._cached_contents.move_to_end(best_key)
+        return best, len(best_key[1])
+
+    def _prepare(self, prompt, system_prompt=None):
+        """
+        Pick the model of a request and build its generate_content arguments
+
+        A LayeredPrompt is sent as one part per segment, earlier rounds ahead of the new content,
+        and the segments held by cached content are left out.
+
         Args:
             prompt (str): The user's prompt
-            callback (callable): Function to call with each chunk of the response
-            
+            system_prompt (str, optional): System prompt for this request instead of the default
+
         Returns:
-            str: The full model's response after streaming completes
-        """
-        try:
-            full_prompt = prompt
-            if self.system_prompt:
-                full_prompt = f"{self.system_prompt}\n\n{prompt}"
-            
-            full_response = ""
-            response = self.model.generate_content(
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=1.0,
-                    max_output_tokens=1000,
-                ), 
-                safety_settings=genai.types.SafetySettings(
-                    category=genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT,
-                    threshold=genai.types.HarmBlockThreshold.BLOCK_ONLY_HIGH,
-                    max_block_count=1
-                ),
-                stream=True
+            tuple: (GenerativeModel, keyword arguments for generate_content / generate_content_async)
+        """
+        system_prompt = self._system_prompt(system_prompt)
+        segments = getattr(prompt, 'segments', None)
+        model, covered = None, 0
+        if segments:
+            model, covered = self._cached_prefix(system_prompt, prompt)
+        if model is None:
+            model = self._model_for(system_prompt)
+
+        return model, {
+            "contents": [segment for segment in segments[covered:] if segment] if segments else str(prompt),
+            "generation_config": genai.types.GenerationConfig(**self.sampling_params),
+            "safety_settings": genai.types.SafetySettings(
+                category=genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT,
+                threshold=genai.types.HarmBlockThreshold.BLOCK_ONLY_HIGH,
+                max_block_count=1
             )
-            
-            for chunk in response:
-                if hasattr(chunk, 'text') and chunk.text:
-                    if callback:
-                        callback(chunk.text)
-                    full_response += chunk.text
-                    
-            return full_response
-        except Exception as e:
-            error_msg = f"Error getting streaming response from Gemini: {str(e)}"
-            if callback:
-                callback(error_msg)
-            return error_msg 
\ No newline at end of file
+        }
+
+    def _record_response_usage(self, response):
+        """
+        Record the token usage of a response, including the prompt tokens served from cached content
+
+        Args:
+            response (GenerateContentResponse): The response, or the last chunk of a streamed one
+        """
+        usage = getattr(response, 'usage_metadata', None)
+        if not usage:
+            return
+        self.record_usage(
+            input_tokens=usage.prompt_token_count,
+            output_tokens=usage.candidates_token_count,
+            cached_input_tokens=getattr(usage, 'cached_content_token_count', 0)
+        )
+
+    def _complete(self, prompt, system_prompt=None):
+        """
+        Get a full response from Gemini
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Returns:
+            str: The model's response
+        """
+        model, params = self._prepare(prompt, system_prompt)
+        response = model.generate_content(**params)
+        self._record_response_usage(response)
+        return response.text
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of one request
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Text chunks of the response
+        """
+        model, params = self._prepare(prompt, system_prompt)
+        response = model.generate_content(**params, stream=True)
+        chunk = None
+        for chunk in response:
+            if hasattr(chunk, 'text') and chunk.text:
+                yield chunk.text
+        # The last chunk carries the usage of the whole response
+        self._record_response_usage(chunk)
+
+class AsyncGemini(AsyncProvider, Gemini):
+    capabilities = Gemini.capabilities | {ASYNC}
+
+    async def _complete(self, prompt, system_prompt=None):
+        """
+        Get a full response from Gemini without blocking the event loop
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Returns:
+            str: The model's response
+        """
+        # Creating cached content is a blocking call
+        model, params = await asyncio.to_thread(self._prepare, prompt, system_prompt)
+        response = await model.generate_content_async(**params)
+        self._record_response_usage(response)
+        return response.text
+
+    async def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of one request without blocking the event loop
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Text chunks of the response
+        """
+        model, params = await asyncio.to_thread(self._prepare, prompt, system_prompt)
+        response = await model.generate_content_async(**params, stream=True)
+        chunk = None
+        async for chunk in response:
+            if hasattr(chunk, 'text') and chunk.text:
+                yield chunk.text
+        # The last chunk carries the usage of the whole response
+        self._record_response_usage(chunk)
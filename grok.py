@@ -1,77 +1,180 @@
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from openai import OpenAI, AsyncOpenAI
+from provider import Provider, AsyncProvider, STREAMING, ASYNC, PROMPT_CACHING, USAGE_REPORTING, CANCELLATION
 
-class Grok:
-    def __init__(self, system_prompt=None):
-        load_dotenv()
+class Grok(Provider):
+    name = "Grok"
+    capabilities = frozenset({STREAMING, PROMPT_CACHING, USAGE_REPORTING, CANCELLATION})
+    model_id = "grok-2-latest"
+
+    def __init__(self, system_prompt=None, hedging=None, cache=None, retry=None):
+        """
+        Initialize the Grok client
+
+        Args:
+            system_prompt (str, optional): System prompt for the model
+            hedging (HedgingPolicy, optional): Hedge requests whose first token is late
+            cache (ResponseCache, optional): Answer repeated requests from this cache
+            retry (RetryPolicy, optional): Retry transient failures with this policy instead of the default
+        """
+        super().__init__(
+            system_prompt or "You are Grok, a chatbot inspired by the Hitchhikers Guide to the Galaxy.",
+            hedging,
+            cache,
+            retry
+        )
         self.api_key = os.getenv('XAI_API_KEY')
-        self.system_prompt = system_prompt or "You are Grok, a chatbot inspired by the Hitchhikers Guide to the Galaxy."
         self.client = OpenAI(
             api_key=self.api_key,
             base_url="https://api.x.ai/v1",
+            # Retries are handled by self.retry
+            max_retries=0
         )
-        
-    def get_response(self, prompt):
+
+    def _build_messages(self, prompt, system_prompt=None):
         """
-        Get a response from Grok using the X.AI API
-        
+        Build the chat messages for a prompt, the system prompt first so X.AI can cache the prefix
+
         Args:
             prompt (str): The user's prompt
-            
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Returns:
+            list: Messages in the OpenAI-compatible chat format used by X.AI
+        """
+        return [
+            {"role": "system", "content": self._system_prompt(system_prompt)},
+            {"role": "user", "content": prompt},
+        ]
+
+    def _record_response_usage(self, usage):
+        """
+        Record the token usage of a response, including the prompt tokens served from X.AI's prompt cache
+
+        Args:
+            usage (CompletionUsage or None): Usage reported with the response
+        """
+        if usage is None:
+            return
+        details = getattr(usage, 'prompt_tokens_details', None)
+        self.record_usage(
+            input_tokens=usage.prompt_tokens,
+            output_tokens=usage.completion_tokens,
+            cached_input_tokens=getattr(details, 'cached_tokens', 0) if details else 0
+        )
+
+    def _complete(self, prompt, system_prompt=None):
+        """
+        Get a full response from Grok using the X.AI API
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
         Returns:
             str: The model's response
         """
+        response = self.client.chat.completions.create(
+            model=self.model_id,
+            messages=self._build_messages(prompt, system_prompt),
+            **self.sampling_params,
+            stream=False
+        )
+        self._record_response_usage(response.usage)
+        return response.choices[0].message.content
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of one request, closing the stream if abandoned
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Text chunks of the response
+        """
+        stream = self.client.chat.completions.create(
+            model=self.model_id,
+            messages=self._build_messages(prompt, system_prompt),
+            **self.sampling_params,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
         try:
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": prompt},
-            ]
-            
-            response = self.client.chat.completions.create(
-                model="grok-2-latest",
-                messages=messages,
-                stream=False
-            )
-            
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error getting response from Grok: {str(e)}"
-            
-    def get_streaming_response(self, prompt, callback=None):
-        """
-        Get a streaming response from Grok
-        
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if getattr(chunk, 'usage', None):
+                    self._record_response_usage(chunk.usage)
+        finally:
+            stream.close()
+
+class AsyncGrok(AsyncProvider, Grok):
+    capabilities = Grok.capabilities | {ASYNC}
+
+    def __init__(self, system_prompt=None, hedging=None, cache=None, retry=None):
+        """
+        Initialize the asyncio Grok client, see Grok.__init__ for the arguments
+        """
+        Provider.__init__(
+            self,
+            system_prompt or "You are Grok, a chatbot inspired by the Hitchhikers Guide to the Galaxy.",
+            hedging,
+            cache,
+            retry
+        )
+        self.api_key = os.getenv('XAI_API_KEY')
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url="https://api.x.ai/v1",
+            # Retries are handled by self.retry
+            max_retries=0
+        )
+
+    async def _complete(self, prompt, system_prompt=None):
+        """
+        Get a full response from Grok without blocking the event loop
+
         Args:
             prompt (str): The user's prompt
-            callback (callable): Function to call with each chunk of the response
-            
+            system_prompt (str, optional): System prompt for this request instead of the default
+
         Returns:
-            str: The full model's response after streaming completes
+            str: The model's response
+        """
+        response = await self.client.chat.completions.create(
+            model=self.model_id,
+            messages=self._build_messages(prompt, system_prompt),
+            **self.sampling_params,
+            stream=False
+        )
+        self._record_response_usage(response.usage)
+        return response.choices[0].message.content
+
+    async def _stream_chunks(self, prompt, system_prompt=None):
         """
+        Stream the text chunks of one request without blocking the event loop
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Text chunks of the response
+        """
+        stream = await self.client.chat.completions.create(
+            model=self.model_id,
+            messages=self._build_messages(prompt, system_prompt),
+            **self.sampling_params,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
         try:
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": prompt},
-            ]
-            
-            stream = self.client.chat.completions.create(
-                model="grok-2-latest",
-                messages=messages,
-                stream=True
-            )
-            
-            full_response = ""
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-                    if callback:
-                        callback(content)
-                    full_response += content
-            
-            return full_response
-        except Exception as e:
-            error_msg = f"Error getting streaming response from Grok: {str(e)}"
-            if callback:
-                callback(error_msg)
-            return error_msg 
\ No newline at end of file
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if getattr(chunk, 'usage', None):
+                    self._record_response_usage(chunk.usage)
+        finally:
+            await stream.close()
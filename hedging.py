@@ -0,0 +1,249 @@
+from collections import deque
+import asyncio
+import queue
+import threading
+import time
+
+
+class HedgingPolicy:
+    """
+    Hedged requests for providers with heavy tail latency.
+
+    A request that has not produced its first token after the hedge delay is duplicated and
+    whichever attempt produces a token first is kept, the other one being cancelled. The hedge
+    delay follows a percentile of the first-token latencies seen so far, so only the slowest
+    requests get hedged, and a per-minute budget caps the number of extra requests.
+
+    Model clients use it on their raw chunk iterators:
+
+        for chunk in self.hedging.stream(lambda: self._stream_chunks(prompt)):
+            ...
+    """
+
+    def __init__(self, percentile=95, initial_delay=10.0, min_delay=0.5, max_delay=60.0,
+                 max_hedges_per_minute=10, window=200, min_samples=20):
+        """
+        Initialize the hedging policy
+
+        Args:
+            percentile (float): Percentile of first-token latencies after which a request is hedged (default is 95)
+            initial_delay (float): Hedge delay in seconds until enough latencies have been seen (default is 10)
+            min_delay (float): Lower bound of the hedge delay in seconds (default is 0.5)
+            max_delay (float): Upper bound of the hedge delay in seconds (default is 60)
+            max_hedges_per_minute (int): Maximum number of extra requests per minute (default is 10)
+            window (int): Number of recent first-token latencies the percentile is computed over (default is 200)
+            min_samples (int): Latencies needed before the percentile replaces initial_delay (default is 20)
+        """
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_hedges_per_minute = max_hedges_per_minute
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._hedge_times = deque()
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record_first_token(self, seconds):
+        """
+        Record how long an attempt took to produce its first token
+
+        Args:
+            seconds (float): First-token latency of the attempt
+        """
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self):
+        """
+        Get how long to wait for a first token before hedging
+
+        Returns:
+            float: Delay in seconds
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+            delay = samples[index]
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def try_acquire_hedge(self):
+        """
+        Take one extra request from the per-minute budget
+
+        Returns:
+            bool: True if a hedge may be sent, False if the budget is spent
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._hedge_times and now - self._hedge_times[0] >= 60:
+                self._hedge_times.popleft()
+            if len(self._hedge_times) >= self.max_hedges_per_minute:
+                return False
+            self._hedge_times.append(now)
+            self.hedges += 1
+            return True
+
+    def stream(self, start_attempt):
+        """
+        Run a streaming request, hedging it if its first token is late
+
+        Args:
+            start_attempt (callable): Starts one attempt and returns an iterator over its text chunks.
+                                      Closing the iterator must abandon the attempt.
+
+        Yields:
+            str: Text chunks of the winning attempt
+
+        Raises:
+            Exception: The error of the last attempt if every attempt failed
+        """
+        events = queue.Queue()
+        cancel_events = []
+
+        def run_attempt(attempt_id, cancel_event):
+            started = time.monotonic()
+            chunks = None
+            try:
+                chunks = start_attempt()
+                for chunk in chunks:
+                    if cancel_event.is_set():
+                        return
+                    events.put(('chunk', attempt_id, (chunk, time.monotonic() - started)))
+                events.put(('done', attempt_id, time.monotonic() - started))
+            except Exception as e:
+                events.put(('error', attempt_id, e))
+            finally:
+                close = getattr(chunks, 'close', None)
+                if close:
+                    close()
+
+        def launch():
+            cancel_event = threading.Event()
+            cancel_events.append(cancel_event)
+            threading.Thread(
+                target=run_attempt,
+                args=(len(cancel_events) - 1, cancel_event),
+                name="ai-council-hedge",
+                daemon=True
+            ).start()
+
+        launch()
+        hedge_at = time.monotonic() + self.hedge_delay()
+        hedged = False
+        winner = None
+        failed = set()
+        try:
+            while True:
+                timeout = None
+                if winner is None and not hedged:
+                    timeout = max(0, hedge_at - time.monotonic())
+                try:
+                    kind, attempt_id, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    # First token is late, duplicate the request if the budget allows
+                    hedged = True
+                    if self.try_acquire_hedge():
+                        launch()
+                    continue
+
+                if winner is None:
+                    if kind == 'error':
+                        failed.add(attempt_id)
+                        if len(failed) < len(cancel_events):
+                            continue  # Another attempt is still running
+                        raise payload
+                    winner = attempt_id
+                    if attempt_id > 0:
+                        self.hedge_wins += 1
+                    # Cancel the losing attempts
+                    for other_id, cancel_event in enumerate(cancel_events):
+                        if other_id != winner:
+                            cancel_event.set()
+                    self.record_first_token(payload[1] if kind == 'chunk' else payload)
+                elif attempt_id != winner:
+                    continue
+
+                if kind == 'chunk':
+                    yield payload[0]
+                elif kind == 'done':
+                    return
+                else:
+                    raise payload
+        finally:
+            for cancel_event in cancel_events:
+                cancel_event.set()
+
+    async def astream(self, start_attempt):
+        """
+        Run a streaming request from the event loop, hedging it if its first token is late
+
+        Args:
+            start_attempt (callable): Starts one attempt and returns an async iterator over its text chunks
+
+        Yields:
+            str: Text chunks of the winning attempt
+
+        Raises:
+            Exception: The error of the last attempt if every attempt failed
+        """
+        loop = asyncio.get_running_loop()
+        attempts = []
+
+        async def first_chunk(chunks, started):
+            async for chunk in chunks:
+                return chunk, loop.time() - started
+            return None, loop.time() - started
+
+        def launch():
+            started = loop.time()
+            chunks = start_attempt().__aiter__()
+            task = asyncio.ensure_future(first_chunk(chunks, started))
+            attempts.append((task, chunks))
+
+        launch()
+        done, _ = await asyncio.wait([attempts[0][0]], timeout=self.hedge_delay())
+        if not done and self.try_acquire_hedge():
+            launch()
+
+        winner = None
+        try:
+            pending = {task for task, _ in attempts}
+            while winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = next(attempt for attempt in attempts if attempt[0] is task)
+                        break
+                else:
+                    if not pending:
+                        raise next(iter(done)).exception()
+
+            task, chunks = winner
+            if task is not attempts[0][0]:
+                self.hedge_wins += 1
+            chunk, first_token_latency = task.result()
+            self.record_first_token(first_token_latency)
+            if chunk is None:
+                return
+            yield chunk
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            # Cancel the losing attempts and close their streams
+            for task, chunks in attempts:
+                if winner is not None and task is winner[0]:
+                    continue
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                aclose = getattr(chunks, 'aclose', None)
+                if aclose:
+                    try:
+                        await aclose()
+                    except Exception:
+                        pass
@@ -86,9 +86,20 @@ def init_database():
             'description': 'Maximum number of discussion rounds allowed'
         },
         {
-            'key': 'max_response_length',
-            'value': 2000,
-            'description': 'Maximum length of AI responses in characters'
+            'key': 'max_output_tokens',
+            'value': {'ChatGPT': 1000, 'Claude': 1000, 'Gemini': 1000, 'Grok': 1000, 'Llama': 512},
+            'description': 'Maximum number of tokens generated per response, for every model or for each model'
+        },
+        {
+            'key': 'rate_limits',
+            'value': {
+                'ChatGPT': {'requests_per_minute': 500, 'tokens_per_minute': 200000},
+                'Claude': {'requests_per_minute': 50, 'tokens_per_minute': 40000},
+                'Gemini': {'requests_per_minute': 15, 'tokens_per_minute': 1000000},
+                'Grok': {'requests_per_minute': 60},
+                'Llama': {'requests_per_minute': 600}
+            },
+            'description': 'Requests and tokens per minute allowed for each provider, set to your account quotas'
         }
     ]
 
@@ -1,93 +1,174 @@
 import os
+import asyncio
 import replicate
-from dotenv import load_dotenv
+from provider import Provider, AsyncProvider, STREAMING, ASYNC, CANCELLATION
 
-class Llama:
-    def __init__(self, system_prompt=None):
-        load_dotenv()
+class Llama(Provider):
+    name = "Llama"
+    capabilities = frozenset({STREAMING, CANCELLATION})
+    model_id = "meta/meta-llama-3-70b-instruct"
+    sampling_params = {
+        "top_k": 0,
+        "top_p": 0.9,
+        "max_tokens": 512,
+        "min_tokens": 0,
+        "temperature": 1.2,
+        "length_penalty": 1,
+        "stop_sequences": "<|end_of_text|>,<|eot_id|>",
+        "prompt_template": "<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n\nYou are a helpful assistant<|eot_id|><|start_header_id|>user<|end_header_id|>\n\n{prompt}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n",
+        "presence_penalty": 1.15,
+        "log_performance_metrics": False
+    }
+
+    def __init__(self, system_prompt=None, hedging=None, cache=None, retry=None):
+        """
+        Initialize the Llama client
+
+        Args:
+            system_prompt (str, optional): System prompt for the model
+            hedging (HedgingPolicy, optional): Hedge requests whose first token is late, useful
+                                               against Replicate cold starts
+            cache (ResponseCache, optional): Answer repeated requests from this cache
+            retry (RetryPolicy, optional): Retry transient failures with this policy instead of the default
+        """
+        super().__init__(system_prompt, hedging, cache, retry)
         self.client = replicate.Client(api_token=os.getenv('REPLICATE_API_TOKEN'))
-        self.system_prompt = system_prompt
-        
-    def get_response(self, prompt):
+
+    def _build_input(self, prompt, system_prompt=None):
         """
-        Get a response from Llama 3
-        
+        Build the Replicate input parameters for a prompt
+
         Args:
             prompt (str): The user's prompt
-            
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Returns:
+            dict: Input parameters for meta/meta-llama-3-70b-instruct
+        """
+        input_params = {"prompt": prompt, **self.sampling_params}
+
+        # Add system_prompt if it exists
+        system_prompt = self._system_prompt(system_prompt)
+        if system_prompt:
+            input_params["system_prompt"] = system_prompt
+        return input_params
+
+    def _complete(self, prompt, system_prompt=None):
+        """
+        Get a full response from Llama 3
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
         Returns:
             str: The model's response
         """
+        output = self.client.run(
+            self.model_id,
+            input=self._build_input(prompt, system_prompt)
+        )
+        return "".join(output)
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of one prediction, cancelling the prediction if abandoned
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Text chunks of the response
+        """
+        prediction = self.client.models.predictions.create(
+            model=self.model_id,
+            input=self._build_input(prompt, system_prompt),
+            stream=True
+        )
+        finished = False
         try:
-            input_params = {
-                "prompt": prompt,
-                "top_k": 0,
-                "top_p": 0.9,
-                "max_tokens": 512,
-                "min_tokens": 0,
-                "temperature": 1.2,
-                "length_penalty": 1,
-                "stop_sequences": "<|end_of_text|>,<|eot_id|>",
-                "prompt_template": "<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n\nYou are a helpful assistant<|eot_id|><|start_header_id|>user<|end_header_id|>\n\n{prompt}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n",
-                "presence_penalty": 1.15,
-                "log_performance_metrics": False
-            }
-            
-            # Add system_prompt if it exists
-            if self.system_prompt:
-                input_params["system_prompt"] = self.system_prompt
-            
-            output = self.client.run(
-                "meta/meta-llama-3-70b-instruct",
-                input=input_params
-            )
-            return "".join(output)
-        except Exception as e:
-            return f"Error getting response from Llama: {str(e)}" 
-            
-    def get_streaming_response(self, prompt, callback=None):
+            for event in prediction.stream():
+                # Only output events carry text, str() is empty for the rest
+                chunk = str(event)
+                if chunk:
+                    yield chunk
+            finished = True
+        finally:
+            if not finished:
+                # Stop the prediction so an abandoned response stops generating tokens
+                self._cancel(prediction)
+
+    @staticmethod
+    def _cancel(prediction):
         """
-        Get a streaming response from Llama 3
-        
+        Cancel a Replicate prediction, ignoring failures since it may already be finished
+
+        Args:
+            prediction (replicate.prediction.Prediction): The prediction to cancel
+        """
+        try:
+            prediction.cancel()
+        except Exception:
+            pass
+
+class AsyncLlama(AsyncProvider, Llama):
+    capabilities = Llama.capabilities | {ASYNC}
+
+    async def _complete(self, prompt, system_prompt=None):
+        """
+        Get a full response from Llama 3 without blocking the event loop
+
         Args:
             prompt (str): The user's prompt
-            callback (callable): Function to call with each chunk of the response
-            
+            system_prompt (str, optional): System prompt for this request instead of the default
+
         Returns:
-            str: The full model's response after streaming completes
+            str: The model's response
+        """
+        output = await self.client.async_run(
+            self.model_id,
+            input=self._build_input(prompt, system_prompt)
+        )
+        # Iterator-typed models come back as an async generator of chunks
+        if hasattr(output, '__aiter__'):
+            return "".join([chunk async for chunk in output])
+        return "".join(output)
+
+    async def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of one prediction without blocking the event loop
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the default
+
+        Yields:
+            str: Text chunks of the response
         """
+        prediction = await self.client.models.predictions.async_create(
+            model=self.model_id,
+            input=self._build_input(prompt, system_prompt),
+            stream=True
+        )
+        finished = False
         try:
-            input_params = {
-                "prompt": prompt,
-                "top_k": 0,
-                "top_p": 0.9,
-                "max_tokens": 512,
-                "min_tokens": 0,
-                "temperature": 1.2,
-                "length_penalty": 1,
-                "stop_sequences": "<|end_of_text|>,<|eot_id|>",
-                "prompt_template": "<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n\nYou are a helpful assistant<|eot_id|><|start_header_id|>user<|end_header_id|>\n\n{prompt}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n",
-                "presence_penalty": 1.15,
-                "log_performance_metrics": False
-            }
-            
-            # Add system_prompt if it exists
-            if self.system_prompt:
-                input_params["system_prompt"] = self.system_prompt
-            
-            # Replicate API is already streaming by default
-            full_response = ""
-            for chunk in self.client.run(
-                "meta/meta-llama-3-70b-instruct",
-                input=input_params
-            ):
-                if callback:
-                    callback(chunk)
-                full_response += chunk
-                
-            return full_response
-        except Exception as e:
-            error_msg = f"Error getting streaming response from Llama: {str(e)}"
-            if callback:
-                callback(error_msg)
-            return error_msg 
\ No newline at end of file
+            async for event in prediction.async_stream():
+                # Only output events carry text, str() is empty for the rest
+                chunk = str(event)
+                if chunk:
+                    yield chunk
+            finished = True
+        finally:
+            if not finished:
+                # Stop the prediction so a cancelled response stops generating tokens
+                cancelling = asyncio.ensure_future(prediction.async_cancel())
+                try:
+                    await asyncio.shield(cancelling)
+                except asyncio.CancelledError:
+                    # The task was cancelled again while waiting, the prediction is still cancelled
+                    # in the background but the task must stop
+                    raise
+                except Exception:
+                    # Ignoring failures like Llama._cancel, the prediction may already be finished
+                    pass
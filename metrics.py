@@ -0,0 +1,321 @@
+import contextlib
+import math
+import threading
+from discussion_context import estimate_tokens
+
+# Bucket upper bounds of the council's histograms
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TIME_TO_FIRST_TOKEN_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+TOKENS_PER_SECOND_BUCKETS = (1.0, 5.0, 10.0, 20.0, 40.0, 80.0, 160.0, 320.0)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    """
+    Metric with one series per combination of label values
+    """
+    type = None
+
+    def __init__(self, name, description, labels=()):
+        """
+        Initialize the metric, without any series
+
+        Args:
+            name (str): Name of the metric, e.g. 'ai_council_model_errors_total'
+            description (str): Help text of the metric
+            labels (tuple): Names of the metric's labels
+        """
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes the labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        """
+        Render the metric in the Prometheus text exposition format
+
+        Returns:
+            str: The HELP and TYPE lines followed by one line per sample
+        """
+        lines = [f'# HELP {self.name} {_escape(self.description)}', f'# TYPE {self.name} {self.type}']
+        lines.extend(f'{name}{labels} {_format_value(value)}' for name, labels, value in self._samples())
+        return '\n'.join(lines) + '\n'
+
+
+class Counter(_Metric):
+    """
+    Count of events that only goes up, e.g. failed turns
+    """
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """
+        Add to the count of a series
+
+        Args:
+            amount (float): Value added (default is 1)
+            **labels: Value of each of the metric's labels
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        """
+        Get the count of a series
+
+        Args:
+            **labels: Value of each of the metric's labels
+
+        Returns:
+            float: The count, 0 if nothing was counted
+        """
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        if not series and not self.labels:
+            # Metrics without labels are exposed from the start
+            series = [((), 0)]
+        return [(self.name, _format_labels(self.labels, key), value) for key, value in series]
+
+
+class Gauge(Counter):
+    """
+    Value that goes up and down, e.g. the number of open streams
+    """
+    type = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        """
+        Subtract from the value of a series
+
+        Args:
+            amount (float): Value subtracted (default is 1)
+            **labels: Value of each of the metric's labels
+        """
+        self.inc(-amount, **labels)
+
+    @contextlib.contextmanager
+    def track(self, **labels):
+        """
+        Count the code run in the with block while it runs
+
+        Args:
+            **labels: Value of each of the metric's labels
+        """
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values, counted in cumulative buckets
+    """
+    type = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        """
+        Initialize the histogram, without any series
+
+        Args:
+            name (str): Name of the metric, e.g. 'ai_council_model_latency_seconds'
+            description (str): Help text of the metric
+            labels (tuple): Names of the metric's labels
+            buckets (tuple): Upper bounds of the buckets, +Inf is added (default is LATENCY_BUCKETS)
+        """
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """
+        Record a value
+
+        Args:
+            value (float): The observed value
+            **labels: Value of each of the metric's labels
+        """
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def count(self, **labels):
+        """
+        Get the number of values recorded in a series
+
+        Args:
+            **labels: Value of each of the metric's labels
+
+        Returns:
+            int: The number of values, 0 if nothing was recorded
+        """
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series['count'] if series is not None else 0
+
+    def _samples(self):
+        with self._lock:
+            series = sorted((key, dict(values, buckets=list(values['buckets'])))
+                            for key, values in self._series.items())
+        samples = []
+        for key, values in series:
+            for bound, count in zip(self.buckets, values['buckets']):
+                samples.append((f'{self.name}_bucket',
+                                _format_labels(self.labels, key, [('le', _format_value(bound))]), count))
+            labels = _format_labels(self.labels, key)
+            samples.append((f'{self.name}_sum', labels, values['sum']))
+            samples.append((f'{self.name}_count', labels, values['count']))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Set of metrics exposed together
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        """
+        Add a metric to the registry
+
+        Args:
+            metric (Counter, Gauge or Histogram): The metric
+
+        Returns:
+            Counter, Gauge or Histogram: The metric
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            str: The body of a /metrics response
+        """
+        return ''.join(metric.render() for metric in self._metrics)
+
+
+class CouncilMetrics:
+    """
+    Metrics of the council, served on /metrics for Prometheus to scrape.
+
+    Every model turn is observed once it completes: its latency, its time to first token when it
+    was streamed, the tokens it sent and received and its generation throughput, per model. Failed
+    turns (errors, timeouts, open circuits) are counted by error class so that a provider having
+    trouble stands out. The gauges count the discussions being run and the SSE streams open.
+    """
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        self.time_to_first_token = self.registry.register(Histogram(
+            'ai_council_model_time_to_first_token_seconds',
+            'Seconds until the first chunk of a streamed response', ('model',), TIME_TO_FIRST_TOKEN_BUCKETS))
+        self.latency = self.registry.register(Histogram(
+            'ai_council_model_latency_seconds', 'Seconds a model turn took', ('model', 'status'), LATENCY_BUCKETS))
+        self.tokens_per_second = self.registry.register(Histogram(
+            'ai_council_model_tokens_per_second', 'Output tokens per second of generation of a response',
+            ('model',), TOKENS_PER_SECOND_BUCKETS))
+        self.tokens = self.registry.register(Histogram(
+            'ai_council_model_tokens', 'Tokens of a model turn, input (prompt) or output (response)',
+            ('model', 'direction'), TOKEN_BUCKETS))
+        self.errors = self.registry.register(Counter(
+            'ai_council_model_errors_total', 'Model turns that failed', ('model', 'status', 'error_class')))
+        self.discussions_in_flight = self.registry.register(Gauge(
+            'ai_council_discussions_in_flight', 'Discussions being run, continued discussions counting while their new round runs'))
+        self.sse_streams_open = self.registry.register(Gauge(
+            'ai_council_sse_streams_open', 'Server-sent event streams open'))
+
+    def observe_turn(self, model_name, response):
+        """
+        Record a completed model turn
+
+        Token counts reported by the provider are used when available, the output tokens are
+        estimated from the response otherwise. Input tokens are only recorded when reported.
+
+        Args:
+            model_name (str): Name of the model
+            response (ModelResult): The model's response
+        """
+        status = getattr(response, 'status', 'ok')
+        latency = getattr(response, 'latency', None)
+        if latency is not None:
+            self.latency.observe(latency, model=model_name, status=status)
+        if status != 'ok':
+            self.errors.inc(model=model_name, status=status,
+                            error_class=getattr(response, 'error_class', None) or 'unknown')
+            return
+        time_to_first_token = getattr(response, 'time_to_first_token', None)
+        if time_to_first_token is not None:
+            self.time_to_first_token.observe(time_to_first_token, model=model_name)
+        usage = getattr(response, 'usage', None) or {}
+        if usage.get('input_tokens') is not None:
+            self.tokens.observe(usage['input_tokens'], model=model_name, direction='input')
+        output_tokens = usage.get('output_tokens')
+        if output_tokens is None:
+            output_tokens = estimate_tokens(str(response))
+        self.tokens.observe(output_tokens, model=model_name, direction='output')
+        if latency is not None:
+            # Throughput of the generation, without the wait for the first token
+            generating = latency - (time_to_first_token or 0.0)
+            if generating > 0 and output_tokens:
+                self.tokens_per_second.observe(output_tokens / generating, model=model_name)
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            str: The body of a /metrics response
+        """
+        return self.registry.render()
+
+
+# Process-wide metrics, shared by every council that isn't given its own
+council_metrics = CouncilMetrics()
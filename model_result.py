@@ -0,0 +1,122 @@
+# Status of a model's turn, see ModelResult
+OK = 'ok'
+ERROR = 'error'              # The provider call failed
+TIMEOUT = 'timeout'          # The model did not answer within the round's limits
+UNAVAILABLE = 'unavailable'  # The provider's circuit breaker is open, no request was sent
+
+# Beginnings of the error messages of failed turns, e.g. "Error getting response from Grok: 500"
+ERROR_MESSAGE_PREFIXES = ("Error getting response from ", "Error getting streaming response from ",
+                          "Error getting batch response from ")
+
+
+class ModelResult(str):
+    """
+    Response of a model for one turn, with how the turn went.
+
+    A ModelResult is the response text to every caller that treats responses as strings (prompts,
+    JSON, the database), and also carries the status of the turn, its latency, the token usage
+    reported by the provider, the time to its first chunk if it was streamed and, for failures, the
+    class of the error. Failed turns keep their error message as text so they can still be
+    displayed, but is_error_response tells them apart from answers without parsing the message.
+    """
+
+    def __new__(cls, text, status=OK, latency=None, usage=None, error_class=None, time_to_first_token=None):
+        """
+        Create the result
+
+        Args:
+            text (str): The response, or the error message of a failed turn
+            status (str): OK, ERROR, TIMEOUT or UNAVAILABLE (default is OK)
+            latency (float, optional): Seconds the model took to answer
+            usage (dict, optional): Token usage of the request, see Provider.record_usage
+            error_class (str, optional): Name of the exception class of a failed turn
+            time_to_first_token (float, optional): Seconds until the first chunk of a streamed response
+        """
+        result = super().__new__(cls, text)
+        result.status = status
+        result.latency = latency
+        result.usage = usage
+        result.error_class = error_class
+        result.time_to_first_token = time_to_first_token
+        return result
+
+    @property
+    def ok(self):
+        """
+        bool: True if the model answered
+        """
+        return self.status == OK
+
+    def metadata(self):
+        """
+        Get everything about the turn but its text, e.g. for monitoring or storage next to the response
+
+        Returns:
+            dict: 'status', 'latency', 'time_to_first_token', 'usage' and 'error_class'
+        """
+        return {'status': self.status, 'latency': self.latency, 'time_to_first_token': self.time_to_first_token,
+                'usage': self.usage, 'error_class': self.error_class}
+
+
+def is_error_response(response):
+    """
+    Check whether a response is the error message of a failed turn
+
+    Plain strings, e.g. rounds loaded from the database, are failures if they are one of the
+    "Error getting response from ..." messages (see ERROR_MESSAGE_PREFIXES).
+
+    Args:
+        response (str or None): Response of a model
+
+    Returns:
+        bool: True if the turn failed
+    """
+    status = getattr(response, 'status', None)
+    if status is not None:
+        return status != OK
+    return isinstance(response, str) and response.startswith(ERROR_MESSAGE_PREFIXES)
+
+
+def as_model_result(response, latency=None):
+    """
+    Wrap the plain string response of a client that doesn't return ModelResults
+
+    Args:
+        response (str): Response of a model client
+        latency (float, optional): Seconds the model took to answer
+
+    Returns:
+        ModelResult: The response, unchanged if it already is a ModelResult
+    """
+    if isinstance(response, ModelResult):
+        if response.latency is None:
+            response.latency = latency
+        return response
+    if is_error_response(response):
+        return ModelResult(response, status=ERROR, latency=latency)
+    return ModelResult(response, latency=latency)
+
+
+def split_round(responses):
+    """
+    Separate a round's answers from its failed turns
+
+    Args:
+        responses (dict): Dictionary mapping model names to their responses
+
+    Returns:
+        tuple: (dictionary mapping model names to their answers as plain strings,
+                dictionary mapping model names to {'message', 'status', 'error_class'} of their failures)
+    """
+    answers = {}
+    errors = {}
+    for model_name, response in responses.items():
+        if is_error_response(response):
+            errors[model_name] = {
+                'message': str(response),
+                'status': getattr(response, 'status', ERROR),
+                'error_class': getattr(response, 'error_class', None)
+            }
+        else:
+            answers[model_name] = str(response)
+    return answers, errors
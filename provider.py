@@ -0,0 +1,534 @@
+import contextvars
+import inspect
+import threading
+import time
+from retry import DEFAULT_RETRY_POLICY
+from model_result import ModelResult, ERROR
+
+# Capabilities a provider client can declare, see Provider.capabilities
+STREAMING = 'streaming'              # get_streaming_response yields tokens as they are generated
+ASYNC = 'async'                      # get_response / get_streaming_response are coroutines
+BATCH_API = 'batch_api'              # The provider offers a discounted asynchronous batch API
+PROMPT_CACHING = 'prompt_caching'    # Repeated prompt prefixes are cached by the provider
+USAGE_REPORTING = 'usage_reporting'  # Responses report input/output token usage
+CANCELLATION = 'cancellation'        # Abandoning a stream stops generation on the provider side
+
+CAPABILITIES = (STREAMING, ASYNC, BATCH_API, PROMPT_CACHING, USAGE_REPORTING, CANCELLATION)
+
+# Token usage of the request running in the current thread or task, see Provider._start_request
+_request_usage = contextvars.ContextVar('request_usage', default=None)
+
+
+class RoundCancelled(Exception):
+    """Raised inside a model's stream callback to stop a model that timed out"""
+
+
+def supports(client, capability):
+    """
+    Check whether a model client supports a capability
+
+    Clients that don't derive from Provider are inspected instead: they support streaming if they
+    have a get_streaming_response method, and are async if get_response is a coroutine function.
+
+    Args:
+        client (object): A model client
+        capability (str): One of the capabilities defined in this module
+
+    Returns:
+        bool: True if the client supports the capability
+    """
+    capabilities = getattr(client, 'capabilities', None)
+    if capabilities is not None:
+        return capability in capabilities
+    if capability == STREAMING:
+        return callable(getattr(client, 'get_streaming_response', None))
+    if capability == ASYNC:
+        return inspect.iscoroutinefunction(getattr(client, 'get_response', None))
+    return False
+
+
+class Provider:
+    """
+    Base class of the model clients.
+
+    A client implements _complete (one full response) and _stream_chunks (an iterator over the
+    text chunks of one response, closing it must abandon the request) and declares what its
+    provider supports in capabilities. Error handling, retries, hedging and the public get_response /
+    get_streaming_response methods live here, so a feature added to them reaches every provider.
+
+    Clients are long-lived: the system prompt given at construction is only a default and every
+    request can pass its own, so changing a persona never rebuilds the SDK client or its
+    connection pool.
+
+    Responses are ModelResults (see model_result.py) carrying the latency and token usage of the
+    request, and failures come back as ModelResults with an error status instead of raising.
+
+    With a ResponseCache, a request identical to an earlier one (same model, system prompt,
+    prompt and sampling parameters) is answered from the cache, streamed chunk by chunk.
+
+    Prompts may be LayeredPrompts (see discussion_context.py): clients of providers with prompt
+    caching lay them out so the part repeated by the next round is a cacheable prefix.
+    """
+    # Name used in error messages, e.g. "Error getting response from ChatGPT: ..."
+    name = None
+    capabilities = frozenset({STREAMING})
+    # Model every request is sent to, and the sampling parameters sent with it
+    model_id = None
+    sampling_params = {}
+    # Sampling parameter bounding the length of a response, see set_max_output_tokens
+    max_tokens_param = 'max_tokens'
+
+    def __init__(self, system_prompt=None, hedging=None, cache=None, retry=None):
+        """
+        Initialize the client
+
+        Args:
+            system_prompt (str, optional): System prompt for the model
+            hedging (HedgingPolicy, optional): Hedge requests whose first token is late
+            cache (ResponseCache, optional): Answer repeated requests from this cache
+            retry (RetryPolicy, optional): Retry transient failures with this policy. If None,
+                                           DEFAULT_RETRY_POLICY is used; RetryPolicy(max_attempts=1)
+                                           disables retries.
+        """
+        self.system_prompt = system_prompt
+        self.hedging = hedging
+        self.cache = cache
+        self.retry = retry or DEFAULT_RETRY_POLICY
+        # Token usage reported by the provider, see record_usage
+        self.usage = {'requests': 0, 'input_tokens': 0, 'cached_input_tokens': 0,
+                      'cache_write_tokens': 0, 'output_tokens': 0}
+        self._usage_lock = threading.Lock()
+
+    def supports(self, capability):
+        """
+        Check whether this client supports a capability
+
+        Args:
+            capability (str): One of the capabilities defined in this module
+
+        Returns:
+            bool: True if the capability is declared
+        """
+        return capability in self.capabilities
+
+    def set_max_output_tokens(self, max_output_tokens):
+        """
+        Bound the length of every response of this client
+
+        Args:
+            max_output_tokens (int or None): Maximum number of tokens generated per response.
+                                             If None, the client's default sampling parameters are restored.
+        """
+        sampling_params = dict(type(self).sampling_params)
+        if max_output_tokens is not None:
+            sampling_params[self.max_tokens_param] = max_output_tokens
+        self.sampling_params = sampling_params
+
+    def _system_prompt(self, system_prompt=None):
+        """
+        Get the system prompt of a request
+
+        Args:
+            system_prompt (str, optional): System prompt passed with the request
+
+        Returns:
+            str: system_prompt if given, otherwise the client's default system prompt
+        """
+        return self.system_prompt if system_prompt is None else system_prompt
+
+    def record_usage(self, input_tokens=0, output_tokens=0, cached_input_tokens=0, cache_write_tokens=0):
+        """
+        Add the token usage of one response to the client's totals, for clients declaring USAGE_REPORTING
+
+        Args:
+            input_tokens (int): Prompt tokens, including the cached ones
+            output_tokens (int): Generated tokens
+            cached_input_tokens (int): Prompt tokens read from the provider's prompt cache
+            cache_write_tokens (int): Prompt tokens written to the provider's prompt cache
+        """
+        usage = {'input_tokens': input_tokens or 0, 'output_tokens': output_tokens or 0,
+                 'cached_input_tokens': cached_input_tokens or 0, 'cache_write_tokens': cache_write_tokens or 0}
+        with self._usage_lock:
+            self.usage['requests'] += 1
+            for key, tokens in usage.items():
+                self.usage[key] += tokens
+        # Also attribute it to the request being answered
+        request_usage = _request_usage.get()
+        if request_usage is not None:
+            for key, tokens in usage.items():
+                request_usage[key] = request_usage.get(key, 0) + tokens
+
+    @staticmethod
+    def _start_request():
+        """
+        Start collecting the token usage of a request made from the current thread or task
+
+        Returns:
+            tuple: (context variable token for _finish_request, dictionary receiving the usage)
+        """
+        usage = {}
+        return _request_usage.set(usage), usage
+
+    @staticmethod
+    def _finish_request(token):
+        """
+        Stop collecting the token usage of a request
+
+        Args:
+            token (contextvars.Token): Token returned by _start_request
+        """
+        _request_usage.reset(token)
+
+    def _error_result(self, message, error, started):
+        """
+        Build the result of a failed request
+
+        Args:
+            message (str): Error message, e.g. "Error getting response from ChatGPT: ..."
+            error (Exception): The error
+            started (float): time.monotonic() when the request started
+
+        Returns:
+            ModelResult: The error message, with the error status
+        """
+        return ModelResult(message, status=ERROR, latency=time.monotonic() - started, error_class=type(error).__name__)
+
+    def usage_stats(self):
+        """
+        Get the token usage totals
+
+        Returns:
+            dict: Requests, input, cached input, cache write and output tokens, and the cached share of input tokens
+        """
+        with self._usage_lock:
+            stats = dict(self.usage)
+        stats['cached_input_ratio'] = (stats['cached_input_tokens'] / stats['input_tokens']
+                                       if stats['input_tokens'] else 0.0)
+        return stats
+
+    def _cache_key(self, prompt, system_prompt=None):
+        """
+        Get the response cache key of a request
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt passed with the request
+
+        Returns:
+            str or None: The key, or None if the client has no cache
+        """
+        if self.cache is None:
+            return None
+        return self.cache.key(self.name, self.model_id, self._system_prompt(system_prompt), prompt,
+                              self.sampling_params)
+
+    def _cached_chunks(self, cache_key):
+        """
+        Look up a response in the cache
+
+        Args:
+            cache_key (str or None): Key from _cache_key
+
+        Returns:
+            list or None: Chunks to replay, or None if the response is not cached
+        """
+        if cache_key is None:
+            return None
+        chunks = self.cache.get(cache_key)
+        if chunks is None:
+            return None
+        return self.cache.replay_chunks(chunks)
+
+    def _complete(self, prompt, system_prompt=None):
+        """
+        Request one full response from the provider
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request, see _system_prompt
+
+        Returns:
+            str: The model's response
+        """
+        raise NotImplementedError
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of one request, abandoning the request if closed early
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request, see _system_prompt
+
+        Yields:
+            str: Text chunks of the response
+        """
+        raise NotImplementedError
+
+    def _chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of a response, hedged if a hedging policy is set and retried
+        if it fails before its first chunk
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request
+
+        Returns:
+            iterator: Text chunks of the response
+        """
+        def start_attempt():
+            if self.hedging:
+                return self.hedging.stream(lambda: self._stream_chunks(prompt, system_prompt))
+            return self._stream_chunks(prompt, system_prompt)
+        return self.retry.stream(start_attempt)
+
+    def get_response(self, prompt, system_prompt=None):
+        """
+        Get a response from the model
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the client's default
+
+        Returns:
+            str: The model's response
+        """
+        started = time.monotonic()
+        cache_key = self._cache_key(prompt, system_prompt)
+        cached = self._cached_chunks(cache_key)
+        if cached is not None:
+            return ModelResult("".join(cached), latency=time.monotonic() - started)
+
+        token, usage = self._start_request()
+        try:
+            if self.hedging:
+                # Hedging decides on the first token, so go through the streaming API
+                response = "".join(self._chunks(prompt, system_prompt))
+            else:
+                response = self.retry.call(lambda: self._complete(prompt, system_prompt))
+        except Exception as e:
+            return self._error_result(f"Error getting response from {self.name}: {str(e)}", e, started)
+        finally:
+            self._finish_request(token)
+
+        if cache_key is not None and response:
+            self.cache.put(cache_key, [response])
+        return ModelResult(response, latency=time.monotonic() - started, usage=usage or None)
+
+    def get_streaming_response(self, prompt, callback=None, system_prompt=None):
+        """
+        Get a streaming response from the model
+
+        Args:
+            prompt (str): The user's prompt
+            callback (callable): Function to call with each chunk of the response
+            system_prompt (str, optional): System prompt for this request instead of the client's default
+
+        Returns:
+            str: The full model's response after streaming completes
+        """
+        started = time.monotonic()
+        cache_key = self._cache_key(prompt, system_prompt)
+        chunks = self._cached_chunks(cache_key)
+        replayed = chunks is not None
+        token, usage = self._start_request()
+        try:
+            received = []
+            first_chunk = None
+            if not replayed:
+                chunks = self._chunks(prompt, system_prompt)
+            for chunk in chunks:
+                if first_chunk is None:
+                    first_chunk = time.monotonic() - started
+                if callback:
+                    callback(chunk)
+                received.append(chunk)
+
+            if cache_key is not None and not replayed:
+                self.cache.put(cache_key, received)
+            return ModelResult("".join(received), latency=time.monotonic() - started, usage=usage or None,
+                               time_to_first_token=first_chunk)
+        except RoundCancelled:
+            # The round stopped the stream, there is no response to report
+            raise
+        except Exception as e:
+            error = self._error_result(f"Error getting streaming response from {self.name}: {str(e)}", e, started)
+            if callback:
+                callback(error)
+            return error
+        finally:
+            # Abandon the request right away if the callback stopped the stream
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+            self._finish_request(token)
+
+
+    def submit_batch(self, requests):
+        """
+        Submit requests to the provider's batch API, for clients declaring BATCH_API
+
+        Args:
+            requests (list): (custom_id, prompt, system_prompt) tuples, custom_id being unique in the batch
+
+        Returns:
+            str: ID of the batch
+        """
+        raise NotImplementedError(f"{self.name} has no batch API")
+
+    def batch_status(self, batch_id):
+        """
+        Check on a batch submitted with submit_batch
+
+        Args:
+            batch_id (str): ID returned by submit_batch
+
+        Returns:
+            str: 'in_progress', or 'ended' once the batch completed, failed, expired or was cancelled
+        """
+        raise NotImplementedError(f"{self.name} has no batch API")
+
+    def batch_results(self, batch_id):
+        """
+        Get the responses of an ended batch
+
+        Args:
+            batch_id (str): ID returned by submit_batch
+
+        Returns:
+            dict: Dictionary mapping custom IDs to responses, failed requests mapping to an error message
+                  such as "Error getting batch response from ChatGPT: ...". Requests the provider
+                  dropped are missing.
+        """
+        raise NotImplementedError(f"{self.name} has no batch API")
+
+    def _batch_error(self, message):
+        """
+        Format the response recorded for a failed batch request
+
+        Args:
+            message (str): What went wrong
+
+        Returns:
+            str: The error message
+        """
+        return f"Error getting batch response from {self.name}: {message}"
+
+
+class AsyncProvider(Provider):
+    """
+    Base class of the asyncio model clients.
+
+    Same contract as Provider except that _complete is a coroutine and _stream_chunks an async
+    generator, so waiting on the provider never blocks the event loop.
+    """
+    capabilities = frozenset({STREAMING, ASYNC})
+
+    def _chunks(self, prompt, system_prompt=None):
+        """
+        Stream the text chunks of a response, hedged if a hedging policy is set and retried
+        if it fails before its first chunk
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request
+
+        Returns:
+            async iterator: Text chunks of the response
+        """
+        def start_attempt():
+            if self.hedging:
+                return self.hedging.astream(lambda: self._stream_chunks(prompt, system_prompt))
+            return self._stream_chunks(prompt, system_prompt)
+        return self.retry.astream(start_attempt)
+
+    async def get_response(self, prompt, system_prompt=None):
+        """
+        Get a response from the model without blocking the event loop
+
+        Args:
+            prompt (str): The user's prompt
+            system_prompt (str, optional): System prompt for this request instead of the client's default
+
+        Returns:
+            str: The model's response
+        """
+        started = time.monotonic()
+        cache_key = self._cache_key(prompt, system_prompt)
+        cached = self._cached_chunks(cache_key)
+        if cached is not None:
+            return ModelResult("".join(cached), latency=time.monotonic() - started)
+
+        token, usage = self._start_request()
+        try:
+            if self.hedging:
+                # Hedging decides on the first token, so go through the streaming API
+                response = "".join([chunk async for chunk in self._chunks(prompt, system_prompt)])
+            else:
+                response = await self.retry.acall(lambda: self._complete(prompt, system_prompt))
+        except Exception as e:
+            return self._error_result(f"Error getting response from {self.name}: {str(e)}", e, started)
+        finally:
+            self._finish_request(token)
+
+        if cache_key is not None and response:
+            self.cache.put(cache_key, [response])
+        return ModelResult(response, latency=time.monotonic() - started, usage=usage or None)
+
+    async def get_streaming_response(self, prompt, callback=None, system_prompt=None):
+        """
+        Get a streaming response from the model without blocking the event loop
+
+        Args:
+            prompt (str): The user's prompt
+            callback (callable): Function to call with each chunk of the response
+            system_prompt (str, optional): System prompt for this request instead of the client's default
+
+        Returns:
+            str: The full model's response after streaming completes
+        """
+        started = time.monotonic()
+        cache_key = self._cache_key(prompt, system_prompt)
+        cached = self._cached_chunks(cache_key)
+        chunks = None
+        token, usage = self._start_request()
+        try:
+            received = []
+            first_chunk = None
+            if cached is not None:
+                for chunk in cached:
+                    if first_chunk is None:
+                        first_chunk = time.monotonic() - started
+                    if callback:
+                        callback(chunk)
+                    received.append(chunk)
+                return ModelResult("".join(received), latency=time.monotonic() - started,
+                                   time_to_first_token=first_chunk)
+
+            chunks = self._chunks(prompt, system_prompt)
+            async for chunk in chunks:
+                if first_chunk is None:
+                    first_chunk = time.monotonic() - started
+                if callback:
+                    callback(chunk)
+                received.append(chunk)
+
+            if cache_key is not None:
+                self.cache.put(cache_key, received)
+            return ModelResult("".join(received), latency=time.monotonic() - started, usage=usage or None,
+                               time_to_first_token=first_chunk)
+        except RoundCancelled:
+            # The round stopped the stream, there is no response to report
+            raise
+        except Exception as e:
+            error = self._error_result(f"Error getting streaming response from {self.name}: {str(e)}", e, started)
+            if callback:
+                callback(error)
+            return error
+        finally:
+            # Abandon the request right away if the callback stopped the stream
+            aclose = getattr(chunks, 'aclose', None)
+            if aclose:
+                await aclose()
+            self._finish_request(token)
@@ -0,0 +1,225 @@
+from importlib import import_module
+from dotenv import load_dotenv
+import os
+import sys
+import threading
+import time
+
+# Environment variable each provider needs, keyed by the module its clients live in
+PROVIDER_ENV_VARS = {
+    'chatgpt': 'OPENAI_API_KEY',
+    'claude': 'ANTHROPIC_API_KEY',
+    'gemini': 'GOOGLE_API_KEY',
+    'grok': 'XAI_API_KEY',
+    'llama': 'REPLICATE_API_TOKEN'
+}
+
+# Seconds spent importing provider modules and building clients, see import_report()
+_import_times = {}
+_build_times = {}
+_lock = threading.Lock()
+_environment_loaded = False
+
+
+def load_environment():
+    """
+    Load the .env file once for every provider client
+    """
+    global _environment_loaded
+    if not _environment_loaded:
+        load_dotenv()
+        _environment_loaded = True
+
+
+def _split(class_path):
+    module_name, _, class_name = class_path.rpartition('.')
+    return module_name, class_name
+
+
+def resolve_class(model_class):
+    """
+    Get a client class, importing its module (and so its provider SDK) if needed
+
+    Args:
+        model_class (type or str): A client class, or its dotted path such as 'chatgpt.ChatGPT'
+
+    Returns:
+        type: The client class
+    """
+    if not isinstance(model_class, str):
+        return model_class
+    module_name, class_name = _split(model_class)
+    with _lock:
+        if module_name not in sys.modules:
+            start = time.perf_counter()
+            import_module(module_name)
+            _import_times[module_name] = time.perf_counter() - start
+    return getattr(sys.modules[module_name], class_name)
+
+
+def missing_configuration(model_class):
+    """
+    Check whether a client can be built, without importing its provider SDK
+
+    Args:
+        model_class (type or str): A client class, or its dotted path
+
+    Returns:
+        str or None: Name of the missing environment variable, or None if nothing is missing
+    """
+    if not isinstance(model_class, str):
+        return None
+    load_environment()
+    env_var = PROVIDER_ENV_VARS.get(_split(model_class)[0])
+    if env_var and not os.getenv(env_var):
+        return env_var
+    return None
+
+
+class UnavailableProvider:
+    """Stands in for a client that failed to build, answering every request with the error"""
+
+    def __init__(self, model_name, error, is_async=False):
+        self.model_name = model_name
+        self.error = error
+        self.is_async = is_async
+
+    def _error_message(self, streaming):
+        kind = "streaming response" if streaming else "response"
+        return f"Error getting {kind} from {self.model_name}: client could not be initialized: {self.error}"
+
+    def get_response(self, prompt, *args, **kwargs):
+        message = self._error_message(streaming=False)
+        if self.is_async:
+            return self._async_result(message)
+        return message
+
+    def get_streaming_response(self, prompt, callback=None, *args, **kwargs):
+        message = self._error_message(streaming=True)
+        if callback:
+            callback(message)
+        if self.is_async:
+            return self._async_result(message)
+        return message
+
+    @staticmethod
+    async def _async_result(message):
+        return message
+
+
+class LazyProvider:
+    """
+    Proxy for a model client that is only imported and built on first use
+
+    Importing the provider SDKs and building their HTTP clients accounts for most of the
+    startup time of the app, and a process often only talks to some of the providers.
+    """
+
+    def __init__(self, model_name, model_class, *args, **kwargs):
+        """
+        Initialize the proxy, nothing is imported or built yet
+
+        Args:
+            model_name (str): Name of the model in the council
+            model_class (type or str): The client class, or its dotted path such as 'chatgpt.ChatGPT'
+            *args, **kwargs: Arguments for the client's constructor
+        """
+        self._model_name = model_name
+        self._model_class = model_class
+        self._args = args
+        self._kwargs = kwargs
+        self._instance = None
+        # Callbacks to run on the client once it is built, see when_built
+        self._on_build = []
+        self._build_lock = threading.Lock()
+
+    @property
+    def is_built(self):
+        return self._instance is not None
+
+    def _client(self):
+        if self._instance is None:
+            with self._build_lock:
+                if self._instance is None:
+                    load_environment()
+                    start = None
+                    try:
+                        model_class = resolve_class(self._model_class)
+                        start = time.perf_counter()
+                        instance = model_class(*self._args, **self._kwargs)
+                    except Exception as e:
+                        print(f"Warning: Could not initialize model {self._model_name}: {e}")
+                        is_async = isinstance(self._model_class, str) and _split(self._model_class)[1].startswith('Async')
+                        instance = UnavailableProvider(self._model_name, e, is_async=is_async)
+                    if start is not None:
+                        with _lock:
+                            _build_times[self._model_name] = time.perf_counter() - start
+                    for callback in self._on_build:
+                        callback(instance)
+                    self._on_build = []
+                    self._instance = instance
+        return self._instance
+
+    def when_built(self, callback):
+        """
+        Configure the client without building it
+
+        Args:
+            callback (callable): Called with the client, right away if it is built, otherwise once it is
+        """
+        with self._build_lock:
+            if self._instance is None:
+                self._on_build.append(callback)
+                return
+        callback(self._instance)
+
+    def __getattr__(self, name):
+        return getattr(self._client(), name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._client(), name, value)
+
+
+def import_report():
+    """
+    Report the time spent importing provider modules and building clients so far
+
+    Returns:
+        dict: {'imports': {module: seconds}, 'clients': {model name: seconds}, 'total_seconds': float}
+    """
+    with _lock:
+        imports = dict(_import_times)
+        clients = dict(_build_times)
+    return {
+        'imports': imports,
+        'clients': clients,
+        'total_seconds': sum(imports.values()) + sum(clients.values())
+    }
+
+
+def print_import_report(model_classes):
+    """
+    Import every client class and print the time spent importing each provider module
+
+    Args:
+        model_classes (iterable): Dotted paths of the client classes, such as 'chatgpt.ChatGPT'
+    """
+    for model_class in model_classes:
+        try:
+            resolve_class(model_class)
+        except Exception as e:
+            print(f"Warning: Could not import {model_class}: {e}")
+    report = import_report()
+    for module_name, seconds in sorted(report['imports'].items(), key=lambda item: -item[1]):
+        print(f"{module_name:<10} {seconds * 1000:8.1f} ms")
+    print(f"{'total':<10} {report['total_seconds'] * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    # python providers.py prints the cost of loading every provider from a cold start
+    from ai_council import MODEL_CLASSES, ASYNC_MODEL_CLASSES
+    load_environment()
+    print_import_report(list(MODEL_CLASSES.values()) + list(ASYNC_MODEL_CLASSES.values()))
@@ -0,0 +1,205 @@
+import threading
+import time
+
+# Output tokens assumed for a response when the model doesn't declare its maximum
+DEFAULT_OUTPUT_TOKENS = 1000
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+
+    Callers reserve what they need and are told how long to wait before using it. The bucket may
+    go into debt, so concurrent callers queue up in reservation order instead of polling, and the
+    same bucket works for threads (time.sleep) and coroutines (asyncio.sleep).
+    """
+
+    def __init__(self, per_minute, burst=None, clock=time.monotonic):
+        """
+        Initialize the bucket, full
+
+        Args:
+            per_minute (float): Refill rate, in units per minute
+            burst (float, optional): Capacity of the bucket. If None, ten seconds' worth of the rate (at least 1).
+            clock (callable): Monotonic clock in seconds, for tests (default is time.monotonic)
+        """
+        self.per_minute = per_minute
+        self.capacity = burst if burst is not None else max(1.0, per_minute / 6)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        # Called with the lock held
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def reserve(self, amount=1):
+        """
+        Take units from the bucket
+
+        Args:
+            amount (float): Units needed (default is 1)
+
+        Returns:
+            float: Seconds to wait before using them, 0 if they are available now
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens * 60 / self.per_minute
+
+    def adjust(self, amount):
+        """
+        Give units back to the bucket, or take more, once the actual cost of a request is known
+
+        Args:
+            amount (float): Units to return, negative to take
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class Reservation:
+    """
+    A request admitted by a RateLimiter, see RateLimiter.reserve
+    """
+
+    def __init__(self, limiter, prompt_tokens, reserved_tokens, delay):
+        self.limiter = limiter
+        self.prompt_tokens = prompt_tokens
+        self.reserved_tokens = reserved_tokens
+        # Seconds to wait before sending the request
+        self.delay = delay
+
+    def settle(self, output_tokens):
+        """
+        Return the tokens reserved for the response but not used
+
+        Args:
+            output_tokens (int): Tokens of the actual response
+        """
+        if self.limiter.tokens is not None:
+            self.limiter.tokens.adjust(self.reserved_tokens - self.prompt_tokens - output_tokens)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits of one provider
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, clock=time.monotonic):
+        """
+        Initialize the limiter
+
+        Args:
+            requests_per_minute (float, optional): Request quota. If None, requests are not limited.
+            tokens_per_minute (float, optional): Token quota, prompt plus response. If None, tokens are not limited.
+            clock (callable): Monotonic clock in seconds, for tests (default is time.monotonic)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = TokenBucket(requests_per_minute, clock=clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+
+    def reserve(self, prompt_tokens=0, output_tokens=DEFAULT_OUTPUT_TOKENS):
+        """
+        Reserve one request and its tokens
+
+        Providers count the maximum response length against the token quota until the response
+        is done, so the reservation does too and Reservation.settle returns what was not used.
+
+        Args:
+            prompt_tokens (int): Estimated tokens of the prompt, system prompt included
+            output_tokens (int): Maximum tokens of the response (default is DEFAULT_OUTPUT_TOKENS)
+
+        Returns:
+            Reservation: The reservation, whose delay is the number of seconds to wait before sending
+        """
+        delay = 0.0
+        reserved = 0
+        if self.requests is not None:
+            delay = self.requests.reserve(1)
+        if self.tokens is not None:
+            # A request larger than the bucket would wait forever, let it through at the refill rate
+            reserved = min(prompt_tokens + output_tokens, self.tokens.capacity)
+            delay = max(delay, self.tokens.reserve(reserved))
+        return Reservation(self, prompt_tokens, reserved, delay)
+
+
+class RateLimiterRegistry:
+    """
+    Rate limiters of every provider, shared by all councils of the process.
+
+    Limits are given per model name, e.g. {'Claude': {'requests_per_minute': 50, 'tokens_per_minute': 40000}},
+    the format of the 'rate_limits' system setting.
+    """
+
+    def __init__(self, limits=None):
+        """
+        Initialize the registry
+
+        Args:
+            limits (dict, optional): Dictionary mapping model names to their limits
+        """
+        self._limiters = {}
+        self._lock = threading.Lock()
+        self.configure(limits or {})
+
+    def configure(self, limits):
+        """
+        Set the limits of every provider, models left out being unlimited
+
+        Limiters whose limits did not change keep their state, so reloading the settings does
+        not hand out a fresh burst.
+
+        Args:
+            limits (dict): Dictionary mapping model names to a dictionary with 'requests_per_minute'
+                           and/or 'tokens_per_minute'
+        """
+        with self._lock:
+            limiters = {}
+            for model_name, model_limits in (limits or {}).items():
+                rpm = model_limits.get('requests_per_minute')
+                tpm = model_limits.get('tokens_per_minute')
+                if not rpm and not tpm:
+                    continue
+                current = self._limiters.get(model_name)
+                if current is not None and (current.requests_per_minute, current.tokens_per_minute) == (rpm, tpm):
+                    limiters[model_name] = current
+                else:
+                    limiters[model_name] = RateLimiter(rpm, tpm)
+            self._limiters = limiters
+
+    def get(self, model_name):
+        """
+        Get the limiter of a model
+
+        Args:
+            model_name (str): Name of the model
+
+        Returns:
+            RateLimiter or None: The limiter, or None if the model is not limited
+        """
+        return self._limiters.get(model_name)
+
+    def limits(self):
+        """
+        Get the configured limits
+
+        Returns:
+            dict: Dictionary mapping model names to their limits
+        """
+        with self._lock:
+            return {model_name: {'requests_per_minute': limiter.requests_per_minute,
+                                 'tokens_per_minute': limiter.tokens_per_minute}
+                    for model_name, limiter in self._limiters.items()}
+
+
+# Process-wide limiters used by default by every AICouncil
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,285 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+# Pieces a cached response is replayed in when it was not stored as a stream
+_REPLAY_PIECE = re.compile(r'\S+\s*|\s+')
+
+
+class ResponseCache:
+    """
+    Exact-match cache of model responses.
+
+    Responses are keyed on everything that determines them: provider, model id, system prompt,
+    prompt and sampling parameters. Entries live in an in-memory LRU tier and, if cache_dir is
+    set, in an on-disk tier shared across restarts. Both tiers expire entries after ttl seconds
+    and evict the least recently used entries once over their size limit.
+
+    Responses are stored as the list of chunks they were streamed in, so a cached streaming
+    response is replayed chunk by chunk like a live one.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=None,
+                 cache_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries (int): Maximum number of responses kept in memory (default is 1024)
+            max_bytes (int): Maximum total size of the responses kept in memory (default is 64 MB)
+            ttl (float, optional): Seconds a response stays valid. If None, responses never expire.
+            cache_dir (str, optional): Directory of the on-disk tier. If None, only memory is used.
+            max_disk_bytes (int): Maximum total size of the on-disk tier (default is 512 MB)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Key -> size of the on-disk entries, least recently used first, so writes don't scan the directory
+        self._disk_entries = OrderedDict()
+        self._disk_bytes = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def key(provider, model_id, system_prompt, prompt, params=None):
+        """
+        Build the cache key of a request
+
+        Args:
+            provider (str): Name of the provider, e.g. 'ChatGPT'
+            model_id (str): Model the request is sent to
+            system_prompt (str): System prompt of the request
+            prompt (str): The rendered prompt
+            params (dict, optional): Sampling parameters of the request
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        payload = json.dumps([provider, model_id, system_prompt, prompt, params or {}],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _size(chunks):
+        return sum(len(chunk.encode("utf-8")) for chunk in chunks)
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key):
+        """
+        Look up a response
+
+        Args:
+            key (str): Cache key, see key()
+
+        Returns:
+            list or None: The chunks of the cached response, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, chunks = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(chunks)
+                self._remove(key)
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            # Promote to the memory tier
+            self._store(key, entry[0], entry[1])
+            return list(entry[1])
+
+    def put(self, key, chunks):
+        """
+        Store a response
+
+        Args:
+            key (str): Cache key, see key()
+            chunks (list): The response, as the list of chunks it was streamed in
+        """
+        chunks = [chunk for chunk in chunks if chunk]
+        if not chunks:
+            return
+        created = time.time()
+        with self._lock:
+            self._store(key, created, chunks)
+        self._write_disk(key, created, chunks)
+
+    def _store(self, key, created, chunks):
+        # Called with the lock held
+        if key in self._entries:
+            self._remove(key)
+        size = self._size(chunks)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (created, chunks)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        # Called with the lock held
+        _, chunks = self._entries.pop(key)
+        self._bytes -= self._size(chunks)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_disk_index(self):
+        # Only scan of the directory, the index is kept up to date by reads, writes and evictions
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name[:-len('.json')], stat.st_size))
+        # Oldest first
+        for _, key, size in sorted(files):
+            self._disk_entries[key] = size
+            self._disk_bytes += size
+
+    def _forget_disk(self, key):
+        # Called with the lock held
+        size = self._disk_entries.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry['created']):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            with self._lock:
+                self._forget_disk(key)
+            return None
+        try:
+            # Keep the file's access order for eviction after a restart
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            if key in self._disk_entries:
+                self._disk_entries.move_to_end(key)
+        return entry['created'], entry['chunks']
+
+    def _write_disk(self, key, created, chunks):
+        if not self.cache_dir:
+            return
+        try:
+            # Write to a temporary file first so readers never see a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'created': created, 'chunks': chunks}, f)
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            print(f"Warning: Could not write response cache entry: {e}")
+            return
+        with self._lock:
+            self._forget_disk(key)
+            self._disk_entries[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _evict_disk(self):
+        victims = []
+        with self._lock:
+            # Least recently used first
+            while self._disk_bytes > self.max_disk_bytes and self._disk_entries:
+                key = next(iter(self._disk_entries))
+                victims.append(key)
+                self._forget_disk(key)
+        for key in victims:
+            try:
+                os.remove(self._path(key))
+                with self._lock:
+                    self.evictions += 1
+            except OSError:
+                pass
+
+    @staticmethod
+    def replay_chunks(chunks):
+        """
+        Split a cached response into the chunks it is replayed in
+
+        Args:
+            chunks (list): Chunks of the cached response
+
+        Returns:
+            list: The stored chunks, or word-sized pieces if the response was stored whole
+        """
+        if len(chunks) == 1:
+            return _REPLAY_PIECE.findall(chunks[0]) or chunks
+        return chunks
+
+    def clear(self):
+        """
+        Drop every cached response from both tiers
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._disk_entries.clear()
+            self._disk_bytes = 0
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self):
+        """
+        Get the cache counters
+
+        Returns:
+            dict: Hits, disk hits, misses, evictions, hit rate and memory usage
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
@@ -0,0 +1,267 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server errors and overload
+RETRYABLE_STATUSES = frozenset({408, 409, 425, 429, 500, 502, 503, 504, 529})
+
+# Exception classes (matched by name, so no provider SDK is imported here) raised when the
+# connection failed or timed out before the provider answered
+RETRYABLE_ERROR_NAMES = frozenset({
+    'ConnectionError', 'TimeoutError',
+    'APIConnectionError', 'APITimeoutError',          # openai, anthropic
+    'TransportError',                                 # httpx, base of ConnectError, ReadTimeout, ...
+    'ServiceUnavailable', 'DeadlineExceeded',         # google.api_core
+})
+
+
+def status_code(error):
+    """
+    Get the HTTP status of a provider error
+
+    Args:
+        error (Exception): Error raised by a provider SDK
+
+    Returns:
+        int or None: The status, or None if the error carries none
+    """
+    for attribute in ('status_code', 'status', 'code'):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    response = getattr(error, 'response', None)
+    value = getattr(response, 'status_code', None)
+    return value if isinstance(value, int) else None
+
+
+def retry_after(error):
+    """
+    Get the delay the provider asked for before the next attempt
+
+    Args:
+        error (Exception): Error raised by a provider SDK
+
+    Returns:
+        float or None: Seconds to wait, or None if the error has no Retry-After header
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('retry-after-ms')
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    """
+    Check whether a failed provider call may succeed if sent again
+
+    Args:
+        error (Exception): Error raised by a provider SDK
+
+    Returns:
+        bool: True for connection failures, timeouts, rate limits and server errors
+    """
+    status = status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class RetryPolicy:
+    """
+    Retries of transient provider failures, with jittered exponential backoff.
+
+    A failed attempt is retried if the error is transient (see is_retryable), after the delay
+    the provider asked for in Retry-After or else a random delay of up to base_delay * 2**attempt
+    ("full jitter", so clients throttled together don't retry together). Completions have no side
+    effects, so sending one again is safe. A stream is only retried before its first chunk: once
+    text has reached the caller, the error is raised instead of starting the response over.
+
+    Model clients use it around their raw calls:
+
+        response = self.retry.call(lambda: self._complete(prompt))
+        for chunk in self.retry.stream(lambda: self._stream_chunks(prompt)):
+            ...
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=30.0, max_retry_after=60.0):
+        """
+        Initialize the retry policy
+
+        Args:
+            max_attempts (int): Attempts per call, the first one included; 1 disables retries (default is 3)
+            base_delay (float): Backoff of the first retry in seconds, doubled on each retry (default is 1)
+            max_delay (float): Upper bound of the backoff in seconds (default is 30)
+            max_retry_after (float): Longest Retry-After honored in seconds, a provider asking for more
+                                     gets the error returned right away (default is 60)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        # Retries made with this policy, counted under the lock as one policy is shared by every client
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def delay(self, attempt, error):
+        """
+        Get how long to wait before retrying a failed attempt
+
+        Args:
+            attempt (int): Number of the failed attempt, 0 for the first one
+            error (Exception): The error of the attempt
+
+        Returns:
+            float or None: Seconds to wait, or None if the call must not be retried
+        """
+        if attempt + 1 >= self.max_attempts or not is_retryable(error):
+            return None
+        requested = retry_after(error)
+        if requested is not None:
+            return requested if requested <= self.max_retry_after else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _next_delay(self, attempt, error):
+        delay = self.delay(attempt, error)
+        if delay is not None:
+            with self._lock:
+                self.retries += 1
+        return delay
+
+    def call(self, function):
+        """
+        Call a function, retrying it on transient errors
+
+        Args:
+            function (callable): Sends one request and returns its result
+
+        Returns:
+            object: The result of the first successful attempt
+
+        Raises:
+            Exception: The error of the last attempt if none succeeded
+        """
+        attempt = 0
+        while True:
+            try:
+                return function()
+            except Exception as e:
+                delay = self._next_delay(attempt, e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, function):
+        """
+        Await a coroutine function, retrying it on transient errors
+
+        Args:
+            function (callable): Returns a coroutine sending one request
+
+        Returns:
+            object: The result of the first successful attempt
+
+        Raises:
+            Exception: The error of the last attempt if none succeeded
+        """
+        attempt = 0
+        while True:
+            try:
+                return await function()
+            except Exception as e:
+                delay = self._next_delay(attempt, e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stream(self, start_attempt):
+        """
+        Stream a response, starting over on transient errors raised before the first chunk
+
+        Args:
+            start_attempt (callable): Starts one attempt and returns an iterator over its text chunks.
+                                      Closing the iterator must abandon the attempt.
+
+        Yields:
+            str: Text chunks of the response
+
+        Raises:
+            Exception: The error of the last attempt, or of a stream that failed after its first chunk
+        """
+        attempt = 0
+        while True:
+            chunks = None
+            started = False
+            try:
+                chunks = start_attempt()
+                for chunk in chunks:
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                delay = None if started else self._next_delay(attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                close = getattr(chunks, 'close', None)
+                if close:
+                    close()
+            time.sleep(delay)
+            attempt += 1
+
+    async def astream(self, start_attempt):
+        """
+        Stream a response from the event loop, starting over on transient errors raised before the first chunk
+
+        Args:
+            start_attempt (callable): Starts one attempt and returns an async iterator over its text chunks
+
+        Yields:
+            str: Text chunks of the response
+
+        Raises:
+            Exception: The error of the last attempt, or of a stream that failed after its first chunk
+        """
+        attempt = 0
+        while True:
+            chunks = None
+            started = False
+            try:
+                chunks = start_attempt()
+                async for chunk in chunks:
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                delay = None if started else self._next_delay(attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                aclose = getattr(chunks, 'aclose', None)
+                if aclose:
+                    await aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# Policy of clients created without one
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -0,0 +1,147 @@
+import threading
+import time
+
+# Returned by a load that failed, the cached value (if any) being kept
+_MISSING = object()
+
+
+class SettingsCache:
+    """
+    In-process cache of the system settings stored in the database.
+
+    Settings are read on every request (round caps, response lengths, rate limits), so each one
+    is loaded once and kept for ttl seconds instead of costing a database query per read. Writes
+    through update bump the cache's version, which invalidates every cached setting right away;
+    settings edited directly in the database are picked up once their ttl expires.
+
+    watch registers a callback applying a setting (e.g. reconfiguring the rate limiters), called
+    with its current value and again whenever a reload finds it changed. refresh reloads the
+    expired watched settings, so calling it once per request keeps them current without a restart.
+    Watchers registered with load=False are first applied by that refresh, so registering them
+    at import time doesn't wait on the database.
+    """
+
+    def __init__(self, database, ttl=30.0, clock=time.monotonic):
+        """
+        Initialize the cache, nothing is loaded yet
+
+        Args:
+            database (Database): Store of the settings, with get_setting and update_setting
+            ttl (float): Seconds a loaded setting is used before being read again (default is 30)
+            clock (callable): Monotonic clock in seconds, for tests (default is time.monotonic)
+        """
+        self.database = database
+        self.ttl = ttl
+        self._clock = clock
+        # Bumped by every invalidation, settings loaded at an older version are stale
+        self.version = 0
+        # Key -> (value, time loaded, version loaded)
+        self._values = {}
+        self._watchers = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, key, now):
+        # Called with the lock held
+        cached = self._values.get(key)
+        return cached is not None and now - cached[1] < self.ttl and cached[2] == self.version
+
+    def _load(self, key):
+        try:
+            return self.database.get_setting(key)
+        except Exception as e:
+            print(f"Warning: Could not load setting '{key}': {e}")
+            return _MISSING
+
+    def get(self, key, default=None):
+        """
+        Get a setting, from the cache if it was loaded less than ttl seconds ago
+
+        If the database can't be read, the last value loaded is used.
+
+        Args:
+            key (str): Name of the setting
+            default (object, optional): Value returned if the setting is not set
+
+        Returns:
+            object: The setting's value, or default
+        """
+        now = self._clock()
+        with self._lock:
+            if self._fresh(key, now):
+                value = self._values[key][0]
+                return default if value is None else value
+            version = self.version
+        value = self._load(key)
+        with self._lock:
+            previous = self._values.get(key)
+            if value is _MISSING:
+                value = previous[0] if previous is not None else None
+            changed = previous is None or previous[0] != value
+            self._values[key] = (value, now, version)
+            callbacks = list(self._watchers.get(key, ())) if changed else []
+        for callback in callbacks:
+            self._notify(key, callback, value)
+        return default if value is None else value
+
+    def _notify(self, key, callback, value):
+        try:
+            callback(value)
+        except Exception as e:
+            print(f"Warning: Could not apply setting '{key}': {e}")
+
+    def watch(self, key, callback, load=True):
+        """
+        Apply a setting now and every time it changes
+
+        Args:
+            key (str): Name of the setting
+            callback (callable): Called with the setting's value (None if not set)
+            load (bool): If False, a setting that isn't cached yet is not read from the database
+                         now; the callback is first called when the next get or refresh loads it
+                         (default is True)
+        """
+        if load:
+            value = self.get(key)
+        with self._lock:
+            self._watchers.setdefault(key, []).append(callback)
+            if not load:
+                cached = self._values.get(key)
+                if cached is None:
+                    return
+                value = cached[0]
+        self._notify(key, callback, value)
+
+    def refresh(self):
+        """
+        Reload the watched settings whose cached value expired, notifying their watchers of changes
+        """
+        with self._lock:
+            keys = list(self._watchers)
+        for key in keys:
+            self.get(key)
+
+    def invalidate(self, key=None):
+        """
+        Drop cached settings so the next read loads them from the database
+
+        Args:
+            key (str, optional): Setting to drop. If None, every setting is dropped.
+        """
+        with self._lock:
+            if key is None:
+                self.version += 1
+            else:
+                self._values.pop(key, None)
+
+    def update(self, key, value, description=None):
+        """
+        Store a setting and apply it to its watchers right away
+
+        Args:
+            key (str): Name of the setting
+            value (object): New value
+            description (str, optional): Description of the setting
+        """
+        self.database.update_setting(key, value, description)
+        self.invalidate()
+        self.get(key)
@@ -0,0 +1,204 @@
+import hashlib
+import re
+import threading
+import time
+
+# Largest 61-bit prime (2^61 - 1), modulus of the MinHash permutations
+_PRIME = (1 << 61) - 1
+_NON_WORD = re.compile(r'[^\w\s]+')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_topic(text):
+    """
+    Normalize a topic for comparison: lowercase, no punctuation, single spaces
+
+    Args:
+        text (str): Topic as entered by the user
+
+    Returns:
+        str: Normalized topic
+    """
+    text = _NON_WORD.sub(' ', text.lower().replace("'", ''))
+    return _SPACES.sub(' ', text).strip()
+
+
+def shingles(text, size=4):
+    """
+    Get the character shingles of a normalized text
+
+    Args:
+        text (str): Normalized text
+        size (int): Shingle length in characters (default is 4)
+
+    Returns:
+        set: Every substring of the given length, or the text itself if it is shorter
+    """
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _stable_hash(value):
+    # Python's hash() is salted per process, MinHash signatures must be comparable across restarts
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class TopicIndex:
+    """
+    Index of discussion topics for finding near-duplicates of a new topic.
+
+    Topics are normalized and shingled, each shingle set is reduced to a MinHash signature, and
+    signatures are split into bands for locality-sensitive hashing: a lookup only compares the
+    topics sharing at least one band with the query, so its cost does not grow with the index.
+    The similarity reported is the MinHash estimate of the Jaccard similarity of the shingle sets.
+    """
+
+    def __init__(self, threshold=0.7, num_perm=64, bands=16, shingle_size=4, max_age=None, max_entries=10000):
+        """
+        Initialize the index
+
+        Args:
+            threshold (float): Minimum estimated similarity for a topic to be a near-duplicate (default is 0.7)
+            num_perm (int): Number of MinHash permutations (default is 64)
+            bands (int): Number of LSH bands, must divide num_perm (default is 16)
+            shingle_size (int): Shingle length in characters (default is 4)
+            max_age (float, optional): Seconds after which a topic is no longer matched. If None, topics never age out.
+            max_entries (int): Maximum number of topics kept, the oldest are dropped first (default is 10000)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_age = max_age
+        self.max_entries = max_entries
+        # Fixed permutations so signatures stay comparable across processes
+        seeds = [_stable_hash(f"minhash-{i}") for i in range(2 * num_perm)]
+        self._permutations = [(seeds[2 * i] % (_PRIME - 1) + 1, seeds[2 * i + 1] % _PRIME)
+                              for i in range(num_perm)]
+        self._entries = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def signature(self, text):
+        """
+        Compute the MinHash signature of a topic
+
+        Args:
+            text (str): Topic as entered by the user
+
+        Returns:
+            tuple: num_perm minimum hash values
+        """
+        hashes = [_stable_hash(shingle) for shingle in shingles(normalize_topic(text), self.shingle_size)]
+        if not hashes:
+            return tuple([_PRIME] * self.num_perm)
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._permutations)
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows] for band in range(self.bands)]
+
+    def similarity(self, signature, other):
+        """
+        Estimate the Jaccard similarity of two topics from their signatures
+
+        Args:
+            signature (tuple): Signature of the first topic
+            other (tuple): Signature of the second topic
+
+        Returns:
+            float: Fraction of matching signature values, between 0 and 1
+        """
+        return sum(1 for x, y in zip(signature, other) if x == y) / self.num_perm
+
+    def add(self, doc_id, text, timestamp=None):
+        """
+        Index a topic
+
+        Args:
+            doc_id (str): Identifier returned by lookups, e.g. the discussion id
+            text (str): The topic
+            timestamp (float, optional): Creation time as a Unix timestamp. If None, now is used.
+        """
+        signature = self.signature(text)
+        with self._lock:
+            if doc_id in self._entries:
+                self._remove(doc_id)
+            self._entries[doc_id] = (signature, time.time() if timestamp is None else timestamp, text)
+            for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+                bucket.setdefault(band_key, set()).add(doc_id)
+            if len(self._entries) > self.max_entries:
+                oldest = min(self._entries, key=lambda key: self._entries[key][1])
+                self._remove(oldest)
+
+    def remove(self, doc_id):
+        """
+        Drop a topic from the index
+
+        Args:
+            doc_id (str): Identifier the topic was added with
+        """
+        with self._lock:
+            if doc_id in self._entries:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        # Called with the lock held
+        signature, _, _ = self._entries.pop(doc_id)
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            doc_ids = bucket.get(band_key)
+            if doc_ids is not None:
+                doc_ids.discard(doc_id)
+                if not doc_ids:
+                    del bucket[band_key]
+
+    def find(self, text, threshold=None, now=None):
+        """
+        Find the indexed topics that are near-duplicates of a topic
+
+        Args:
+            text (str): The new topic
+            threshold (float, optional): Minimum similarity. If None, self.threshold is used.
+            now (float, optional): Current Unix timestamp, used with max_age. If None, the clock is read.
+
+        Returns:
+            list: (doc_id, similarity) pairs, most similar first
+        """
+        threshold = self.threshold if threshold is None else threshold
+        now = time.time() if now is None else now
+        signature = self.signature(text)
+        with self._lock:
+            candidates = set()
+            for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+                candidates |= bucket.get(band_key, set())
+            matches = []
+            for doc_id in candidates:
+                other, timestamp, _ = self._entries[doc_id]
+                if self.max_age is not None and now - timestamp > self.max_age:
+                    continue
+                score = self.similarity(signature, other)
+                if score >= threshold:
+                    matches.append((doc_id, score, timestamp))
+        # Most similar first, most recent first among equals
+        matches.sort(key=lambda match: (match[1], match[2]), reverse=True)
+        return [(doc_id, score) for doc_id, score, _ in matches]
+
+    def best_match(self, text, threshold=None):
+        """
+        Get the indexed topic most similar to a topic
+
+        Args:
+            text (str): The new topic
+            threshold (float, optional): Minimum similarity. If None, self.threshold is used.
+
+        Returns:
+            tuple or None: (doc_id, similarity) of the best near-duplicate, or None if there is none
+        """
+        matches = self.find(text, threshold)
+        return matches[0] if matches else None
+
+    def __len__(self):
+        return len(self._entries)
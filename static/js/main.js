@@ -141,6 +141,7 @@ class CouncilMembersUI {
             const defaultPromptsData = await defaultPromptsRes.json();
 
             const models = modelsData.models || []; // ['ChatGPT', 'Claude', ...]
+            const health = modelsData.health || {}; // { 'ChatGPT': { available: true, state: 'closed', ... }, ... }
             const currentPrompts = currentPromptsData.prompts || {}; // { 'ChatGPT': 'current prompt', ... }
             this.defaultPrompts = defaultPromptsData.defaults || {}; // Store defaults { 'ChatGPT': 'default prompt', ... }
 
@@ -169,6 +170,8 @@ class CouncilMembersUI {
                     systemPrompt: currentPrompts[modelId] !== undefined ? currentPrompts[modelId] : this.defaultPrompts[modelId],
                     isActive: state.isActive !== undefined ? state.isActive : true, // Default to active if no saved state
                     order: state.order !== undefined ? state.order : index, // Use saved order or default index
+                    // Unavailable while the provider's circuit breaker is open
+                    available: health[modelId] ? health[modelId].available : true,
                     // sprite: TBD - assign based on name or get from API
                 };
             });
@@ -239,6 +242,11 @@ class CouncilMembersUI {
             statusIndicator.title = 'Inactive';
         }
 
+        if (member.available === false) {
+            card.classList.add('unavailable');
+            statusIndicator.title += ' (provider unavailable)';
+        }
+
         return card;
     }
 
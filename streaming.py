@@ -0,0 +1,195 @@
+import json
+import queue
+import threading
+import time
+
+# Marks the end of a CoalescedStream's worker
+_DONE = object()
+# Wakes a CoalescedStream up to arm the flush timer of a new buffer
+_WAKE = object()
+
+
+class StreamClosed(Exception):
+    """
+    Raised in a round's stream callback once nobody is listening to the stream anymore
+    """
+
+
+def sse_event(event, data):
+    """
+    Format one Server-Sent Events frame
+
+    Args:
+        event (str): Name of the event, e.g. 'model_update'
+        data (dict): Payload of the event, sent as JSON
+
+    Returns:
+        str: The frame, ending with the blank line that dispatches it
+    """
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+class ChunkCoalescer:
+    """
+    Stream callback that merges each model's tokens into larger chunks.
+
+    Providers call back once per token, a few characters each. Every chunk becomes a JSON payload,
+    a write and a browser event downstream, so the coalescer buffers each model's chunks in a list
+    and passes them on joined, once max_chars characters are buffered or the oldest buffered chunk
+    is max_delay seconds old. Start and completion events pass through in order; a completion first
+    flushes what is left of the model's response.
+
+    It is a drop-in callback(model_name, chunk, is_complete) wrapping another one. Buffers are
+    flushed when chunks arrive; a caller that wants stale buffers flushed while a model is quiet
+    calls flush_due, at the latest after due() seconds; on_buffer tells it when a new buffer starts.
+    """
+
+    def __init__(self, emit, max_chars=256, max_delay=0.02, on_buffer=None, clock=time.monotonic):
+        """
+        Initialize the coalescer
+
+        Args:
+            emit (callable): Callback receiving the coalesced events, emit(model_name, chunk, is_complete)
+            max_chars (int): Buffered characters that trigger a flush (default is 256)
+            max_delay (float): Seconds a chunk may wait in the buffer (default is 0.02)
+            on_buffer (callable, optional): Called with no arguments when a model's buffer starts filling
+            clock (callable): Monotonic clock in seconds, for tests (default is time.monotonic)
+        """
+        self.emit = emit
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self.on_buffer = on_buffer
+        self._clock = clock
+        # Model name -> (chunks, buffered characters, time of the oldest chunk)
+        self._buffers = {}
+        self.chunks_in = 0
+        self.chunks_out = 0
+        # Emitting under the lock keeps each model's events in order across threads
+        self._lock = threading.Lock()
+
+    def __call__(self, model_name, chunk, is_complete):
+        with self._lock:
+            if is_complete:
+                self._flush(model_name)
+                self.emit(model_name, chunk, True)
+                return
+            if not chunk:
+                # Start of a response
+                self.emit(model_name, chunk, False)
+                return
+            self.chunks_in += 1
+            now = self._clock()
+            buffered = self._buffers.get(model_name)
+            parts, size, oldest = buffered or ([], 0, now)
+            parts.append(chunk)
+            size += len(chunk)
+            self._buffers[model_name] = (parts, size, oldest)
+            if size >= self.max_chars or now - oldest >= self.max_delay:
+                self._flush(model_name)
+            elif buffered is None and self.on_buffer:
+                self.on_buffer()
+
+    def _flush(self, model_name):
+        # Called with the lock held
+        buffered = self._buffers.pop(model_name, None)
+        if buffered:
+            self.chunks_out += 1
+            self.emit(model_name, ''.join(buffered[0]), False)
+
+    def due(self):
+        """
+        Get how long until the oldest buffered chunk must be flushed
+
+        Returns:
+            float or None: Seconds until flush_due has something to flush, None if nothing is buffered
+        """
+        with self._lock:
+            if not self._buffers:
+                return None
+            oldest = min(buffered[2] for buffered in self._buffers.values())
+            return max(0.0, oldest + self.max_delay - self._clock())
+
+    def flush_due(self):
+        """
+        Flush the buffers whose oldest chunk has waited max_delay seconds
+        """
+        with self._lock:
+            now = self._clock()
+            for model_name in [name for name, buffered in self._buffers.items()
+                               if now - buffered[2] >= self.max_delay]:
+                self._flush(model_name)
+
+    def flush(self):
+        """
+        Flush every buffer, e.g. when the stream ends without completion events
+        """
+        with self._lock:
+            for model_name in list(self._buffers):
+                self._flush(model_name)
+
+
+class CoalescedStream:
+    """
+    Iterate over the coalesced events of a streaming round running in a background thread.
+
+    run is called with a stream callback, e.g. lambda callback: council.stream_discussion(topic,
+    callback=callback), on a worker thread. Iterating yields the round's (model_name, chunk,
+    is_complete) events with chunks merged by a ChunkCoalescer, flushing a quiet model's buffer
+    after max_delay seconds. Once iteration ends, result holds what run returned; an exception
+    raised by run is raised by the iteration. Closing the iteration early (e.g. the client
+    disconnected) makes the callback raise StreamClosed, which cancels the round.
+    """
+
+    def __init__(self, run, max_chars=256, max_delay=0.02):
+        """
+        Initialize the stream
+
+        Args:
+            run (callable): Function running the round, called with the stream callback
+            max_chars (int): Buffered characters that trigger a flush (default is 256)
+            max_delay (float): Seconds a chunk may wait in the buffer (default is 0.02)
+        """
+        self._run = run
+        self._events = queue.Queue()
+        self.coalescer = ChunkCoalescer(self._put, max_chars=max_chars, max_delay=max_delay,
+                                        on_buffer=lambda: self._events.put(_WAKE))
+        self._closed = threading.Event()
+        self._error = None
+        self.result = None
+
+    def _put(self, model_name, chunk, is_complete):
+        self._events.put((model_name, chunk, is_complete))
+
+    def _callback(self, model_name, chunk, is_complete):
+        if self._closed.is_set():
+            raise StreamClosed(model_name)
+        self.coalescer(model_name, chunk, is_complete)
+
+    def _work(self):
+        try:
+            self.result = self._run(self._callback)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self.coalescer.flush()
+            self._events.put(_DONE)
+
+    def __iter__(self):
+        worker = threading.Thread(target=self._work, name="ai-council-stream", daemon=True)
+        worker.start()
+        try:
+            while True:
+                try:
+                    event = self._events.get(timeout=self.coalescer.due())
+                except queue.Empty:
+                    self.coalescer.flush_due()
+                    continue
+                if event is _DONE:
+                    break
+                if event is _WAKE:
+                    continue
+                yield event
+        finally:
+            self._closed.set()
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,91 @@
+import unittest
+import asyncio
+import threading
+from adaptive_concurrency import AdaptiveConcurrencyLimit, is_overload_error
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+OVERLOADED = "Error getting response from Claude: Error code: 529 - {'type': 'overloaded_error'}"
+
+
+class TestAdaptiveConcurrencyLimit(unittest.TestCase):
+    def test_overload_errors_are_recognized(self):
+        self.assertTrue(is_overload_error(OVERLOADED))
+        self.assertTrue(is_overload_error("Error getting response from Llama: 429 Too Many Requests"))
+        self.assertFalse(is_overload_error("Error getting response from Llama: invalid API key"))
+        self.assertFalse(is_overload_error("A 429 page is a rate limit"))
+
+    def test_limit_grows_while_saturated_and_healthy(self):
+        clock = FakeClock()
+        limit = AdaptiveConcurrencyLimit(initial=2, maximum=3, clock=clock)
+        for _ in range(4):
+            started = [limit.acquire() for _ in range(int(limit.limit))]
+            clock.now += 1
+            for start in started:
+                limit.release(start, "answer")
+        self.assertEqual(limit.stats()['limit'], 3)
+
+    def test_burst_of_overload_errors_backs_off_once(self):
+        clock = FakeClock()
+        limit = AdaptiveConcurrencyLimit(initial=8, clock=clock)
+        started = [limit.acquire() for _ in range(8)]
+        clock.now += 1
+        for start in started:
+            limit.release(start, OVERLOADED)
+        self.assertEqual(limit.stats()['limit'], 4)
+        # A request sent after the backoff that is throttled too backs off again
+        start = limit.acquire()
+        clock.now += 1
+        limit.release(start, OVERLOADED)
+        self.assertEqual(limit.stats()['limit'], 2)
+
+    def test_latency_spike_backs_off_and_other_errors_do_not(self):
+        clock = FakeClock()
+        limit = AdaptiveConcurrencyLimit(initial=4, min_samples=3, clock=clock)
+        for _ in range(3):
+            start = limit.acquire()
+            clock.now += 1
+            limit.release(start, "answer")
+        start = limit.acquire()
+        clock.now += 1
+        limit.release(start, "Error getting response from Grok: invalid request")
+        self.assertEqual(limit.stats()['limit'], 4)
+        start = limit.acquire()
+        clock.now += 10
+        limit.release(start, "answer")
+        self.assertEqual(limit.stats()['limit'], 2)
+
+    def test_waiters_get_released_slots(self):
+        limit = AdaptiveConcurrencyLimit(initial=1)
+        started = limit.acquire()
+        acquired = threading.Event()
+
+        def wait_for_slot():
+            limit.acquire()
+            acquired.set()
+
+        threading.Thread(target=wait_for_slot, daemon=True).start()
+        self.assertFalse(acquired.wait(0.05))
+
+        async def wait_async():
+            task = asyncio.ensure_future(limit.acquire_async())
+            await asyncio.sleep(0.05)
+            self.assertFalse(task.done())
+            limit.release(started, None)
+            await asyncio.sleep(0.05)
+            # The slot went to either waiter, the other one is still waiting
+            self.assertTrue(task.done() != acquired.is_set())
+            task.cancel()
+
+        asyncio.run(wait_async())
+
+
+if __name__ == '__main__':
+    unittest.main()
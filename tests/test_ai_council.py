@@ -0,0 +1,478 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import threading
+import time
+import ai_council
+from ai_council import AICouncil, AsyncAICouncil
+from discussion_context import ContextCompactor
+from rate_limiter import RateLimiterRegistry, TokenBucket, DEFAULT_OUTPUT_TOKENS
+from provider import Provider, STREAMING
+from adaptive_concurrency import AdaptiveConcurrencyLimit
+from circuit_breaker import CircuitBreakerRegistry
+from metrics import CouncilMetrics
+
+
+class FakeModel:
+    """Stand-in for a provider client that answers after a fixed delay"""
+    delay = 0.2
+
+    def __init__(self, system_prompt=None):
+        self.system_prompt = system_prompt
+        self.prompts = []
+        self.system_prompts = []
+
+    def get_response(self, prompt, system_prompt=None):
+        self.prompts.append(prompt)
+        self.system_prompts.append(system_prompt)
+        time.sleep(self.delay)
+        return f"{type(self).__name__} answer"
+
+    def get_streaming_response(self, prompt, callback=None, system_prompt=None):
+        self.prompts.append(prompt)
+        self.system_prompts.append(system_prompt)
+        chunks = [f"{type(self).__name__} ", "answer"]
+        for chunk in chunks:
+            time.sleep(self.delay / len(chunks))
+            if callback:
+                callback(chunk)
+        return "".join(chunks)
+
+
+class Alpha(FakeModel):
+    pass
+
+
+class Beta(FakeModel):
+    pass
+
+
+class Gamma(FakeModel):
+    delay = 0.05
+
+
+FAKE_MODEL_CLASSES = {'Alpha': Alpha, 'Beta': Beta, 'Gamma': Gamma}
+
+
+class NonStreaming:
+    """Client without a streaming API"""
+
+    def __init__(self, system_prompt=None):
+        self.system_prompt = system_prompt
+
+    def get_response(self, prompt, system_prompt=None):
+        return "NonStreaming answer"
+
+
+class SlowStreamingProvider(Provider):
+    """Provider streaming a word every 50ms"""
+    name = "Slow"
+    capabilities = frozenset({STREAMING})
+
+    def _complete(self, prompt, system_prompt=None):
+        return "word " * 20
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        for _ in range(20):
+            time.sleep(0.05)
+            yield "word "
+
+
+class AsyncFakeModel(FakeModel):
+    """Asyncio stand-in for a provider client"""
+
+    async def get_response(self, prompt, system_prompt=None):
+        self.prompts.append(prompt)
+        self.system_prompts.append(system_prompt)
+        await asyncio.sleep(self.delay)
+        return f"{type(self).__name__} answer"
+
+    async def get_streaming_response(self, prompt, callback=None, system_prompt=None):
+        self.prompts.append(prompt)
+        self.system_prompts.append(system_prompt)
+        chunks = [f"{type(self).__name__} ", "answer"]
+        for chunk in chunks:
+            await asyncio.sleep(self.delay / len(chunks))
+            if callback:
+                callback(chunk)
+        return "".join(chunks)
+
+
+class AsyncAlpha(AsyncFakeModel):
+    pass
+
+
+class AsyncBeta(AsyncFakeModel):
+    delay = 0.05
+
+
+FAKE_ASYNC_MODEL_CLASSES = {'Alpha': AsyncAlpha, 'Beta': AsyncBeta}
+
+
+class TestAICouncil(unittest.TestCase):
+    def setUp(self):
+        """Swap the real provider clients for fakes"""
+        patcher = patch.dict(ai_council.MODEL_CLASSES, FAKE_MODEL_CLASSES, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sequential_round_keeps_model_order(self):
+        """Test that a sequential round answers every model in order"""
+        council = AICouncil(system_prompts='You are a test model')
+        round_responses = council.discuss_topic('Test Topic')[0]
+        self.assertEqual(list(round_responses), ['Alpha', 'Beta', 'Gamma'])
+        self.assertEqual(round_responses['Beta'], 'Beta answer')
+
+    def test_concurrent_round_runs_models_at_once(self):
+        """Test that a concurrent round costs the slowest model, not the sum"""
+        council = AICouncil(system_prompts='You are a test model', concurrent=True)
+        start = time.perf_counter()
+        discussion = council.discuss_topic('Test Topic', rounds=2)
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 2 * (Alpha.delay + Beta.delay))
+        # Gamma finishes first but results stay in model order
+        self.assertEqual(list(discussion[1]), ['Alpha', 'Beta', 'Gamma'])
+
+    def test_max_workers_bounds_concurrency(self):
+        """Test that max_workers limits the number of simultaneous requests"""
+        council = AICouncil(system_prompts='You are a test model', concurrent=True)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def get_response(prompt, system_prompt=None):
+            with lock:
+                active.append(prompt)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return 'answer'
+
+        for model in council.models.values():
+            model.get_response = get_response
+        council.continue_discussion([], max_workers=2)
+        self.assertEqual(max(peak), 2)
+
+    def test_provider_limits_are_shared_across_discussions(self):
+        """Test that provider_limits bounds a model's requests across concurrent discussions"""
+        council = AICouncil(system_prompts='You are a test model', concurrent=True, provider_limits={'Alpha': 1})
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def get_response(prompt, system_prompt=None):
+            with lock:
+                active.append(prompt)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return 'answer'
+
+        council.models['Alpha'].get_response = get_response
+        threads = [threading.Thread(target=council.discuss_topic, args=(f'Topic {i}',)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(peak), 3)
+        self.assertEqual(max(peak), 1)
+
+    def test_rate_limits_pace_requests(self):
+        """Test that a rate limited model's requests are spaced out instead of sent at once"""
+        rate_limiters = RateLimiterRegistry({'Alpha': {'requests_per_minute': 1200}})
+        rate_limiters.get('Alpha').requests = TokenBucket(1200, burst=1)
+        council = AICouncil(system_prompts='You are a test model', rate_limiters=rate_limiters)
+        started = []
+        council.models['Alpha'].get_response = lambda prompt, system_prompt=None: started.append(time.monotonic())
+        threads = [threading.Thread(target=council._ask, args=('Alpha', f'Prompt {i}')) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # One request every 50ms after the first
+        self.assertGreaterEqual(max(started) - min(started), 0.14)
+
+    def test_cancelled_turns_give_back_their_reserved_tokens(self):
+        """Test that a streamed turn stopped at its timeout settles its rate limit reservation"""
+        rate_limiters = RateLimiterRegistry({'Alpha': {'tokens_per_minute': 100000}})
+        bucket = rate_limiters.get('Alpha').tokens = TokenBucket(0.001, burst=100000)
+        council = AICouncil(system_prompts='You are a test model', concurrent=True, model_timeout=0.1,
+                            rate_limiters=rate_limiters)
+        council.models['Alpha'] = SlowStreamingProvider()
+        round_responses = council.continue_discussion([], active_models=['Alpha', 'Gamma'])
+        self.assertIn('timed out', round_responses['Alpha'])
+        # The cancelled stream stops at its next chunk
+        deadline = time.monotonic() + 1
+        while bucket._tokens < bucket.capacity - DEFAULT_OUTPUT_TOKENS and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Only the prompt is still counted
+        self.assertGreater(bucket._tokens, bucket.capacity - DEFAULT_OUTPUT_TOKENS)
+
+    def test_max_output_tokens_applies_to_each_model(self):
+        """Test that response length bounds reach the clients that support them"""
+        council = AICouncil(system_prompts='You are a test model')
+        for model in council.models.values():
+            model.set_max_output_tokens = lambda limit, model=model: setattr(model, 'max_output_tokens', limit)
+        council.set_max_output_tokens({'Alpha': 300})
+        self.assertEqual(council.models['Alpha'].max_output_tokens, 300)
+        self.assertIsNone(council.models['Beta'].max_output_tokens)
+        council.set_max_output_tokens(500)
+        self.assertEqual({model.max_output_tokens for model in council.models.values()}, {500})
+
+    def test_adaptive_concurrency_backs_off_on_overload(self):
+        """Test that throttled requests lower the model's adaptive concurrency limit"""
+        limit = AdaptiveConcurrencyLimit(initial=4)
+        council = AICouncil(system_prompts='You are a test model', adaptive_concurrency={'Alpha': limit})
+        council.models['Alpha'].get_response = \
+            lambda prompt, system_prompt=None: "Error getting response from Alpha: 429 Too Many Requests"
+        council._ask('Alpha', 'Prompt')
+        self.assertEqual(limit.stats(), {'limit': 2, 'in_flight': 0, 'latency': None, 'decreases': 1})
+
+    def test_open_circuit_fails_fast(self):
+        """Test that a provider that keeps failing stops holding up rounds"""
+        council = AICouncil(system_prompts='You are a test model', concurrent=True,
+                            circuit_breakers=CircuitBreakerRegistry(failure_threshold=2))
+        calls = []
+
+        def failing(prompt, system_prompt=None):
+            calls.append(prompt)
+            time.sleep(0.2)
+            return "Error getting response from Alpha: connection refused"
+        council.models['Alpha'].get_response = failing
+        for _ in range(2):
+            council.continue_discussion([])
+        self.assertFalse(council.health()['Alpha']['available'])
+
+        start = time.perf_counter()
+        round_responses = council.continue_discussion([])
+        self.assertLess(time.perf_counter() - start, Beta.delay + 0.1)
+        self.assertIn('provider unavailable', round_responses['Alpha'])
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(council.health()['Beta']['available'])
+
+    def test_turns_and_discussions_are_recorded_in_metrics(self):
+        """Test that every turn, answered or timed out, is observed and the discussion counted while it runs"""
+        metrics = CouncilMetrics()
+        council = AICouncil(system_prompts='You are a test model', concurrent=True, model_timeout=0.1,
+                            metrics=metrics)
+        in_flight = []
+
+        def slow(prompt, callback=None, system_prompt=None):
+            in_flight.append(metrics.discussions_in_flight.value())
+            time.sleep(0.3)
+            return "Alpha answer"
+        council.models['Alpha'].get_streaming_response = slow
+        council.continue_discussion([], active_models=['Alpha', 'Gamma'])
+        self.assertEqual(in_flight, [1])
+        self.assertEqual(metrics.discussions_in_flight.value(), 0)
+        self.assertEqual(metrics.latency.count(model='Gamma', status='ok'), 1)
+        self.assertEqual(metrics.tokens.count(model='Gamma', direction='output'), 1)
+        self.assertEqual(metrics.errors.value(model='Alpha', status='timeout', error_class='TimeoutError'), 1)
+
+    def test_concurrent_stream_continue_discussion(self):
+        """Test that concurrent streaming reports start, chunks and completion for every model"""
+        council = AICouncil(system_prompts='You are a test model')
+        events = []
+        round_responses = council.stream_continue_discussion(
+            [{'Alpha': 'First thought'}],
+            active_models=['Gamma', 'Alpha'],
+            callback=lambda model_name, chunk, is_complete: events.append((model_name, chunk, is_complete)),
+            concurrent=True
+        )
+        self.assertEqual(list(round_responses), ['Gamma', 'Alpha'])
+        self.assertEqual(round_responses['Alpha'], 'Alpha answer')
+        for model_name in ('Gamma', 'Alpha'):
+            model_events = [event for event in events if event[0] == model_name]
+            self.assertEqual(model_events[0], (model_name, '', False))
+            self.assertEqual(model_events[-1], (model_name, '', True))
+            self.assertEqual(''.join(chunk for _, chunk, _ in model_events), f'{model_name} answer')
+
+
+    def test_concurrent_stream_discussion_merges_chunks(self):
+        """Test that every model's first chunk arrives without waiting on the models before it"""
+        council = AICouncil(system_prompts='You are a test model', concurrent=True)
+        first_chunk_at = {}
+        callback_threads = set()
+        start = time.perf_counter()
+
+        def callback(model_name, chunk, is_complete):
+            callback_threads.add(threading.get_ident())
+            if chunk and model_name not in first_chunk_at:
+                first_chunk_at[model_name] = time.perf_counter() - start
+
+        discussion = council.stream_discussion('Test Topic', callback=callback)
+        self.assertEqual(list(discussion[0]), ['Alpha', 'Beta', 'Gamma'])
+        self.assertEqual(discussion[0]['Gamma'], 'Gamma answer')
+        # Gamma streams last in model order but its first token comes first
+        self.assertLess(first_chunk_at['Gamma'], first_chunk_at['Alpha'])
+        self.assertLess(first_chunk_at['Beta'], Alpha.delay)
+        # Callbacks are dispatched from the calling thread only
+        self.assertEqual(callback_threads, {threading.get_ident()})
+
+    def test_compacted_rounds_are_summarized_once(self):
+        """Test that each older round is summarized once and reused by later rounds"""
+        compactor = ContextCompactor(keep_recent_rounds=1, default_token_budget=45)
+        council = AICouncil(system_prompts='You are a test model', context_compactor=compactor, summary_model='Gamma')
+        for model in council.models.values():
+            model.delay = 0
+        # Give every round different text
+        council.models['Alpha'].get_response = lambda prompt, system_prompt=None: f"Alpha answer {prompt.count('Alpha')}"
+        discussion = council.discuss_topic('Test Topic', rounds=5)
+        self.assertEqual(len(discussion), 5)
+        summary_prompts = [prompt for prompt in council.models['Gamma'].prompts if 'Summarize this round' in prompt]
+        # Rounds 1 and 2 are summarized before round 4, round 3 before round 5
+        self.assertEqual(len(summary_prompts), 3)
+        self.assertIn('Round 1: Gamma answer', council.models['Beta'].prompts[-1])
+
+    def test_round_deadline_marks_stragglers_as_timed_out(self):
+        """Test that a round completes at its deadline and cancels the models still running"""
+        council = AICouncil(system_prompts='You are a test model', concurrent=True, round_deadline=0.1)
+        start = time.perf_counter()
+        round_responses = council.continue_discussion([])
+        self.assertLess(time.perf_counter() - start, Alpha.delay)
+        self.assertEqual(list(round_responses), ['Alpha', 'Beta', 'Gamma'])
+        self.assertEqual(round_responses['Gamma'], 'Gamma answer')
+        self.assertIn('timed out', round_responses['Alpha'])
+        self.assertIn('timed out', round_responses['Beta'])
+        self.assertEqual(round_responses['Alpha'].status, 'timeout')
+        self.assertTrue(round_responses['Gamma'].ok)
+        self.assertGreaterEqual(round_responses['Gamma'].latency, Gamma.delay)
+
+    def test_quorum_waits_past_the_deadline(self):
+        """Test that a round waits for its quorum even once the deadline has passed"""
+        council = AICouncil(system_prompts='You are a test model', concurrent=True, round_deadline=0.01, quorum=2)
+        round_responses = council.continue_discussion([])
+        answered = [response for response in round_responses.values() if 'timed out' not in response]
+        self.assertGreaterEqual(len(answered), 2)
+
+    def test_model_timeout_while_streaming(self):
+        """Test that a model past its timeout gets a completion event and a timeout notice"""
+        council = AICouncil(system_prompts='You are a test model', model_timeout=0.1)
+        events = []
+        round_responses = council.stream_continue_discussion(
+            [],
+            active_models=['Gamma', 'Alpha'],
+            callback=lambda model_name, chunk, is_complete: events.append((model_name, chunk, is_complete))
+        )
+        self.assertEqual(round_responses['Gamma'], 'Gamma answer')
+        self.assertIn('timed out', round_responses['Alpha'])
+        self.assertEqual(events[-1], ('Alpha', '', True))
+
+    def test_system_prompts_are_sent_per_call(self):
+        """Test that updating a prompt keeps the client and per-call prompts override it"""
+        council = AICouncil(system_prompts='You are a test model')
+        client = council.models['Alpha']
+        self.assertTrue(council.update_system_prompt('Alpha', 'You are Alpha'))
+        self.assertIs(council.models['Alpha'], client)
+        council.continue_discussion([], system_prompts={'Beta': 'You are Beta today'})
+        self.assertEqual(client.system_prompts, ['You are Alpha'])
+        self.assertEqual(council.models['Beta'].system_prompts, ['You are Beta today'])
+        # The override only applies to that call
+        self.assertEqual(council.system_prompts['Beta'], 'You are a test model')
+
+    def test_follow_up_prompts_extend_the_previous_prefix(self):
+        """Test that each follow-up prompt repeats the previous one's stable prefix"""
+        council = AICouncil(system_prompts='You are a test model')
+        council.discuss_topic('Test Topic', rounds=3)
+        second, third = council.models['Alpha'].prompts[1:]
+        self.assertTrue(third.startswith("".join(second.segments[:second.stable_segments])))
+        self.assertEqual(third, council.follow_up_prompt_template.format(context=council.get_discussion_context(
+            [{'Alpha': 'Alpha answer', 'Beta': 'Beta answer', 'Gamma': 'Gamma answer'}] * 2)))
+
+    def test_non_streaming_model_is_streamed_as_one_chunk(self):
+        """Test that a client without streaming support answers streamed rounds in one chunk"""
+        with patch.dict(ai_council.MODEL_CLASSES, {'Delta': NonStreaming}):
+            council = AICouncil(system_prompts='You are a test model')
+            events = []
+            round_responses = council.stream_continue_discussion(
+                [], callback=lambda model_name, chunk, is_complete: events.append((model_name, chunk, is_complete))
+            )
+        self.assertEqual(round_responses['Delta'], 'NonStreaming answer')
+        self.assertIn(('Delta', 'NonStreaming answer', False), events)
+
+
+class TestAsyncAICouncil(unittest.TestCase):
+    def setUp(self):
+        """Swap the real asyncio provider clients for fakes"""
+        patcher = patch.dict(ai_council.ASYNC_MODEL_CLASSES, FAKE_ASYNC_MODEL_CLASSES, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_discuss_topic_runs_rounds_as_coroutines(self):
+        """Test that the async council gathers every model per round in model order"""
+        council = AsyncAICouncil(system_prompts='You are a test model')
+        start = time.perf_counter()
+        discussion = asyncio.run(council.discuss_topic('Test Topic', rounds=2))
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 2 * (AsyncAlpha.delay + AsyncBeta.delay))
+        self.assertEqual(len(discussion), 2)
+        self.assertEqual(discussion[1], {'Alpha': 'AsyncAlpha answer', 'Beta': 'AsyncBeta answer'})
+        # The second round sees the first round in its context
+        self.assertIn('Beta: AsyncBeta answer', council.models['Alpha'].prompts[1])
+
+    def test_failed_summaries_are_retried(self):
+        """Test that a failed summary is retried later instead of breaking the discussion"""
+        compactor = ContextCompactor(keep_recent_rounds=1, default_token_budget=10)
+        council = AsyncAICouncil(system_prompts='You are a test model', context_compactor=compactor,
+                                 summary_model='Beta')
+
+        summary_prompts = []
+
+        async def failing_summary(prompt, system_prompt=None):
+            if 'Summarize this round' in prompt:
+                summary_prompts.append(prompt)
+                return "Error getting response from Beta: 503 overloaded"
+            return "AsyncBeta answer"
+        council.models['Beta'].get_response = failing_summary
+        discussion = asyncio.run(council.discuss_topic('Test Topic', rounds=4))
+        self.assertEqual(discussion[3]['Alpha'], 'AsyncAlpha answer')
+        # The failed summary is not kept, the round is summarized again before the next round
+        self.assertEqual(len(summary_prompts), 2)
+
+    def test_stream_continue_discussion(self):
+        """Test that async streaming keeps the callback contract"""
+        council = AsyncAICouncil(system_prompts='You are a test model')
+        events = []
+        round_responses = asyncio.run(council.stream_continue_discussion(
+            [{'Alpha': 'First thought'}],
+            callback=lambda model_name, chunk, is_complete: events.append((model_name, chunk, is_complete))
+        ))
+        self.assertEqual(round_responses['Beta'], 'AsyncBeta answer')
+        self.assertIn(('Alpha', '', True), events)
+        self.assertIn(('Beta', 'answer', False), events)
+
+    def test_round_deadline_cancels_stragglers(self):
+        """Test that the async council cancels models still running at the round deadline"""
+        council = AsyncAICouncil(system_prompts='You are a test model', round_deadline=0.1)
+        round_responses = asyncio.run(council.continue_discussion([]))
+        self.assertEqual(round_responses['Beta'], 'AsyncBeta answer')
+        self.assertIn('timed out', round_responses['Alpha'])
+
+    def test_blocking_clients_run_in_threads(self):
+        """Test that clients without asyncio support don't block the event loop"""
+        with patch.dict(ai_council.ASYNC_MODEL_CLASSES, {'Gamma': Gamma}):
+            council = AsyncAICouncil(system_prompts='You are a test model')
+            events = []
+            start = time.perf_counter()
+            round_responses = asyncio.run(council.stream_continue_discussion(
+                [], callback=lambda model_name, chunk, is_complete: events.append((model_name, chunk, is_complete))
+            ))
+        self.assertLess(time.perf_counter() - start, AsyncAlpha.delay + AsyncBeta.delay + Gamma.delay)
+        self.assertEqual(round_responses['Gamma'], 'Gamma answer')
+        self.assertLess(events.index(('Gamma', 'answer', False)), events.index(('Gamma', '', True)))
+
+    def test_adaptive_concurrency_slots_are_released(self):
+        """Test that async and threaded requests hand back their adaptive concurrency slots"""
+        limits = {'Alpha': AdaptiveConcurrencyLimit(initial=1), 'Gamma': AdaptiveConcurrencyLimit(initial=1)}
+        with patch.dict(ai_council.ASYNC_MODEL_CLASSES, {'Gamma': Gamma}):
+            council = AsyncAICouncil(system_prompts='You are a test model', adaptive_concurrency=limits)
+            round_responses = asyncio.run(council.stream_continue_discussion([]))
+        self.assertEqual(round_responses['Gamma'], 'Gamma answer')
+        self.assertEqual([limit.stats()['in_flight'] for limit in limits.values()], [0, 0])
+        self.assertIsNotNone(limits['Alpha'].stats()['latency'])
+
+
+if __name__ == '__main__':
+    unittest.main()
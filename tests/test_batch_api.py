@@ -0,0 +1,128 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import ai_council
+from ai_council import AICouncil
+from batch_api import collect_batch_round, discuss_topics
+from provider import Provider, STREAMING, BATCH_API
+from response_cache import ResponseCache
+
+
+class BatchServer(Provider):
+    """Stand-in for a provider batch endpoint: batches end after a number of polls"""
+    name = "Batched"
+    capabilities = frozenset({STREAMING, BATCH_API})
+    model_id = "batched-1"
+    polls_needed = 2
+
+    def __init__(self, system_prompt=None, cache=None):
+        super().__init__(system_prompt, cache=cache)
+        self.batches = {}
+        self.requests = 0
+
+    def _complete(self, prompt, system_prompt=None):
+        raise AssertionError("batched models must not be queried directly")
+
+    def submit_batch(self, requests):
+        batch_id = f"batch-{len(self.batches)}"
+        self.batches[batch_id] = {'requests': requests, 'polls': 0}
+        self.requests += len(requests)
+        return batch_id
+
+    def batch_status(self, batch_id):
+        batch = self.batches[batch_id]
+        batch['polls'] += 1
+        return "ended" if batch['polls'] >= self.polls_needed else "in_progress"
+
+    def batch_results(self, batch_id):
+        results = {}
+        for custom_id, prompt, system_prompt in self.batches[batch_id]['requests']:
+            if 'fail' in prompt:
+                results[custom_id] = self._batch_error("invalid request")
+            elif 'drop' not in prompt:
+                results[custom_id] = f"{system_prompt}|{prompt[-12:]}"
+        return results
+
+
+class Direct(Provider):
+    """Model without a batch API"""
+    name = "Direct"
+
+    def _complete(self, prompt, system_prompt=None):
+        return "direct answer"
+
+
+class TestBatchAPI(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.dict(ai_council.MODEL_CLASSES, {'Batched': BatchServer, 'Direct': Direct}, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sleeps = []
+
+    def test_round_is_one_batch_per_provider(self):
+        council = AICouncil(system_prompts='persona')
+        round_prompts = [{'Batched': 'first prompt', 'Direct': 'first prompt'},
+                         {'Direct': 'second prompt', 'Batched': 'second prompt'}]
+        responses = collect_batch_round(council, round_prompts, poll_interval=5, sleep=self.sleeps.append)
+        self.assertEqual(responses[0], {'Batched': 'persona|first prompt', 'Direct': 'direct answer'})
+        # Each discussion keeps the model order of its prompts
+        self.assertEqual(list(responses[1]), ['Direct', 'Batched'])
+        self.assertEqual(len(council.models['Batched'].batches), 1)
+        self.assertEqual(self.sleeps, [5])
+
+    def test_failed_and_missing_requests(self):
+        council = AICouncil(system_prompts='persona')
+        responses = collect_batch_round(council, [{'Batched': 'please fail'}, {'Batched': 'please drop'}],
+                                        sleep=self.sleeps.append)
+        self.assertEqual(responses[0]['Batched'], "Error getting batch response from Batched: invalid request")
+        self.assertTrue(responses[1]['Batched'].startswith("Error getting batch response from Batched"))
+
+    def test_cached_requests_are_not_resubmitted(self):
+        cache = ResponseCache()
+        council = AICouncil(system_prompts='persona', model_options={'Batched': {'cache': cache}})
+        collect_batch_round(council, [{'Batched': 'same prompt'}], sleep=self.sleeps.append)
+        responses = collect_batch_round(council, [{'Batched': 'same prompt'}, {'Batched': 'new prompt'}],
+                                        sleep=self.sleeps.append)
+        self.assertEqual(responses[0]['Batched'], 'persona|same prompt')
+        self.assertEqual(council.models['Batched'].requests, 2)
+
+    def test_discuss_topics_builds_follow_up_rounds(self):
+        council = AICouncil(system_prompts='persona')
+        discussions = discuss_topics(council, ['Topic A', 'Topic B'], rounds=2,
+                                     system_prompts={'Batched': 'override'}, sleep=self.sleeps.append)
+        self.assertEqual(len(discussions), 2)
+        self.assertEqual([len(discussion) for discussion in discussions], [2, 2])
+        self.assertTrue(discussions[1][1]['Batched'].startswith('override|'))
+        # One batch per round, covering both topics
+        self.assertEqual([len(batch['requests']) for batch in council.models['Batched'].batches.values()], [2, 2])
+
+
+    def test_openai_batch_files(self):
+        """Test the JSONL files exchanged with the OpenAI Batch API"""
+        from chatgpt import ChatGPT
+        model = ChatGPT.__new__(ChatGPT)
+        Provider.__init__(model, 'persona')
+        model.client = MagicMock()
+        model.client.batches.create.return_value = SimpleNamespace(id='batch_1')
+        self.assertEqual(model.submit_batch([('request-0', 'hello', None)]), 'batch_1')
+        _, content = model.client.files.create.call_args.kwargs['file']
+        line = json.loads(content.getvalue())
+        self.assertEqual(line['body']['messages'][0], {'role': 'system', 'content': 'persona'})
+
+        model.client.batches.retrieve.return_value = SimpleNamespace(output_file_id='out', error_file_id='err')
+        files = {
+            'out': json.dumps({'custom_id': 'request-0', 'response': {
+                'status_code': 200, 'body': {'choices': [{'message': {'content': 'hi'}}]}}}),
+            'err': json.dumps({'custom_id': 'request-1', 'response': {
+                'status_code': 400, 'body': {'error': {'message': 'bad'}}}})
+        }
+        model.client.files.content.side_effect = lambda file_id: SimpleNamespace(text=files[file_id])
+        self.assertEqual(model.batch_results('batch_1'), {
+            'request-0': 'hi',
+            'request-1': 'Error getting batch response from ChatGPT: bad'
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from batch_runner import load_topics, run_batch, completed_ids, topic_id
+
+
+class FakeCouncil:
+    """Council answering each topic after a short delay, failing the topics it is told to"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.topics = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def discuss_topic(self, topic, rounds=1, system_prompts=None):
+        with self.lock:
+            self.topics.append(topic)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        if topic in self.fail:
+            raise RuntimeError("provider down")
+        return [{'Alpha': f"answer to {topic}"}] * rounds
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.output = os.path.join(self.tmp.name, 'results.jsonl')
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_load_jsonl_and_csv(self):
+        jsonl = self.write('topics.jsonl', '{"id": "a", "topic": "First", "rounds": 2}\n\n{"topic": "Second"}\n')
+        self.assertEqual(load_topics(jsonl), [{'id': 'a', 'topic': 'First', 'rounds': 2},
+                                              {'id': topic_id('Second'), 'topic': 'Second'}])
+        csv_path = self.write('topics.csv', 'id,topic\nx,Third\n')
+        self.assertEqual(load_topics(csv_path), [{'id': 'x', 'topic': 'Third'}])
+        with self.assertRaises(ValueError):
+            load_topics(self.write('dupes.jsonl', '{"id": "a", "topic": "One"}\n{"id": "a", "topic": "Two"}\n'))
+
+    def test_runs_topics_concurrently_and_records_failures(self):
+        council = FakeCouncil(fail={'Topic 2'})
+        topics = [{'id': str(i), 'topic': f'Topic {i}'} for i in range(6)]
+        summary = run_batch(council, topics, self.output, concurrency=3)
+        self.assertEqual(summary, {'success': 5, 'error': 1, 'skipped': 0})
+        self.assertEqual(council.peak, 3)
+        with open(self.output, encoding='utf-8') as f:
+            results = {result['id']: result for result in map(json.loads, f)}
+        self.assertEqual(results['2']['error'], 'provider down')
+        self.assertEqual(results['4']['results'], [{'Alpha': 'answer to Topic 4'}])
+
+    def test_resume_skips_completed_topics(self):
+        # A crash left a partial line after the finished topics
+        self.write('results.jsonl', '{"id": "0", "status": "success"}\n{"id": "1", "status": "error"}\n{"id": "2", "sta')
+        self.assertEqual(completed_ids(self.output), {'0'})
+        council = FakeCouncil()
+        topics = [{'id': str(i), 'topic': f'Topic {i}'} for i in range(3)]
+        summary = run_batch(council, topics, self.output)
+        self.assertEqual(summary, {'success': 2, 'error': 0, 'skipped': 1})
+        self.assertEqual(sorted(council.topics), ['Topic 1', 'Topic 2'])
+        self.assertEqual(completed_ids(self.output), {'0', '1', '2'})
+
+
+if __name__ == '__main__':
+    unittest.main()
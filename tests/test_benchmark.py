@@ -0,0 +1,29 @@
+import contextlib
+import io
+import unittest
+from benchmark import latency_stats, model_names, synthetic_cassette, council_benchmarks
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_latency_stats(self):
+        stats = latency_stats([0.1 * number for number in range(1, 11)])
+        self.assertAlmostEqual(stats['p50'], 0.5)
+        self.assertAlmostEqual(stats['p99'], 1.0)
+        self.assertAlmostEqual(stats['mean'], 0.55)
+        self.assertEqual(model_names(7)[4:], ['Llama', 'Model6', 'Model7'])
+
+    def test_council_benchmarks_report_every_method(self):
+        cassette = synthetic_cassette(model_names(2), response_words=20)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = council_benchmarks(cassette, {'speed': 0}, [2], [1], [3], iterations=2, concurrency=2,
+                                         response_words=20)
+        self.assertEqual([result['name'] for result in results],
+                         ['discuss_topic', 'stream_discussion', 'continue_discussion', 'get_discussion_context'])
+        for result in results:
+            self.assertGreater(result['throughput'], 0)
+            self.assertGreater(result['peak_memory_bytes'], 0)
+            self.assertLessEqual(result['latency']['p50'], result['latency']['p99'])
+
+
+if __name__ == '__main__':
+    unittest.main()
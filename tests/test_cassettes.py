@@ -0,0 +1,90 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from cassettes import Cassette, RecordingProvider, ReplayProvider, AsyncReplayProvider, fixed, replay
+from provider import Provider, STREAMING
+from retry import RetryPolicy
+
+
+class SlowProvider(Provider):
+    """Provider streaming the words of the prompt, 10ms apart"""
+    name = "Slow"
+    capabilities = frozenset({STREAMING})
+
+    def _complete(self, prompt, system_prompt=None):
+        return prompt
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        if prompt == 'fail':
+            raise RuntimeError('529 overloaded')
+        for word in prompt.split(' '):
+            time.sleep(0.01)
+            yield word + ' '
+
+
+class TestCassettes(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cassette.jsonl')
+        recorder = RecordingProvider('Slow', SlowProvider('Be slow', retry=RetryPolicy(max_attempts=1)),
+                                     Cassette(self.path))
+        chunks = []
+        self.assertEqual(recorder.get_streaming_response('one two three', chunks.append), 'one two three ')
+        self.assertEqual(chunks, ['one ', 'two ', 'three '])
+        recorder.get_streaming_response('fail')
+        self.cassette = Cassette(self.path)
+
+    def replay(self, **options):
+        return ReplayProvider('Be slow', retry=RetryPolicy(max_attempts=1), cassette=self.cassette,
+                              model_name='Slow', **options)
+
+    def test_recording_keeps_chunks_and_timings(self):
+        ok, failed = self.cassette.interactions
+        self.assertEqual([chunk for _, chunk in ok['chunks']], ['one ', 'two ', 'three '])
+        offsets = [offset for offset, _ in ok['chunks']]
+        self.assertEqual(offsets, sorted(offsets))
+        self.assertGreaterEqual(offsets[0], 0.01)
+        self.assertEqual((ok['system_prompt'], ok['status']), ('Be slow', 'ok'))
+        self.assertEqual((failed['chunks'], failed['error'], failed['error_class']),
+                         ([], '529 overloaded', 'RuntimeError'))
+
+    def test_replay_streams_recorded_chunks(self):
+        chunks = []
+        response = self.replay(speed=0).get_streaming_response('one two three', chunks.append)
+        self.assertEqual((response, response.status), ('one two three ', 'ok'))
+        self.assertEqual(chunks, ['one ', 'two ', 'three '])
+        failed = self.replay(speed=0).get_response('fail')
+        self.assertEqual(failed, 'Error getting response from Slow: 529 overloaded')
+        # Requests that were not recorded get another recording unless the replay is strict
+        self.assertEqual(self.replay(speed=0).get_response('four'), 'one two three ')
+        self.assertEqual(self.replay(speed=0, strict=True).get_response('four').error_class, 'CassetteMiss')
+
+    def test_latency_and_failure_injection(self):
+        provider = self.replay(first_token_latency=fixed(0.1))
+        started = time.monotonic()
+        provider.get_response('one two three')
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        failing = self.replay(speed=0, failure_rate=1.0, failure_status=429)
+        self.assertIn('429 injected failure', failing.get_response('one two three'))
+
+    def test_replay_council(self):
+        class Council:
+            system_prompts = {}
+            models = {}
+
+            async def discuss_topic(self, topic):
+                pass
+
+        council = Council()
+        replay(council, self.cassette, speed=0)
+        model = council.models['Slow']
+        self.assertIsInstance(model, AsyncReplayProvider)
+        self.assertEqual(council.system_prompts, {'Slow': 'Be slow'})
+        self.assertEqual(asyncio.run(model.get_response('one two three')), 'one two three ')
+
+
+if __name__ == '__main__':
+    unittest.main()
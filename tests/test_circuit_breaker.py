@@ -0,0 +1,62 @@
+import unittest
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=self.clock)
+
+    def fail(self, times):
+        for _ in range(times):
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail(2)
+        self.breaker.record_success()
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.fail(1)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.status(), {'state': OPEN, 'available': False,
+                                                 'consecutive_failures': 3, 'retry_in': 10.0})
+
+    def test_half_open_lets_one_trial_through(self):
+        self.fail(3)
+        self.clock.now = 10
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_failed_trial_opens_again(self):
+        self.fail(3)
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow_request())
+        self.fail(1)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.clock.now = 15
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_lost_trial_is_replaced(self):
+        self.fail(3)
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow_request())
+        # The trial never reported back
+        self.clock.now = 20
+        self.assertTrue(self.breaker.allow_request())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from model_result import ModelResult, TIMEOUT
+from discussion_context import DiscussionContext, ContextCompactor, LayeredPrompt, estimate_tokens
+
+
+class TestDiscussionContext(unittest.TestCase):
+    def test_render_matches_transcript_format(self):
+        """Test that rendering produces the transcript format used in follow-up prompts"""
+        context = DiscussionContext([{'Alpha': 'First', 'Beta': 'Second'}])
+        context.add_round({'Alpha': 'Third'})
+        self.assertEqual(
+            context.render(),
+            "Previous discussion:\n\nAlpha: First\n\nBeta: Second\n\nAlpha: Third\n"
+        )
+        self.assertEqual(len(context), 2)
+
+    def test_user_contribution_is_not_kept(self):
+        """Test that a user contribution is appended to one render only"""
+        context = DiscussionContext([{'Alpha': 'First'}])
+        self.assertTrue(context.render('Question').endswith("\nUser contribution: Question\n"))
+        self.assertNotIn('Question', context.render())
+
+    def test_database_rounds(self):
+        """Test that rounds stored by the database render their responses only"""
+        context = DiscussionContext([{
+            'round_number': 1,
+            'responses': {'Alpha': 'First'},
+            'timestamp': None
+        }])
+        self.assertEqual(context.render(), "Previous discussion:\n\nAlpha: First\n")
+
+    def test_failed_turns_are_left_out(self):
+        context = DiscussionContext([{'Alpha': 'First thought',
+                                      'Beta': 'Error getting response from Beta: connection refused',
+                                      'Gamma': ModelResult('Gamma timed out', status=TIMEOUT)}])
+        self.assertEqual(context.render(), "Previous discussion:\n\nAlpha: First thought\n")
+
+    def test_render_is_memoized(self):
+        """Test that the transcript is only joined again after a new round"""
+        context = DiscussionContext([{'Alpha': 'First'}])
+        rendered = context.render()
+        self.assertIs(context.render(), rendered)
+        context.add_round({'Beta': 'Second'})
+        self.assertTrue(context.render().startswith(rendered))
+
+
+class TestLayeredPrompt(unittest.TestCase):
+    def test_template_prompt_keeps_a_stable_prefix(self):
+        """Test that a layered follow-up prompt equals the formatted template and grows by appending"""
+        template = "Review {{this}}: {context}\nAnswer now."
+        context = DiscussionContext([{'Alpha': 'First'}])
+        prompt = LayeredPrompt.from_template(template, context.segments('Question'), stable_segments=2)
+        self.assertEqual(prompt, template.format(context=context.render('Question')))
+        stable = "".join(prompt.segments[:prompt.stable_segments])
+        self.assertEqual(stable, "Review {this}: Previous discussion:\n\nAlpha: First\n")
+
+        context.add_round({'Alpha': 'Second'})
+        next_prompt = LayeredPrompt.from_template(template, context.segments(), stable_segments=3)
+        self.assertTrue(next_prompt.startswith(stable))
+
+
+class TestContextCompactor(unittest.TestCase):
+    def setUp(self):
+        """Build a discussion much larger than the token budget"""
+        self.context = DiscussionContext([
+            {'Alpha': f'Round {number} ' + 'words ' * 200, 'Beta': f'Reply {number} ' + 'words ' * 200}
+            for number in range(1, 6)
+        ])
+
+    def test_small_discussion_is_not_compacted(self):
+        """Test that a context within budget is rendered in full"""
+        compactor = ContextCompactor(default_token_budget=100000)
+        self.assertEqual(compactor.pending_summaries(self.context, ['Alpha']), [])
+        self.assertEqual(compactor.render(self.context, 'Alpha'), self.context.render())
+
+    def test_older_rounds_are_replaced_by_summaries(self):
+        """Test that older rounds are summarized while recent rounds stay verbatim"""
+        compactor = ContextCompactor(keep_recent_rounds=2, default_token_budget=1000)
+        pending = compactor.pending_summaries(self.context, ['Alpha'])
+        self.assertEqual(pending, self.context.round_texts[:3])
+        for number, round_text in enumerate(pending, start=1):
+            compactor.store_summary(round_text, f'summary {number}')
+        self.assertEqual(compactor.pending_summaries(self.context, ['Alpha']), [])
+
+        compacted = compactor.render(self.context, 'Alpha', user_contribution='Question')
+        self.assertLessEqual(estimate_tokens(compacted), 1000)
+        self.assertIn('Round 1: summary 1', compacted)
+        self.assertIn(self.context.round_texts[-1], compacted)
+        self.assertNotIn(self.context.round_texts[0], compacted)
+        self.assertTrue(compacted.endswith('User contribution: Question\n'))
+
+    def test_per_model_budgets(self):
+        """Test that only models with a budget get a compacted context"""
+        compactor = ContextCompactor(token_budgets={'Alpha': 1000})
+        self.assertEqual(compactor.render(self.context, 'Beta'), self.context.render())
+        self.assertLessEqual(estimate_tokens(compactor.render(self.context, 'Alpha')), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+import gemini
+from discussion_context import LayeredPrompt
+
+
+class TestGeminiCachedContent(unittest.TestCase):
+    def setUp(self):
+        self.client = gemini.Gemini()
+        self.client.cached_content_min_tokens = 10
+        self.prompt = LayeredPrompt(["Round 1: " + "word " * 50, "Round 2: next"], stable_segments=1)
+
+    def test_failed_cache_creation_is_not_retried_right_away(self):
+        """Test that a failing cache creation is reported once and not repeated for every request"""
+        output = io.StringIO()
+        with patch.object(gemini.genai.caching.CachedContent, 'create',
+                          side_effect=RuntimeError('content too small')) as create, redirect_stdout(output):
+            for _ in range(3):
+                self.assertEqual(self.client._cached_prefix('persona', self.prompt), (None, 0))
+            self.assertEqual(create.call_count, 1)
+            self.assertEqual(output.getvalue().count('Warning'), 1)
+            # Another system prompt still tries, and the failed one does again after the delay
+            self.client._cached_prefix('other persona', self.prompt)
+            self.client._cached_content_failures['persona'] = 0
+            self.client._cached_prefix('persona', self.prompt)
+        self.assertEqual(create.call_count, 3)
+        self.assertEqual(output.getvalue().count('Warning'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
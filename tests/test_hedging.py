@@ -0,0 +1,81 @@
+import unittest
+import asyncio
+import time
+from hedging import HedgingPolicy
+
+
+def slow_then_fast(delays, closed):
+    """Build an attempt factory whose n-th attempt waits delays[n] before its first chunk"""
+    attempts = iter(range(len(delays)))
+
+    def start_attempt():
+        attempt_id = next(attempts)
+
+        def chunks():
+            try:
+                time.sleep(delays[attempt_id])
+                yield f"attempt {attempt_id} "
+                yield "done"
+            finally:
+                closed.append(attempt_id)
+
+        return chunks()
+
+    return start_attempt
+
+
+class TestHedgingPolicy(unittest.TestCase):
+    def test_fast_attempt_is_not_hedged(self):
+        """Test that a request answering before the hedge delay is sent once"""
+        policy = HedgingPolicy(initial_delay=0.5)
+        closed = []
+        self.assertEqual(''.join(policy.stream(slow_then_fast([0.01], closed))), 'attempt 0 done')
+        self.assertEqual(policy.hedges, 0)
+
+    def test_late_first_token_is_hedged(self):
+        """Test that a late request is duplicated and the faster attempt wins"""
+        policy = HedgingPolicy(initial_delay=0.05, min_delay=0.01)
+        closed = []
+        start = time.perf_counter()
+        response = ''.join(policy.stream(slow_then_fast([0.5, 0.01], closed)))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(response, 'attempt 1 done')
+        self.assertEqual((policy.hedges, policy.hedge_wins), (1, 1))
+        # The losing attempt is closed once its first chunk shows up
+        time.sleep(0.6)
+        self.assertIn(0, closed)
+
+    def test_budget_caps_hedges(self):
+        """Test that no hedge is sent once the per-minute budget is spent"""
+        policy = HedgingPolicy(initial_delay=0.01, min_delay=0.01, max_hedges_per_minute=0)
+        closed = []
+        self.assertEqual(''.join(policy.stream(slow_then_fast([0.1, 0.01], closed))), 'attempt 0 done')
+        self.assertEqual(policy.hedges, 0)
+
+    def test_hedge_delay_follows_percentile(self):
+        """Test that the hedge delay is a percentile of observed first-token latencies"""
+        policy = HedgingPolicy(percentile=90, min_samples=10, min_delay=0, initial_delay=5)
+        self.assertEqual(policy.hedge_delay(), 5)
+        for latency in range(1, 101):
+            policy.record_first_token(latency / 100)
+        self.assertAlmostEqual(policy.hedge_delay(), 0.91)
+
+    def test_async_late_first_token_is_hedged(self):
+        """Test that the asyncio variant keeps the attempt that answers first"""
+        policy = HedgingPolicy(initial_delay=0.05, min_delay=0.01)
+        delays = iter([0.5, 0.01])
+
+        async def chunks(delay):
+            await asyncio.sleep(delay)
+            yield f"after {delay} "
+            yield "done"
+
+        async def run():
+            return ''.join([chunk async for chunk in policy.astream(lambda: chunks(next(delays)))])
+
+        self.assertEqual(asyncio.run(run()), 'after 0.01 done')
+        self.assertEqual(policy.hedge_wins, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from metrics import Counter, Gauge, Histogram, MetricsRegistry, CouncilMetrics
+from model_result import ModelResult, TIMEOUT
+
+
+class TestMetrics(unittest.TestCase):
+    def test_render_text_format(self):
+        registry = MetricsRegistry()
+        errors = registry.register(Counter('errors_total', 'Failed turns', ('model',)))
+        streams = registry.register(Gauge('streams_open', 'Open streams'))
+        latency = registry.register(Histogram('latency_seconds', 'Latency', ('model',), buckets=(1, 5)))
+        errors.inc(model='Grok "2"')
+        latency.observe(0.5, model='Claude')
+        latency.observe(2, model='Claude')
+        self.assertEqual(registry.render(), '\n'.join([
+            '# HELP errors_total Failed turns',
+            '# TYPE errors_total counter',
+            'errors_total{model="Grok \\"2\\""} 1',
+            '# HELP streams_open Open streams',
+            '# TYPE streams_open gauge',
+            'streams_open 0',
+            '# HELP latency_seconds Latency',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{model="Claude",le="1"} 1',
+            'latency_seconds_bucket{model="Claude",le="5"} 2',
+            'latency_seconds_bucket{model="Claude",le="+Inf"} 2',
+            'latency_seconds_sum{model="Claude"} 2.5',
+            'latency_seconds_count{model="Claude"} 2',
+        ]) + '\n')
+        with self.assertRaises(ValueError):
+            errors.inc(provider='Grok')
+
+    def test_gauge_tracks_the_with_block(self):
+        gauge = Gauge('streams_open', 'Open streams')
+        with self.assertRaises(RuntimeError):
+            with gauge.track():
+                self.assertEqual(gauge.value(), 1)
+                raise RuntimeError('client disconnected')
+        self.assertEqual(gauge.value(), 0)
+
+    def test_observe_turn(self):
+        metrics = CouncilMetrics()
+        metrics.observe_turn('Claude', ModelResult('An answer', latency=2.0, time_to_first_token=1.0,
+                                                   usage={'input_tokens': 100, 'output_tokens': 40}))
+        metrics.observe_turn('Grok', ModelResult('Timed out', status=TIMEOUT, latency=60.0,
+                                                 error_class='TimeoutError'))
+        self.assertEqual(metrics.tokens.count(model='Claude', direction='input'), 1)
+        self.assertEqual(metrics.time_to_first_token.count(model='Claude'), 1)
+        # 40 tokens in the second after the first one
+        self.assertIn('ai_council_model_tokens_per_second_sum{model="Claude"} 40', metrics.render())
+        self.assertEqual(metrics.errors.value(model='Grok', status='timeout', error_class='TimeoutError'), 1)
+        self.assertEqual(metrics.latency.count(model='Grok', status='timeout'), 1)
+        self.assertEqual(metrics.tokens.count(model='Grok', direction='output'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
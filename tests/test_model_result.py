@@ -0,0 +1,35 @@
+import unittest
+import json
+from model_result import ModelResult, ERROR, UNAVAILABLE, is_error_response, as_model_result, split_round
+
+
+class TestModelResult(unittest.TestCase):
+    def test_result_is_its_text(self):
+        result = ModelResult("An answer", latency=1.5, usage={'input_tokens': 10})
+        self.assertEqual(result, "An answer")
+        self.assertEqual(json.dumps({'Alpha': result}), '{"Alpha": "An answer"}')
+        self.assertEqual(result.metadata(), {'status': 'ok', 'latency': 1.5, 'time_to_first_token': None,
+                                             'usage': {'input_tokens': 10}, 'error_class': None})
+
+    def test_failures_are_told_apart_from_answers(self):
+        self.assertTrue(is_error_response(ModelResult("Provider down", status=UNAVAILABLE)))
+        # Responses stored before results had a status
+        self.assertTrue(is_error_response("Error getting response from Grok: 500"))
+        self.assertFalse(is_error_response(ModelResult("Error handling is my favourite topic")))
+        self.assertTrue(is_error_response("Error getting streaming response from Grok: 500"))
+        self.assertFalse(is_error_response("Error handling in Rust is explicit"))
+        self.assertEqual(as_model_result("Error getting response from Grok: 500").status, ERROR)
+
+    def test_split_round(self):
+        answers, errors = split_round({
+            'Alpha': ModelResult("An answer"),
+            'Beta': ModelResult("Error getting response from Beta: boom", status=ERROR, error_class='RuntimeError')
+        })
+        self.assertEqual(answers, {'Alpha': "An answer"})
+        self.assertIs(type(answers['Alpha']), str)
+        self.assertEqual(errors, {'Beta': {'message': "Error getting response from Beta: boom", 'status': ERROR,
+                                           'error_class': 'RuntimeError'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from discussion_context import LayeredPrompt
+from provider import Provider, AsyncProvider, RoundCancelled, supports, STREAMING, ASYNC, CANCELLATION, BATCH_API
+from hedging import HedgingPolicy
+
+
+class EchoProvider(Provider):
+    """Provider answering with the prompt, in one chunk per word"""
+    name = "Echo"
+    capabilities = frozenset({STREAMING, CANCELLATION})
+
+    def __init__(self, system_prompt=None, hedging=None):
+        super().__init__(system_prompt, hedging)
+        self.closed = 0
+
+    def _complete(self, prompt, system_prompt=None):
+        if prompt == 'fail':
+            raise RuntimeError('provider down')
+        return prompt
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        try:
+            for word in prompt.split(' '):
+                yield word + ' '
+        finally:
+            self.closed += 1
+
+
+class AsyncEchoProvider(AsyncProvider, EchoProvider):
+    capabilities = EchoProvider.capabilities | {ASYNC}
+
+    async def _complete(self, prompt, system_prompt=None):
+        return EchoProvider._complete(self, prompt, system_prompt)
+
+    async def _stream_chunks(self, prompt, system_prompt=None):
+        try:
+            for word in prompt.split(' '):
+                yield word + ' '
+        finally:
+            self.closed += 1
+
+
+class TestProvider(unittest.TestCase):
+    def test_errors_are_reported_with_provider_name(self):
+        """Test that a failing request returns the error message instead of raising"""
+        self.assertEqual(EchoProvider().get_response('fail'), 'Error getting response from Echo: provider down')
+
+    def test_streamed_responses_carry_time_to_first_token(self):
+        """Test that streamed responses record when their first chunk arrived"""
+        response = EchoProvider().get_streaming_response('one two')
+        self.assertLessEqual(response.time_to_first_token, response.latency)
+        self.assertIsNone(EchoProvider().get_response('one').time_to_first_token)
+        response = asyncio.run(AsyncEchoProvider().get_streaming_response('one two'))
+        self.assertIsNotNone(response.time_to_first_token)
+
+    def test_responses_carry_status_latency_and_usage(self):
+        """Test that responses are ModelResults with the usage recorded during the request"""
+        provider = EchoProvider()
+        provider._complete = lambda prompt, system_prompt=None: (provider.record_usage(10, 2), prompt)[1]
+        response = provider.get_response('one')
+        self.assertEqual((response, response.status), ('one', 'ok'))
+        self.assertIsNotNone(response.latency)
+        self.assertEqual(response.usage, {'input_tokens': 10, 'output_tokens': 2,
+                                          'cached_input_tokens': 0, 'cache_write_tokens': 0})
+        error = EchoProvider().get_response('fail')
+        self.assertEqual((error.status, error.error_class), ('error', 'RuntimeError'))
+
+    def test_cancelled_stream_is_not_reported_as_an_error(self):
+        """Test that a round cancelling a stream gets its RoundCancelled back instead of an error response"""
+        provider = EchoProvider()
+        chunks = []
+
+        def cancel(chunk):
+            chunks.append(chunk)
+            raise RoundCancelled('Echo')
+        with self.assertRaises(RoundCancelled):
+            provider.get_streaming_response('one two', cancel)
+        self.assertEqual((chunks, provider.closed), (['one '], 1))
+        with self.assertRaises(RoundCancelled):
+            asyncio.run(AsyncEchoProvider().get_streaming_response('one two', cancel))
+
+    def test_stream_is_closed_when_callback_stops_it(self):
+        """Test that a callback raising mid-stream abandons the request"""
+        provider = EchoProvider()
+
+        chunks = []
+
+        def stop(chunk):
+            chunks.append(chunk)
+            if len(chunks) == 1:
+                raise RuntimeError('stop')
+
+        response = provider.get_streaming_response('one two three', stop)
+        self.assertEqual(response, 'Error getting streaming response from Echo: stop')
+        self.assertEqual(chunks, ['one ', response])
+        self.assertEqual(provider.closed, 1)
+
+    def test_hedged_response_goes_through_stream(self):
+        """Test that hedging applies to every provider through the base class"""
+        provider = EchoProvider(hedging=HedgingPolicy(initial_delay=1))
+        self.assertEqual(provider.get_response('one two'), 'one two ')
+
+    def test_async_provider(self):
+        """Test that the asyncio base class streams and answers from coroutines"""
+        provider = AsyncEchoProvider()
+        chunks = []
+        self.assertEqual(asyncio.run(provider.get_streaming_response('one two', chunks.append)), 'one two ')
+        self.assertEqual(chunks, ['one ', 'two '])
+        self.assertEqual(asyncio.run(provider.get_response('one')), 'one')
+
+    def test_max_output_tokens(self):
+        """Test that the response length bound overrides the client's sampling parameters"""
+        class GeminiLikeProvider(EchoProvider):
+            sampling_params = {'temperature': 1.0, 'max_output_tokens': 1000}
+            max_tokens_param = 'max_output_tokens'
+
+        provider = GeminiLikeProvider()
+        provider.set_max_output_tokens(200)
+        self.assertEqual(provider.sampling_params, {'temperature': 1.0, 'max_output_tokens': 200})
+        provider.set_max_output_tokens(None)
+        self.assertEqual(provider.sampling_params, GeminiLikeProvider.sampling_params)
+
+    def test_capabilities(self):
+        """Test declared capabilities and the fallback for clients without a declaration"""
+        self.assertTrue(EchoProvider().supports(CANCELLATION))
+        self.assertFalse(supports(EchoProvider(), BATCH_API))
+        self.assertTrue(supports(AsyncEchoProvider(), ASYNC))
+
+        class Plain:
+            async def get_response(self, prompt):
+                return prompt
+
+        self.assertTrue(supports(Plain(), ASYNC))
+        self.assertFalse(supports(Plain(), STREAMING))
+
+
+    def test_claude_caches_system_prompt_and_stable_prefix(self):
+        """Test Claude's cache breakpoints and the usage it records"""
+        from claude import Claude
+        model = Claude.__new__(Claude)
+        Provider.__init__(model, 'persona')
+        model.client = MagicMock()
+        model.client.messages.create.return_value = SimpleNamespace(
+            content=[SimpleNamespace(text='answer')],
+            usage=SimpleNamespace(input_tokens=10, output_tokens=5, cache_read_input_tokens=900,
+                                  cache_creation_input_tokens=90)
+        )
+        prompt = LayeredPrompt(['Review: ', 'round 1', 'round 2', '\nAnswer.'], stable_segments=3)
+        self.assertEqual(model.get_response(prompt), 'answer')
+
+        params = model.client.messages.create.call_args.kwargs
+        self.assertEqual(params['system'][0]['cache_control'], {'type': 'ephemeral'})
+        blocks = params['messages'][0]['content']
+        self.assertEqual([block['text'] for block in blocks], list(prompt.segments))
+        self.assertEqual([i for i, block in enumerate(blocks) if 'cache_control' in block], [2])
+        usage = model.usage_stats()
+        self.assertEqual((usage['input_tokens'], usage['cached_input_tokens'], usage['output_tokens']), (1000, 900, 5))
+        self.assertAlmostEqual(usage['cached_input_ratio'], 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import io
+import sys
+import types
+from contextlib import redirect_stdout
+from unittest.mock import patch
+import providers
+from providers import LazyProvider, UnavailableProvider
+
+
+class TestLazyProvider(unittest.TestCase):
+    def setUp(self):
+        """Register a fake provider module that counts how often its client is built"""
+        self.module = types.ModuleType('fake_provider')
+        self.built = []
+
+        class FakeClient:
+            def __init__(client, system_prompt=None, suffix=''):
+                self.built.append(system_prompt)
+                client.system_prompt = system_prompt
+                client.suffix = suffix
+
+            def get_response(client, prompt):
+                return f"{client.system_prompt}: {prompt}{client.suffix}"
+
+        self.module.FakeClient = FakeClient
+        patcher = patch.dict(sys.modules, {'fake_provider': self.module})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_client_is_built_on_first_use(self):
+        """Test that the client is only built when it is first used, and only once"""
+        provider = LazyProvider('Fake', 'fake_provider.FakeClient', 'prompt', suffix='!')
+        self.assertFalse(provider.is_built)
+        self.assertEqual(self.built, [])
+        self.assertEqual(provider.get_response('hi'), 'prompt: hi!')
+        self.assertEqual(provider.get_response('again'), 'prompt: again!')
+        self.assertEqual(self.built, ['prompt'])
+        self.assertIn('Fake', providers.import_report()['clients'])
+
+    def test_attributes_are_forwarded(self):
+        """Test that setting an attribute on the proxy sets it on the client"""
+        provider = LazyProvider('Fake', 'fake_provider.FakeClient', 'prompt')
+        provider.system_prompt = 'new prompt'
+        self.assertEqual(provider.get_response('hi'), 'new prompt: hi')
+
+    def test_configuration_waits_for_build(self):
+        """Test that when_built configures the client without building it"""
+        provider = LazyProvider('Fake', 'fake_provider.FakeClient', 'prompt')
+        provider.when_built(lambda client: setattr(client, 'suffix', '?'))
+        self.assertFalse(provider.is_built)
+        self.assertEqual(provider.get_response('hi'), 'prompt: hi?')
+        provider.when_built(lambda client: setattr(client, 'suffix', '!'))
+        self.assertEqual(provider.get_response('hi'), 'prompt: hi!')
+
+    def test_failed_build_answers_with_error(self):
+        """Test that a client failing to build is replaced by one returning the error"""
+        def broken(system_prompt=None):
+            raise RuntimeError('no credentials')
+        self.module.Broken = broken
+        provider = LazyProvider('Fake', 'fake_provider.Broken', 'prompt')
+        response = provider.get_response('hi')
+        self.assertIsInstance(provider._instance, UnavailableProvider)
+        self.assertTrue(response.startswith('Error getting response from Fake'))
+        self.assertIn('no credentials', response)
+
+    def test_missing_api_key(self):
+        """Test that a provider without its API key is detected without importing it"""
+        with patch.dict('os.environ', {'XAI_API_KEY': ''}), patch.object(providers, 'load_environment'):
+            self.assertEqual(providers.missing_configuration('grok.Grok'), 'XAI_API_KEY')
+        self.assertIsNone(providers.missing_configuration(object))
+
+    def test_import_report(self):
+        """Test that the import report times the modules of the client classes it is given"""
+        def import_module(module_name):
+            if module_name != 'other_provider':
+                raise ImportError(f"No module named '{module_name}'")
+            sys.modules[module_name] = self.module
+
+        output = io.StringIO()
+        with patch.dict(providers._import_times, clear=True), patch.object(providers, 'import_module', import_module), \
+                patch.dict(sys.modules), redirect_stdout(output):
+            providers.print_import_report(['other_provider.FakeClient', 'missing_provider.Client'])
+        lines = output.getvalue().splitlines()
+        self.assertIn("Could not import missing_provider.Client", lines[0])
+        self.assertTrue(lines[1].startswith('other_provider'))
+        self.assertTrue(lines[2].startswith('total'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from rate_limiter import TokenBucket, RateLimiter, RateLimiterRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_bucket_queues_callers_in_order(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, burst=2, clock=clock)
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 1.0, 2.0])
+        clock.now = 10
+        # Refilled up to its capacity only
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 1.0])
+
+    def test_tokens_are_reserved_then_settled(self):
+        clock = FakeClock()
+        limiter = RateLimiter(tokens_per_minute=6000, clock=clock)
+        self.assertEqual(limiter.tokens.capacity, 1000)
+        reservation = limiter.reserve(prompt_tokens=200, output_tokens=600)
+        self.assertEqual(reservation.delay, 0.0)
+        # The response used only 100 of the 600 reserved tokens
+        reservation.settle(100)
+        self.assertEqual(limiter.reserve(prompt_tokens=100, output_tokens=600).delay, 0.0)
+        self.assertAlmostEqual(limiter.reserve(prompt_tokens=100, output_tokens=600).delay, 7.0)
+
+    def test_both_limits_apply(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=6, tokens_per_minute=600000, clock=clock)
+        delays = [limiter.reserve(prompt_tokens=10, output_tokens=10).delay for _ in range(2)]
+        self.assertEqual(delays, [0.0, 10.0])
+
+    def test_registry_keeps_unchanged_limiters(self):
+        registry = RateLimiterRegistry({'Claude': {'requests_per_minute': 50}, 'Grok': {'requests_per_minute': 60}})
+        claude = registry.get('Claude')
+        registry.configure({'Claude': {'requests_per_minute': 50}, 'Grok': {'requests_per_minute': 120}, 'Llama': {}})
+        self.assertIs(registry.get('Claude'), claude)
+        self.assertEqual(registry.get('Grok').requests_per_minute, 120)
+        self.assertIsNone(registry.get('Llama'))
+        self.assertEqual(set(registry.limits()), {'Claude', 'Grok'})
+
+
+if __name__ == '__main__':
+    unittest.main()
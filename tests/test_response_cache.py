@@ -0,0 +1,127 @@
+import os
+import unittest
+import tempfile
+import time
+from unittest.mock import patch
+from response_cache import ResponseCache
+from provider import Provider
+
+
+class CountingProvider(Provider):
+    """Provider answering with the prompt and counting the requests it sends"""
+    name = "Counting"
+    model_id = "counting-1"
+    sampling_params = {"temperature": 1.0}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = 0
+
+    def _complete(self, prompt, system_prompt=None):
+        self.requests += 1
+        return f"{self._system_prompt(system_prompt)}: {prompt}"
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        self.requests += 1
+        yield f"{self._system_prompt(system_prompt)}: "
+        yield prompt
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        """Test that the least recently used response is evicted first"""
+        cache = ResponseCache(max_entries=2)
+        cache.put('a', ['A'])
+        cache.put('b', ['B'])
+        cache.get('a')
+        cache.put('c', ['C'])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), ['A'])
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_size_limit(self):
+        """Test that entries are evicted once the memory tier is over its size limit"""
+        cache = ResponseCache(max_bytes=10)
+        cache.put('a', ['12345'])
+        cache.put('b', ['67890'])
+        cache.put('c', ['x'])
+        self.assertIsNone(cache.get('a'))
+        self.assertLessEqual(cache.stats()['bytes'], 10)
+
+    def test_ttl(self):
+        """Test that expired responses are misses"""
+        cache = ResponseCache(ttl=60)
+        cache.put('a', ['A'])
+        with patch('response_cache.time.time', return_value=time.time() + 120):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def test_disk_tier_survives_restart(self):
+        """Test that a new cache over the same directory serves earlier responses"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            ResponseCache(cache_dir=cache_dir).put('a', ['A', 'B'])
+            cache = ResponseCache(cache_dir=cache_dir)
+            self.assertEqual(cache.get('a'), ['A', 'B'])
+            self.assertEqual(cache.disk_hits, 1)
+
+    def test_disk_tier_evicts_least_recently_used_without_scanning(self):
+        """Test that the disk tier stays within its size from an index loaded once at startup"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            ResponseCache(cache_dir=cache_dir).put('a', ['A' * 100])
+            cache = ResponseCache(max_entries=1, cache_dir=cache_dir, max_disk_bytes=300)
+            with patch('response_cache.os.listdir', side_effect=AssertionError('directory scanned')):
+                cache.put('b', ['B' * 100])
+                cache.put('c', ['C' * 100])
+                # Read from disk, so c is the least recently used entry when d is written
+                self.assertEqual(cache.get('b'), ['B' * 100])
+                cache.put('d', ['D' * 100])
+            self.assertEqual(sorted(os.listdir(cache_dir)), ['b.json', 'd.json'])
+
+    def test_key_covers_request(self):
+        """Test that every part of a request changes the key"""
+        key = ResponseCache.key('ChatGPT', 'gpt', 'system', 'prompt', {'temperature': 1.0})
+        self.assertEqual(key, ResponseCache.key('ChatGPT', 'gpt', 'system', 'prompt', {'temperature': 1.0}))
+        self.assertNotEqual(key, ResponseCache.key('ChatGPT', 'gpt', 'other', 'prompt', {'temperature': 1.0}))
+        self.assertNotEqual(key, ResponseCache.key('ChatGPT', 'gpt', 'system', 'prompt', {'temperature': 0.5}))
+
+
+class TestProviderCache(unittest.TestCase):
+    def test_repeated_request_is_served_from_cache(self):
+        """Test that an identical request is not sent twice and a new system prompt is"""
+        provider = CountingProvider('system', cache=ResponseCache())
+        self.assertEqual(provider.get_response('hi'), 'system: hi')
+        self.assertEqual(provider.get_response('hi'), 'system: hi')
+        self.assertEqual(provider.requests, 1)
+        provider.get_response('hi', system_prompt='other')
+        self.assertEqual(provider.requests, 2)
+
+    def test_cached_stream_replays_chunks(self):
+        """Test that a cached streaming response is replayed chunk by chunk"""
+        provider = CountingProvider('system', cache=ResponseCache())
+        first, second = [], []
+        provider.get_streaming_response('hi', first.append)
+        self.assertEqual(provider.get_streaming_response('hi', second.append), 'system: hi')
+        self.assertEqual(first, second)
+        self.assertEqual(provider.requests, 1)
+        # A response cached whole is replayed in word-sized chunks
+        provider.get_response('hello there')
+        chunks = []
+        provider.get_streaming_response('hello there', chunks.append)
+        self.assertEqual(chunks, ['system: ', 'hello ', 'there'])
+
+    def test_errors_are_not_cached(self):
+        """Test that a failed request is sent again"""
+        provider = CountingProvider(cache=ResponseCache())
+
+        def fail(prompt, system_prompt=None):
+            provider.requests += 1
+            raise RuntimeError('down')
+
+        provider._complete = fail
+        provider.get_response('hi')
+        provider.get_response('hi')
+        self.assertEqual(provider.requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
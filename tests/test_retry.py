@@ -0,0 +1,120 @@
+import unittest
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from provider import Provider, AsyncProvider, STREAMING, ASYNC
+from retry import RetryPolicy, is_retryable, retry_after
+
+
+class StatusError(Exception):
+    """Stand-in for an SDK error carrying an HTTP response"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class FlakyProvider(Provider):
+    """Provider whose first requests fail with the given errors"""
+    name = "Flaky"
+    capabilities = frozenset({STREAMING})
+
+    def __init__(self, errors, retry=None, fail_mid_stream=False):
+        super().__init__(retry=retry or RetryPolicy(base_delay=0.001))
+        self.errors = list(errors)
+        self.fail_mid_stream = fail_mid_stream
+        self.attempts = 0
+
+    def _complete(self, prompt, system_prompt=None):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "answer"
+
+    def _stream_chunks(self, prompt, system_prompt=None):
+        self.attempts += 1
+        if self.errors and not self.fail_mid_stream:
+            raise self.errors.pop(0)
+        yield "ans"
+        if self.errors:
+            raise self.errors.pop(0)
+        yield "wer"
+
+
+class AsyncFlakyProvider(AsyncProvider, FlakyProvider):
+    capabilities = FlakyProvider.capabilities | {ASYNC}
+
+    async def _complete(self, prompt, system_prompt=None):
+        return FlakyProvider._complete(self, prompt, system_prompt)
+
+    async def _stream_chunks(self, prompt, system_prompt=None):
+        for chunk in FlakyProvider._stream_chunks(self, prompt, system_prompt):
+            yield chunk
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_transient_errors_are_retryable(self):
+        self.assertTrue(is_retryable(StatusError(529)))
+        self.assertTrue(is_retryable(StatusError(429)))
+        self.assertTrue(is_retryable(ConnectionResetError()))
+        self.assertFalse(is_retryable(StatusError(400)))
+        self.assertFalse(is_retryable(ValueError('bad prompt')))
+
+    def test_delay_honors_retry_after(self):
+        policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_retry_after=60)
+        self.assertEqual(retry_after(StatusError(429, {'retry-after-ms': '1500'})), 1.5)
+        self.assertEqual(policy.delay(0, StatusError(429, {'retry-after': '7'})), 7.0)
+        # Asked to wait longer than max_retry_after, the error is returned instead
+        self.assertIsNone(policy.delay(0, StatusError(429, {'retry-after': '120'})))
+        # Full jitter within the exponential backoff, and no retry after the last attempt
+        self.assertTrue(0 <= policy.delay(1, StatusError(503)) <= 2.0)
+        self.assertIsNone(policy.delay(2, StatusError(503)))
+
+    def test_transient_failure_is_retried(self):
+        provider = FlakyProvider([StatusError(529), ConnectionResetError()])
+        self.assertEqual(provider.get_response('Prompt'), 'answer')
+        self.assertEqual(provider.attempts, 3)
+
+    def test_retries_are_counted_across_threads(self):
+        policy = RetryPolicy(max_attempts=2, base_delay=0)
+
+        def flaky_call(_):
+            errors = [StatusError(503)]
+
+            def attempt():
+                if errors:
+                    raise errors.pop()
+                return 'answer'
+            return policy.call(attempt)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(set(executor.map(flaky_call, range(400))), {'answer'})
+        self.assertEqual(policy.retries, 400)
+
+    def test_permanent_failure_is_not_retried(self):
+        provider = FlakyProvider([StatusError(400)])
+        self.assertEqual(provider.get_response('Prompt'), 'Error getting response from Flaky: Error code: 400')
+        self.assertEqual(provider.attempts, 1)
+
+    def test_stream_is_retried_before_its_first_chunk_only(self):
+        provider = FlakyProvider([StatusError(503)])
+        chunks = []
+        self.assertEqual(provider.get_streaming_response('Prompt', chunks.append), 'answer')
+        self.assertEqual((chunks, provider.attempts), (['ans', 'wer'], 2))
+
+        provider = FlakyProvider([StatusError(503)], fail_mid_stream=True)
+        response = provider.get_streaming_response('Prompt')
+        self.assertTrue(response.startswith('Error getting streaming response from Flaky'))
+        self.assertEqual(provider.attempts, 1)
+
+    def test_async_provider_retries(self):
+        provider = AsyncFlakyProvider([StatusError(429)])
+        self.assertEqual(asyncio.run(provider.get_response('Prompt')), 'answer')
+        provider = AsyncFlakyProvider([ConnectionResetError()])
+        self.assertEqual(asyncio.run(provider.get_streaming_response('Prompt')), 'answer')
+        self.assertEqual(provider.attempts, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
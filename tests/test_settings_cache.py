@@ -0,0 +1,78 @@
+import unittest
+from settings_cache import SettingsCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDatabase:
+    def __init__(self, settings):
+        self.settings = settings
+        self.reads = 0
+        self.down = False
+
+    def get_setting(self, key):
+        self.reads += 1
+        if self.down:
+            raise ConnectionError('database down')
+        return self.settings.get(key)
+
+    def update_setting(self, key, value, description=None):
+        self.settings[key] = value
+
+
+class TestSettingsCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.database = FakeDatabase({'max_rounds': 10})
+        self.settings = SettingsCache(self.database, ttl=30, clock=self.clock)
+
+    def test_settings_are_cached_until_ttl(self):
+        self.assertEqual(self.settings.get('max_rounds'), 10)
+        self.database.settings['max_rounds'] = 5
+        self.assertEqual(self.settings.get('max_rounds'), 10)
+        self.assertEqual(self.settings.get('default_rounds', 1), 1)
+        self.assertEqual(self.database.reads, 2)
+        self.clock.now = 30
+        self.assertEqual(self.settings.get('max_rounds'), 5)
+        self.database.down = True
+        self.clock.now = 60
+        self.assertEqual(self.settings.get('max_rounds'), 5)
+
+    def test_watchers_are_applied_on_change(self):
+        applied = []
+        self.settings.watch('max_rounds', applied.append)
+        self.assertEqual(applied, [10])
+        self.clock.now = 30
+        self.settings.refresh()
+        self.assertEqual(applied, [10])
+        self.database.settings['max_rounds'] = 3
+        self.clock.now = 60
+        self.settings.refresh()
+        self.assertEqual(applied, [10, 3])
+
+    def test_watchers_can_wait_for_the_first_refresh(self):
+        applied = []
+        self.settings.watch('max_rounds', applied.append, load=False)
+        self.assertEqual((applied, self.database.reads), ([], 0))
+        self.settings.refresh()
+        self.assertEqual(applied, [10])
+        # Settings already loaded are applied right away
+        self.settings.watch('max_rounds', applied.append, load=False)
+        self.assertEqual((applied, self.database.reads), ([10, 10], 1))
+
+    def test_update_invalidates_the_cache(self):
+        applied = []
+        self.settings.watch('max_rounds', applied.append)
+        self.settings.update('max_rounds', 4)
+        self.assertEqual(self.settings.get('max_rounds'), 4)
+        self.assertEqual(applied, [10, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
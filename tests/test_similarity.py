@@ -0,0 +1,44 @@
+import unittest
+from similarity import TopicIndex, normalize_topic
+
+
+class TestTopicIndex(unittest.TestCase):
+    def test_normalize_topic(self):
+        self.assertEqual(normalize_topic("  What's the   future of AI?! "), "whats the future of ai")
+
+    def test_finds_near_duplicates(self):
+        index = TopicIndex()
+        index.add('a', "What is the future of artificial intelligence?")
+        index.add('b', "How do bees communicate with each other?")
+        match = index.best_match("what is the future of artificial intelligence")
+        self.assertEqual(match[0], 'a')
+        self.assertGreater(match[1], 0.9)
+        self.assertIsNone(index.best_match("Recipes for sourdough bread"))
+
+    def test_most_similar_first(self):
+        index = TopicIndex(threshold=0.3)
+        index.add('close', "The ethics of self-driving cars in cities")
+        index.add('closer', "The ethics of self-driving cars in big cities")
+        matches = index.find("The ethics of self-driving cars in big cities!")
+        self.assertEqual([doc_id for doc_id, _ in matches], ['closer', 'close'])
+
+    def test_max_age_and_remove(self):
+        index = TopicIndex(max_age=60)
+        index.add('old', "Should we colonize Mars?", timestamp=0)
+        self.assertEqual(index.find("Should we colonize Mars", now=30)[0][0], 'old')
+        self.assertEqual(index.find("Should we colonize Mars", now=120), [])
+        index.remove('old')
+        self.assertEqual(index.find("Should we colonize Mars", now=30), [])
+        self.assertEqual(len(index), 0)
+
+    def test_max_entries_drops_oldest(self):
+        index = TopicIndex(max_entries=2)
+        index.add('first', "Topic number one about oceans", timestamp=1)
+        index.add('second', "Topic number two about forests", timestamp=2)
+        index.add('third', "Topic number three about deserts", timestamp=3)
+        self.assertEqual(len(index), 2)
+        self.assertIsNone(index.best_match("Topic number one about oceans"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import time
+import unittest
+from streaming import ChunkCoalescer, CoalescedStream, StreamClosed, sse_event
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestChunkCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.events = []
+        self.coalescer = ChunkCoalescer(lambda *event: self.events.append(event), max_chars=10,
+                                        max_delay=0.05, clock=self.clock)
+
+    def test_merges_chunks_until_size_or_completion(self):
+        self.coalescer('Claude', '', False)
+        for token in ['Hel', 'lo ', 'wor', 'ld!', ' ok']:
+            self.coalescer('Claude', token, False)
+        self.coalescer('Claude', '', True)
+        self.assertEqual(self.events, [('Claude', '', False), ('Claude', 'Hello world!', False),
+                                       ('Claude', ' ok', False), ('Claude', '', True)])
+        self.assertEqual((self.coalescer.chunks_in, self.coalescer.chunks_out), (5, 2))
+
+    def test_flushes_stale_buffers(self):
+        self.coalescer('Claude', 'a', False)
+        self.coalescer('Gemini', 'b', False)
+        self.assertIsNone(self.coalescer('Claude', 'c', False))
+        self.assertEqual(self.events, [])
+        self.assertEqual(self.coalescer.due(), 0.05)
+        self.clock.now = 0.05
+        self.coalescer.flush_due()
+        self.assertEqual(sorted(self.events), [('Claude', 'ac', False), ('Gemini', 'b', False)])
+        self.assertIsNone(self.coalescer.due())
+
+    def test_sse_event(self):
+        self.assertEqual(sse_event('model_update', {'model': 'Claude', 'chunk': 'a\nb'}),
+                         'event: model_update\ndata: {"model": "Claude", "chunk": "a\\nb"}\n\n')
+
+
+class TestCoalescedStream(unittest.TestCase):
+    def test_streams_coalesced_events_and_result(self):
+        def run(callback):
+            callback('Claude', '', False)
+            for token in ['one ', 'two ']:
+                callback('Claude', token, False)
+            time.sleep(0.05)
+            callback('Claude', 'three', False)
+            time.sleep(0.05)
+            callback('Claude', '', True)
+            return {'Claude': 'one two three'}
+
+        stream = CoalescedStream(run, max_chars=100, max_delay=0.01)
+        events = list(stream)
+        self.assertEqual(events, [('Claude', '', False), ('Claude', 'one two ', False),
+                                  ('Claude', 'three', False), ('Claude', '', True)])
+        self.assertEqual(stream.result, {'Claude': 'one two three'})
+
+    def test_closing_cancels_the_round(self):
+        cancelled = []
+
+        def run(callback):
+            try:
+                while True:
+                    callback('Claude', 'token', False)
+                    time.sleep(0.001)
+            except StreamClosed:
+                cancelled.append(True)
+                raise
+
+        events = iter(CoalescedStream(run, max_chars=1))
+        next(events)
+        events.close()
+        deadline = time.monotonic() + 1
+        while not cancelled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(cancelled, [True])
+
+    def test_raises_errors_of_the_round(self):
+        def run(callback):
+            callback('Claude', 'partial', False)
+            raise ValueError('boom')
+
+        events = []
+        with self.assertRaises(ValueError):
+            for event in CoalescedStream(run):
+                events.append(event)
+        self.assertEqual(events, [('Claude', 'partial', False)])
+
+
+if __name__ == '__main__':
+    unittest.main()